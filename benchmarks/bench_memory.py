@@ -0,0 +1,33 @@
+"""Report the memory saved by the dataset schema on the synthetic fixture
+
+Run from the root of the repo with ``python -m benchmarks.bench_memory``.
+"""
+
+import pandas as pd
+
+from src.scrapper import CATEGORICAL_COLUMNS, NFLDataScrapper, memory_report
+
+
+def main(seasons: int = 10) -> None:
+    scrapper = NFLDataScrapper()
+    with open("./data/test-leaders.html", "rb") as f:
+        player_database = scrapper.parse_player_database(f.read())
+
+    # Stack the fixture to stand in for several seasons held in memory
+    dataset = scrapper.build_dataset(
+        pd.concat([player_database] * seasons, ignore_index=True)
+    )
+
+    # Same data with pandas' default object and float64 dtypes
+    default = dataset.astype(
+        {
+            **{col: "object" for col in CATEGORICAL_COLUMNS},
+            **{col: "float64" for col in dataset.select_dtypes("number")},
+        }
+    )
+
+    print(memory_report(default, dataset).to_string(float_format="{:.1%}".format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compare the leaders page parser backends on the synthetic html fixture
+
+Run from the root of the repo with ``python -m benchmarks.bench_parser``.
+"""
+
+import re
+import timeit
+
+from src.scrapper import PARSERS, NFLDataScrapper
+
+
+def load_fixture(scale: int = 1) -> bytes:
+    """Read the synthetic leaders page, repeating its rows `scale` times"""
+    with open("./data/test-leaders.html", "rb") as f:
+        content = f.read()
+
+    rows = b"".join(re.findall(rb"<tr class=.*?</tr>\n", content))
+
+    return content.replace(rows, rows * scale)
+
+
+def main(repeat: int = 5, number: int = 10) -> None:
+    # A scale of 6 gives roughly the ~700 rows of the live page
+    for scale in [1, 6]:
+        content = load_fixture(scale)
+
+        for parser in PARSERS:
+            scrapper = NFLDataScrapper(parser=parser)
+            best = min(
+                timeit.repeat(
+                    lambda: scrapper.parse_player_database(content),
+                    repeat=repeat,
+                    number=number,
+                )
+            )
+            print(f"{parser:>12} x{scale}: {best / number * 1000:8.2f} ms per parse")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Time and memory profile each stage of the data pipeline and the lineup
+simulation callback, offline from the synthetic leaders page fixture
+
+Run from the root of the repo with ``python -m benchmarks.bench_pipeline``.
+Stages that are slower or use more memory than their stored baseline by
+more than the tolerances fail the run. Pass ``--save`` to store the results
+as the new baselines after an intended change.
+
+The fixture's points, bye weeks and teams are randomly generated, and the
+extra seasons are random drifts of it. The baselines therefore measure how
+the code scales with the size of its input, while stages whose cost depends
+on the data's values, such as the aging curve fit, may behave differently
+on real pages.
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_parser import load_fixture
+from src.distributions import PlayerDistributions, weekly_tables
+from src.features import PlayerForm
+from src.figures import build_distribution_figure
+from src.scrapper import NFLDataScrapper
+from src.simulation import LineupSimulator
+from src.valuation import fit_aging_curves
+
+BASELINES = "./benchmarks/baselines.json"
+
+# Copies of the fixture's ~120 players, standing in for more players
+SCALES = [1, 10, 100]
+
+# Seasons of history the aging curves are fitted from
+SEASON_COUNTS = [1, 5, 10]
+
+# Copies of the fixture's players in each synthetic season of history, about
+# as many players as a real season lists
+HISTORY_SCALE = 10
+
+# Samples per lineup the simulation callback is run with
+SAMPLE_COUNTS = [1000, 10000, 100000]
+
+# Differences below these are noise rather than regressions
+MIN_SECONDS = 0.005
+MIN_PEAK_MB = 1.0
+
+
+def scale_players(player_database: pd.DataFrame, scale: int) -> pd.DataFrame:
+    """Repeat the parsed fixture as distinct players"""
+    return pd.concat(
+        [player_database]
+        + [
+            player_database.assign(Player=player_database["Player"] + f" {copy}")
+            for copy in range(1, scale)
+        ],
+        ignore_index=True,
+    )
+
+
+def season_history(player_database: pd.DataFrame, n_seasons: int) -> list:
+    """Synthetic player tables for consecutive seasons, each player's points
+    drifting by a random factor from one season to the next"""
+    rng = np.random.default_rng(0)
+    weeks = [col for col in player_database if col.isdigit()]
+    factors = np.ones(len(player_database))
+    tables = []
+
+    for _ in range(n_seasons):
+        tables.append(
+            player_database.assign(
+                **{week: player_database[week] * factors for week in weeks}
+            )
+        )
+        factors = factors * rng.uniform(0.6, 1.3, len(factors))
+
+    return tables
+
+
+def long_history(tables: list, last_season: int = 2022) -> pd.DataFrame:
+    """Combine season tables, oldest first, into the long table fetch_many
+    returns"""
+    weekly = []
+    for season, table in enumerate(tables, last_season - len(tables) + 1):
+        long = table.melt(
+            id_vars=["Player", "Position", "Team"],
+            value_vars=[col for col in table if col.isdigit()],
+            var_name="Week",
+            value_name="Points",
+        )
+        long.insert(0, "Scoring", "ppr")
+        long.insert(0, "Season", season)
+        weekly.append(long)
+
+    combined = pd.concat(weekly, ignore_index=True)
+    combined["Week"] = combined["Week"].astype(int)
+
+    return combined
+
+
+def season_stages(n_seasons: int) -> dict:
+    """Function building the multi-season long table and fitting the aging
+    curves from it, as ContractValuation does on the first data build"""
+    scrapper = NFLDataScrapper()
+    tables = season_history(
+        scale_players(scrapper.parse_player_database(load_fixture()), HISTORY_SCALE),
+        n_seasons,
+    )
+    history = long_history(tables)
+
+    return {
+        "long_history": lambda: long_history(tables),
+        "fit_aging_curves": lambda: fit_aging_curves(history),
+    }
+
+
+def pipeline_stages(scale: int) -> dict:
+    """Function running each stage of generate_nfl_dataset, the melt and
+    groupby in main.py and the form features on their prepared inputs"""
+    scrapper = NFLDataScrapper()
+    content = load_fixture(scale)
+    player_database = scale_players(
+        scrapper.parse_player_database(load_fixture()), scale
+    )
+    player_database["PlayerID"] = scrapper.player_index.add(
+        player_database["Player"], player_database["Position"], player_database["Team"]
+    )
+
+    merged, _ = scrapper.merge_owners(player_database)
+    cleaned = scrapper.clean_data(merged.copy())
+    par = scrapper.add_par_data(cleaned.copy())
+    priced = scrapper.add_price_data(par.copy())
+    dataset = scrapper.build_dataset(player_database.drop(columns="PlayerID"))
+    _, _, weekly = weekly_tables(dataset)
+    teams = dataset.groupby("PlayerID")["Team"].first()
+
+    return {
+        "parse": lambda: scrapper.parse_player_database(content),
+        "merge_owners": lambda: scrapper.merge_owners(player_database),
+        "clean_data": lambda: scrapper.clean_data(merged),
+        "add_par_data": lambda: scrapper.add_par_data(cleaned),
+        # Prices are filled in place, so each run starts from a copy
+        "add_price_data": lambda: scrapper.add_price_data(par.copy()),
+        "merge_trade_values": lambda: scrapper.merge_trade_values(priced),
+        "weekly_tables": lambda: weekly_tables(dataset),
+        "player_form": lambda: PlayerForm(weekly, teams),
+    }
+
+
+def simulation_stages() -> dict:
+    """Function doing the work of update_plot for each sample count, without
+    the simulation cache so every run simulates"""
+    scrapper = NFLDataScrapper()
+    with open("./data/test-leaders.html", "rb") as f:
+        dataset = scrapper.build_dataset(scrapper.parse_player_database(f.read()))
+    _, _, weekly = weekly_tables(dataset)
+    distributions = PlayerDistributions(weekly)
+    ids = weekly.index.tolist()
+    lineups = [ids[:10], ids[10:20]]
+
+    def update_plot(n_sims: int):
+        totals = LineupSimulator(distributions, n_sims=n_sims).simulate(lineups)
+        return build_distribution_figure(
+            totals, ["Original", "Alternative"], ["red", "blue"]
+        ).to_json()
+
+    return {
+        f"update_plot n_sims={n_sims}": lambda n_sims=n_sims: update_plot(n_sims)
+        for n_sims in SAMPLE_COUNTS
+    }
+
+
+def measure(stage, repeat: int) -> dict:
+    """Best wall time over several runs and the peak memory of one run"""
+    # Warm up first so lazy imports and caches aren't timed
+    stage()
+    seconds = min(timeit.repeat(stage, number=1, repeat=repeat))
+
+    tracemalloc.start()
+    stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": seconds, "peak_mb": peak / 2**20}
+
+
+def regressions(
+    results: dict, baselines: dict, tolerance: float, memory_tolerance: float
+) -> list:
+    """Stages that got slower or hungrier than their baseline"""
+    failures = []
+
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+
+        for metric, allowed, floor in [
+            ("seconds", tolerance, MIN_SECONDS),
+            ("peak_mb", memory_tolerance, MIN_PEAK_MB),
+        ]:
+            limit = max(baseline[metric] * (1 + allowed), baseline[metric] + floor)
+            if result[metric] > limit:
+                failures.append(
+                    f"{name}: {metric} {result[metric]:.4g} exceeds baseline "
+                    f"{baseline[metric]:.4g} by more than {allowed:.0%}"
+                )
+
+    return failures
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", action="store_true", help="Store new baselines")
+    # Timings on a shared machine vary by half between runs, while memory
+    # use is close to deterministic
+    parser.add_argument("--tolerance", type=float, default=1.0)
+    parser.add_argument("--memory-tolerance", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--seasons", type=int, nargs="+", default=SEASON_COUNTS)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for stage, run in simulation_stages().items():
+        results[stage] = measure(run, args.repeat)
+    for scale in args.scales:
+        for stage, run in pipeline_stages(scale).items():
+            results[f"{stage} x{scale}"] = measure(run, args.repeat)
+    for n_seasons in args.seasons:
+        for stage, run in season_stages(n_seasons).items():
+            results[f"{stage} seasons={n_seasons}"] = measure(run, args.repeat)
+
+    print(
+        pd.DataFrame(results)
+        .T.rename(columns={"seconds": "Seconds", "peak_mb": "Peak MB"})
+        .to_string(float_format="{:.4f}".format)
+    )
+
+    if args.save:
+        with open(BASELINES, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baselines to {BASELINES}")
+        return 0
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    failures = regressions(results, baselines, args.tolerance, args.memory_tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Serve the dashboard with several gunicorn workers
+
+Run with ``gunicorn --config gunicorn.conf.py``. A single loader process
+scrapes the data and writes it to SNAPSHOT_DIR, which every worker
+memory-maps, so adding workers adds neither memory nor scrape load.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+# Long simulations shouldn't get a worker killed
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+wsgi_app = "main:server"
+
+# Workers inherit the master's environment when they're forked
+os.environ["DATA_ROLE"] = "worker"
+os.environ.setdefault(
+    "SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "nfl-fantasy-snapshots")
+)
+
+
+def on_starting(server):
+    server.loader = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(__file__), "main.py")],
+        env={**os.environ, "DATA_ROLE": "loader"},
+    )
+
+
+def on_exit(server):
+    server.loader.terminate()
+    server.loader.wait(timeout=30)
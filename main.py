@@ -1,95 +1,361 @@
 import dash_auth
-import numpy as np
+import json
+import logging
 import os
-import plotly.express as px
 import plotly.graph_objects as go
+import requests
+import time
 
+from src.cache import ScrapeCache
+from src.distributions import (
+    DISTRIBUTION_MODELS,
+    PlayerDistributions,
+    weekly_tables,
+)
+from src.features import PlayerForm
+from src.figures import (
+    FigureCache,
+    build_distribution_figure,
+    build_form_figure,
+    build_playoff_odds_figure,
+    build_win_probability_figure,
+)
+from src.jobs import SharedJobManager
+from src.league import LeagueSimulator
+from src.lineups import LINEUP_OBJECTIVES, optimal_lineups
+from src.metrics import METRICS, RequestProfiler, instrument
+from src.provider import DataProvider
+from src.rosters import (
+    LINEUP_SLOTS,
+    build_roster_index,
+    squad_options,
+    squad_player_options,
+)
 from src.scrapper import NFLDataScrapper
-from dash import Dash, dcc, html
-from dash.dependencies import Input, Output
+from src.simulation import LineupSimulator, SimulationCache
+from src.snapshots import SnapshotStore
+from src.trades import TradeAnalyzer
+from src.valuation import ContractValuation
+from dash import Dash, dash_table, dcc, html, no_update
+from dash.dependencies import Input, Output, State
+from flask import Response, request
 
 external_stylesheets = ["https://codepen.io/chriddyp/pen/bWLwgP.css"]
 
 # Set environment variables
 VALID_USERNAME_PASSWORD_PAIRS = {os.getenv("API_USER"): os.environ.get("API_PASSWORD")}
 
-app = Dash(__name__, external_stylesheets=external_stylesheets)
+
+def data_version() -> str:
+    """Version of the data being served, so background jobs started on old
+    data aren't reused"""
+    data = provider.get()
+
+    return None if data is None else data["distributions"].version
+
+
+# Heavy callbacks run as background jobs in subprocesses, queued on disk so
+# every worker of the server shares them without a broker. The jobs' metrics
+# are handed back through the same queue.
+background_manager = SharedJobManager(
+    os.getenv("JOBS_DIR", "./data/jobs"), cache_by=[data_version], metrics=METRICS
+)
+
+# Responses are gzip compressed, which shrinks the figure payloads
+app = Dash(
+    __name__,
+    external_stylesheets=external_stylesheets,
+    compress=True,
+    background_callback_manager=background_manager,
+)
 
 auth = dash_auth.BasicAuth(app, VALID_USERNAME_PASSWORD_PAIRS)
 
-# Instantiate scrapper
-scraper = NFLDataScrapper()
+# Stage timings are recorded when METRICS_ENABLED is set, memory tracing
+# slows every allocation so has its own switch
+METRICS.configure(
+    enabled=os.getenv("METRICS_ENABLED", "false").lower() == "true",
+    trace_memory=os.getenv("METRICS_TRACE_MEMORY", "false").lower() == "true",
+)
+
+# Requests sent with a profile query parameter or X-Profile header are
+# captured with cProfile when PROFILE_REQUESTS is set
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "false").lower() == "true"
+profiler = RequestProfiler(os.getenv("PROFILE_DIR", "./data/profiles"))
+
+
+@app.server.before_request
+def start_request():
+    request.environ["metrics.start"] = time.perf_counter()
+    if PROFILE_REQUESTS and (
+        "profile" in request.args or request.headers.get("X-Profile")
+    ):
+        request.environ["metrics.profiling"] = profiler.start()
+
+
+@app.server.after_request
+def finish_request(response):
+    if request.environ.get("metrics.profiling"):
+        response.headers["X-Profile-File"] = profiler.stop(request.path)
+
+    # Includes serialising the callback's response, e.g. plotly figures
+    if METRICS.enabled and "metrics.start" in request.environ:
+        METRICS.observe(
+            f"request {request.path}",
+            time.perf_counter() - request.environ["metrics.start"],
+        )
 
-# Scrape player data
-all_players = scraper.generate_nfl_dataset()
+    return response
 
-players_long = all_players.iloc[:, 1:21].melt(id_vars=["Player", "Position", "Team"])
 
-players_long["variable"] = players_long["variable"].astype(int)
+@app.server.route("/metrics")
+def metrics():
+    background_manager.collect_metrics()
+    return Response(METRICS.export(), mimetype="text/plain; version=0.0.4")
 
-players_long.sort_values(["Player", "variable"], inplace=True)
 
-player_params = players_long.groupby(["Player"])["value"].agg([np.mean, np.std])
+# Squad selected when the Line Up Evaluator is opened
+DEFAULT_SQUAD = os.getenv("DEFAULT_SQUAD", "Tottenham Royals")
 
-fig1 = px.scatter(
-    all_players,
-    x="Price",
-    y="Avg",
-    color="Position",
-    facet_col="Free Agent",
-    size="Years Remaining",
-    trendline="ols",
-    hover_name="Player",
-    hover_data=["Squad", "Years Remaining"],
-    labels={"4": "Total Points Score", "Price": "Price"},
+# Instantiate scrapper, caching the scraped data on disk between restarts
+scraper = NFLDataScrapper(
+    cache=ScrapeCache(
+        cache_dir=os.getenv("SCRAPE_CACHE_DIR", "./data/cache"),
+        ttl=float(os.getenv("SCRAPE_CACHE_TTL", str(6 * 60 * 60))),
+        offline=os.getenv("SCRAPE_OFFLINE", "false").lower() == "true",
+    )
 )
-fig1.add_hline(y=all_players["Avg"].mean(), line_dash="dot")
-fig1.add_vline(x=all_players["Price"].mean(), line_dash="dot")
-fig1.update_traces(
-    marker=dict(line=dict(width=2, color="DarkSlateGrey")),
-    selector=dict(mode="markers"),
+
+# Figures are kept between data builds so unchanged ones aren't redrawn
+figure_cache = FigureCache()
+
+# League simulations are reused until the data changes
+league_simulator = LeagueSimulator(
+    n_sims=int(os.getenv("LEAGUE_SIMULATIONS", "10000")),
+    parallel_threshold=int(os.getenv("LEAGUE_PARALLEL_THRESHOLD", "50000")),
 )
-fig1.update_xaxes(matches=None)
-
-fig2 = px.scatter(
-    all_players,
-    x="Price",
-    y="Trade Value",
-    color="Position",
-    facet_col="Free Agent",
-    size="Years Remaining",
-    trendline="ols",
-    hover_name="Player",
-    hover_data=["Squad", "Years Remaining"],
-    labels={"4": "Total Points Score", "Price": "Price"},
+
+# Earlier seasons the contract aging curves are fitted from, the three before
+# the tracked season by default, or none to leave them flat
+VALUATION_SEASONS = [
+    int(season)
+    for season in os.getenv("VALUATION_SEASONS", "2019,2020,2021").split(",")
+    if season
+]
+
+# Aging curves are kept once fitted as past seasons don't change
+valuation = ContractValuation(
+    discount_rate=float(os.getenv("VALUATION_DISCOUNT_RATE", "0.1"))
 )
-fig2.add_hline(y=all_players["Trade Value"].mean(), line_dash="dot")
-fig2.add_vline(x=all_players["Price"].mean(), line_dash="dot")
-fig2.update_traces(
-    marker=dict(line=dict(width=2, color="DarkSlateGrey")),
-    selector=dict(mode="markers"),
+
+# Simulated lineup totals are reused across callbacks, so only a lineup that
+# changed is simulated again
+simulation_cache = SimulationCache(
+    maxsize=int(os.getenv("SIMULATION_CACHE_SIZE", "128")),
+    spill_dir=os.getenv("SIMULATION_SPILL_DIR") or None,
+    # Background jobs run in their own processes, so their totals are shared
+    # through the job cache on disk
+    store=background_manager.handle,
+    expire=background_manager.expire,
 )
-fig2.update_xaxes(matches=None)
-
-fig3 = px.scatter(
-    all_players,
-    x="Avg",
-    y="Trade Value",
-    color="Position",
-    facet_col="Free Agent",
-    size="Years Remaining",
-    trendline="ols",
-    hover_name="Player",
-    hover_data=["Squad", "Years Remaining"],
-    labels={"4": "Total Points Score", "Price": "Price"},
+METRICS.register_collector("simulation_cache", simulation_cache.stats)
+
+# "local" builds the data in this process, while in production a "loader"
+# process scrapes and writes snapshots that each server "worker" memory-maps
+DATA_ROLE = os.getenv("DATA_ROLE", "local")
+snapshot_store = SnapshotStore(os.getenv("SNAPSHOT_DIR", "./data/snapshots"))
+
+DATA_REFRESH_INTERVAL = (
+    float(os.environ["DATA_REFRESH_INTERVAL"])
+    if os.getenv("DATA_REFRESH_INTERVAL")
+    else None
 )
-fig3.add_hline(y=all_players["Trade Value"].mean(), line_dash="dot")
-fig3.add_vline(x=all_players["Avg"].mean(), line_dash="dot")
-fig3.update_traces(
-    marker=dict(line=dict(width=2, color="DarkSlateGrey")),
-    selector=dict(mode="markers"),
+
+
+def build_simulator(distributions: PlayerDistributions) -> LineupSimulator:
+    """Lineup simulator for a build's distributions, sharing the process's
+    simulation cache"""
+    return LineupSimulator(
+        distributions,
+        n_sims=int(os.getenv("N_SIMULATIONS", "10000")),
+        cache=simulation_cache,
+    )
+
+
+def build_app_data() -> dict:
+    """Scrape the player data and build everything the callbacks use, which
+    in production only the loader process does
+    Returns:
+        dict: Dataset and derived artifacts
+    """
+    # Scrape player data, after the first build only new gameweeks are fetched
+    all_players = scraper.generate_nfl_dataset(incremental=True)
+
+    _, _, weekly = weekly_tables(all_players)
+    teams = all_players.groupby("PlayerID")["Team"].first()
+
+    # Form features for every player in one pass over the weekly scores
+    form = PlayerForm(weekly, teams)
+
+    # Score distributions are fitted once per build from the weekly scores
+    distributions = PlayerDistributions(weekly, teams=teams, form=form.latest("ewma"))
+    simulator = build_simulator(distributions)
+
+    # Solve every squad's best lineup for each objective, with quantiles from
+    # the gamma fit as the exponential's only depend on the mean
+    lineups = {
+        objective: optimal_lineups(all_players, distributions, objective, "gamma")
+        for objective in LINEUP_OBJECTIVES
+    }
+
+    # Simulate every squad's best lineup through the whole regular season,
+    # as the league's standings so far aren't scraped to seed it with
+    league = league_simulator.simulate(
+        distributions,
+        lineups["mean"],
+        n_weeks=int(os.getenv("LEAGUE_REGULAR_SEASON_WEEKS", "14")),
+        playoff_teams=int(os.getenv("LEAGUE_PLAYOFF_TEAMS", "4")),
+    )
+
+    # Fit the aging curves on the first build, they stay flat until it works
+    if not valuation.fitted and VALUATION_SEASONS:
+        try:
+            valuation.fit(
+                scraper.fetch_many(
+                    [(season, "ppr", 1, 18) for season in VALUATION_SEASONS]
+                )
+            )
+        except (requests.RequestException, FileNotFoundError):
+            logging.getLogger(__name__).exception("Failed to fit aging curves")
+
+    # Only the figures whose inputs changed since the last build are redrawn,
+    # all of them as plain JSON so they can be stored in snapshots
+    figures = {
+        **figure_cache.build(all_players),
+        "fig_win_probability": json.loads(
+            build_win_probability_figure(league["win_probability"]).to_json()
+        ),
+        "fig_playoff_odds": json.loads(
+            build_playoff_odds_figure(league["standings"]).to_json()
+        ),
+    }
+
+    return {
+        "all_players": all_players,
+        "form": form,
+        "form_table": all_players.drop_duplicates("PlayerID")
+        .set_index("PlayerID")[["Player", "Position", "Squad"]]
+        .join(form.summary())
+        .sort_values("EWMA Form", ascending=False),
+        "distributions": distributions,
+        "simulator": simulator,
+        "lineups": lineups,
+        "league": league,
+        "contract_values": valuation.value(all_players, scraper.price_model),
+        "aging_curves_fitted": valuation.fitted,
+        "roster_index": build_roster_index(all_players),
+        "trades": TradeAnalyzer(all_players, distributions, simulator),
+        "figures": figures,
+    }
+
+
+def publish_snapshot() -> dict:
+    """Build the app's data and write it for the server's workers to load"""
+    data = build_app_data()
+
+    version = snapshot_store.write(
+        tables={
+            "all_players": data["all_players"],
+            "form_table": data["form_table"],
+            "trade_players": data["trades"].players,
+            "contract_values": data["contract_values"],
+            "win_probability": data["league"]["win_probability"],
+            "standings": data["league"]["standings"],
+        },
+        arrays={
+            "distributions": data["distributions"].to_arrays(),
+            "form": data["form"].to_arrays(),
+            "trades": data["trades"].to_arrays(),
+        },
+        metadata={
+            "distributions_version": data["distributions"].version,
+            # Player ids are numpy integers, which JSON can't store
+            "lineups": {
+                objective: {
+                    squad: [
+                        None if player is None else int(player) for player in lineup
+                    ]
+                    for squad, lineup in squad_lineups.items()
+                }
+                for objective, squad_lineups in data["lineups"].items()
+            },
+            "roster_index": data["roster_index"],
+            "figures": data["figures"],
+            "aging_curves_fitted": data["aging_curves_fitted"],
+        },
+    )
+
+    return {"version": version}
+
+
+def load_app_data() -> dict:
+    """Load the app's data from the loader's latest snapshot, memory-mapping
+    its tables and arrays rather than building anything
+    Returns:
+        dict: Dataset and derived artifacts, or None if there is no snapshot
+            newer than the one being served
+    """
+    version = snapshot_store.latest()
+    served = provider.get()
+    if version is None or (served is not None and served["version"] == version):
+        return None
+
+    snapshot = snapshot_store.load(version)
+    tables = snapshot["tables"]
+    arrays = snapshot["arrays"]
+    metadata = snapshot["metadata"]
+
+    distributions = PlayerDistributions.from_arrays(
+        arrays["distributions"], metadata["distributions_version"]
+    )
+    simulator = build_simulator(distributions)
+
+    return {
+        "all_players": tables["all_players"],
+        "form": PlayerForm.from_arrays(arrays["form"]),
+        "form_table": tables["form_table"],
+        "distributions": distributions,
+        "simulator": simulator,
+        "lineups": metadata["lineups"],
+        "league": {
+            "win_probability": tables["win_probability"],
+            "standings": tables["standings"],
+        },
+        "contract_values": tables["contract_values"],
+        "aging_curves_fitted": metadata["aging_curves_fitted"],
+        "roster_index": metadata["roster_index"],
+        "trades": TradeAnalyzer.from_arrays(
+            tables["trade_players"], arrays["trades"], distributions, simulator
+        ),
+        "figures": metadata["figures"],
+        "version": version,
+    }
+
+
+# Locally the data is built in the background so the app can serve requests
+# straight away. In production a loader process builds it into snapshots that
+# every worker of the server loads, see gunicorn.conf.py
+provider = DataProvider(build_app_data if DATA_ROLE == "local" else load_app_data)
+if DATA_ROLE == "local":
+    provider.start(refresh_interval=DATA_REFRESH_INTERVAL)
+elif DATA_ROLE == "worker":
+    # Workers check for a new snapshot until the loader has written one
+    poll_interval = float(os.getenv("SNAPSHOT_POLL_INTERVAL", "5"))
+    provider.start(refresh_interval=poll_interval, retry_interval=poll_interval)
+METRICS.register_collector(
+    "data", lambda: {"version": provider.version, "ready": int(provider.ready)}
 )
-fig3.update_xaxes(matches=None)
+
 
 app.layout = html.Div(
     [
@@ -100,275 +366,335 @@ app.layout = html.Div(
             children=[
                 dcc.Tab(label="Free Agent Evaluator", value="tab-1-example-graph"),
                 dcc.Tab(label="Line Up Evaluator", value="tab-2-example-graph"),
+                dcc.Tab(label="League Simulator", value="tab-3-example-graph"),
+                dcc.Tab(label="Trade Analyzer", value="tab-4-example-graph"),
+                dcc.Tab(label="Contract Values", value="tab-5-example-graph"),
+                dcc.Tab(label="Player Form", value="tab-6-example-graph"),
             ],
         ),
         html.Div(id="tabs-content-example-graph"),
+        # Polls until the data has loaded so the tab content can be rendered
+        dcc.Interval(id="data-poll", interval=2000),
     ]
 )
 
 
 @app.callback(
     Output("tabs-content-example-graph", "children"),
+    Output("data-poll", "disabled"),
     Input("tabs-example-graph", "value"),
+    Input("data-poll", "n_intervals"),
 )
-def render_content(tab):
+@instrument()
+def render_content(tab, _n_intervals):
+    data = provider.get()
+
+    if data is None:
+        return html.Div([html.H3("Loading player data...")]), False
+
     if tab == "tab-1-example-graph":
-        return html.Div(
-            [dcc.Graph(figure=fig1), dcc.Graph(figure=fig2), dcc.Graph(figure=fig3)]
+        return (
+            html.Div(
+                [
+                    dcc.Graph(figure=data["figures"]["fig1"]),
+                    dcc.Graph(figure=data["figures"]["fig2"]),
+                    dcc.Graph(figure=data["figures"]["fig3"]),
+                ]
+            ),
+            True,
         )
     elif tab == "tab-2-example-graph":
-        return html.Div(
-            [
-                html.Div(
-                    [
-                        dcc.Graph(
-                            id="graph-2-tabs-dcc",
-                        ),
-                    ],
-                    style={"width": "1600px", "height": "500px"},
-                ),
-                html.Div(
-                    [
-                        html.H3("Original Line Up"),
-                        html.H5("QB"),
-                        dcc.Dropdown(
-                            id="qb_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "QB")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("RB"),
-                        dcc.Dropdown(
-                            id="rb1_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "RB")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("RB"),
-                        dcc.Dropdown(
-                            id="rb2_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "RB")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("WR"),
-                        dcc.Dropdown(
-                            id="wr1_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "WR")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("WR"),
-                        dcc.Dropdown(
-                            id="wr2_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "WR")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("WR"),
-                        dcc.Dropdown(
-                            id="wr3_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "WR")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("TE"),
-                        dcc.Dropdown(
-                            id="te_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "TE")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("Flex"),
-                        dcc.Dropdown(
-                            id="flex_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (
-                                        (all_players["Position"] == "RB")
-                                        | (all_players["Position"] == "WR")
-                                        | (all_players["Position"] == "TE")
-                                    )
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("K"),
-                        dcc.Dropdown(
-                            id="k_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "K")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("DST"),
-                        dcc.Dropdown(
-                            id="dst_dropdown",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "DST")
-                                ]["Player"]
-                            ],
-                        ),
-                    ],
-                    style={"display": "inline-block", "width": "800px"},
-                ),
-                html.Div(
-                    [
-                        html.H3("Alternative Line Up"),
-                        html.H5("QB"),
-                        dcc.Dropdown(
-                            id="qb_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "QB")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("RB"),
-                        dcc.Dropdown(
-                            id="rb1_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "RB")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("RB"),
-                        dcc.Dropdown(
-                            id="rb2_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "RB")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("WR"),
-                        dcc.Dropdown(
-                            id="wr1_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "WR")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("WR"),
-                        dcc.Dropdown(
-                            id="wr2_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "WR")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("WR"),
-                        dcc.Dropdown(
-                            id="wr3_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "WR")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("TE"),
-                        dcc.Dropdown(
-                            id="te_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "TE")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("Flex"),
-                        dcc.Dropdown(
-                            id="flex_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (
-                                        (all_players["Position"] == "RB")
-                                        | (all_players["Position"] == "WR")
-                                        | (all_players["Position"] == "TE")
-                                    )
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("K"),
-                        dcc.Dropdown(
-                            id="k_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "K")
-                                ]["Player"]
-                            ],
-                        ),
-                        html.H5("DST"),
-                        dcc.Dropdown(
-                            id="dst_dropdown_alt",
-                            options=[
-                                {"label": player, "value": player}
-                                for player in all_players[
-                                    (all_players["Squad"] == "Tottenham Royals")
-                                    & (all_players["Position"] == "DST")
-                                ]["Player"]
-                            ],
-                        ),
-                    ],
-                    style={"display": "inline-block", "width": "800px"},
-                ),
+        squads = squad_options(data["roster_index"])
+        default_squad = (
+            DEFAULT_SQUAD
+            if DEFAULT_SQUAD in data["roster_index"]
+            else next(iter(squads), {"value": None})["value"]
+        )
+
+        objectives = LINEUP_OBJECTIVES.items()
+
+        return (
+            html.Div(
+                [
+                    html.Div(
+                        [
+                            dcc.Graph(
+                                id="graph-2-tabs-dcc",
+                            ),
+                            html.Progress(id="simulation_progress", value="0"),
+                            html.Button(
+                                "Cancel Simulation",
+                                id="cancel_simulation_button",
+                                disabled=True,
+                            ),
+                        ],
+                        style={"width": "1600px", "height": "500px"},
+                    ),
+                    html.Div(
+                        [
+                            html.H5("Squad"),
+                            dcc.Dropdown(
+                                id="squad_dropdown",
+                                options=squads,
+                                value=default_squad,
+                                clearable=False,
+                            ),
+                        ],
+                        style={"width": "800px"},
+                    ),
+                    html.Div(
+                        [
+                            html.H5("Score Distribution"),
+                            dcc.Dropdown(
+                                id="model_dropdown",
+                                options=[
+                                    {"label": label, "value": model}
+                                    for model, label in DISTRIBUTION_MODELS.items()
+                                ],
+                                value="exponential",
+                                clearable=False,
+                            ),
+                            dcc.Checklist(
+                                id="correlated_checklist",
+                                options=[
+                                    {
+                                        "label": "Correlate teammates",
+                                        "value": "correlated",
+                                    }
+                                ],
+                                value=[],
+                            ),
+                        ],
+                        style={"width": "800px"},
+                    ),
+                    html.Div(
+                        [
+                            html.H5("Optimise For"),
+                            dcc.Dropdown(
+                                id="objective_dropdown",
+                                options=[
+                                    {"label": label, "value": objective}
+                                    for objective, (label, _) in objectives
+                                ],
+                                value="mean",
+                                clearable=False,
+                            ),
+                            html.Button("Pick Best Line Up", id="optimise_button"),
+                        ],
+                        style={"width": "800px"},
+                    ),
+                    lineup_dropdowns("Original Line Up", ""),
+                    lineup_dropdowns("Alternative Line Up", "_alt"),
+                ]
+            ),
+            True,
+        )
+    elif tab == "tab-3-example-graph":
+        return (
+            html.Div(
+                [
+                    dcc.Graph(figure=data["figures"]["fig_playoff_odds"]),
+                    dcc.Graph(figure=data["figures"]["fig_win_probability"]),
+                ]
+            ),
+            True,
+        )
+    elif tab == "tab-4-example-graph":
+        squads = squad_options(data["roster_index"])
+
+        return (
+            html.Div(
+                [
+                    trade_side("Squad", "trade_squad", "Gives", squads),
+                    trade_side("Partner", "trade_partner", "Receives", squads),
+                    html.H3("Trade Evaluation"),
+                    dash_table.DataTable(id="trade_evaluation"),
+                    html.H3("Best Trades"),
+                    dash_table.DataTable(id="trade_candidates", page_size=25),
+                ]
+            ),
+            True,
+        )
+    elif tab == "tab-5-example-graph":
+        # Without fitted aging curves the projections assume every player
+        # keeps scoring at their current rate, which the table says
+        notes = (
+            []
+            if data["aging_curves_fitted"]
+            else [
+                html.P(
+                    "Aging curves aren't fitted, projected points hold every "
+                    "player at their current output"
+                )
             ]
         )
+        # Sorting and filtering happen in the browser on the precomputed table
+        return (
+            html.Div(
+                notes
+                + [
+                    dash_table.DataTable(
+                        data=data["contract_values"].round(1).to_dict("records"),
+                        columns=[
+                            {"name": column, "id": column}
+                            for column in data["contract_values"].columns
+                        ],
+                        sort_action="native",
+                        filter_action="native",
+                        page_size=50,
+                    )
+                ]
+            ),
+            True,
+        )
+    elif tab == "tab-6-example-graph":
+        form_table = data["form_table"]
+
+        return (
+            html.Div(
+                [
+                    dcc.Dropdown(
+                        id="form_players",
+                        options=[
+                            {"label": player, "value": player_id}
+                            for player_id, player in form_table["Player"].items()
+                        ],
+                        # Players in the best form are shown to start with
+                        value=form_table.index[:3].tolist(),
+                        multi=True,
+                    ),
+                    dcc.Graph(id="form_graph"),
+                    dash_table.DataTable(
+                        data=form_table.round(1).to_dict("records"),
+                        columns=[
+                            {"name": column, "id": column}
+                            for column in form_table.columns
+                        ],
+                        sort_action="native",
+                        filter_action="native",
+                        page_size=50,
+                    ),
+                ]
+            ),
+            True,
+        )
+
+
+def trade_side(title: str, prefix: str, players_label: str, squads: list) -> html.Div:
+    """Squad and player dropdowns for one side of a trade"""
+    return html.Div(
+        [
+            html.H5(title),
+            dcc.Dropdown(id=f"{prefix}_dropdown", options=squads),
+            html.H5(players_label),
+            dcc.Dropdown(id=f"{prefix}_players", multi=True),
+        ],
+        style={"display": "inline-block", "width": "800px"},
+    )
+
+
+def lineup_dropdowns(title: str, suffix: str) -> html.Div:
+    """Dropdowns for each slot of a line up, filled in once a squad is
+    selected"""
+    children = [html.H3(title)]
+
+    for slot, label, _ in LINEUP_SLOTS:
+        children += [html.H5(label), dcc.Dropdown(id=f"{slot}_dropdown{suffix}")]
+
+    return html.Div(children, style={"display": "inline-block", "width": "800px"})
+
+
+@app.callback(
+    [
+        Output(f"{slot}_dropdown{suffix}", "options")
+        for suffix in ["", "_alt"]
+        for slot, _, _ in LINEUP_SLOTS
+    ],
+    Input("squad_dropdown", "value"),
+)
+@instrument()
+def update_lineup_options(squad):
+    data = provider.get()
+    positions = data["roster_index"].get(squad, {}) if data is not None else {}
+
+    return [
+        positions.get(position, [])
+        for _ in ["", "_alt"]
+        for _, _, position in LINEUP_SLOTS
+    ]
+
+
+@app.callback(
+    [Output(f"{slot}_dropdown", "value") for slot, _, _ in LINEUP_SLOTS],
+    Input("optimise_button", "n_clicks"),
+    State("squad_dropdown", "value"),
+    State("objective_dropdown", "value"),
+    prevent_initial_call=True,
+)
+@instrument()
+def pick_best_lineup(_n_clicks, squad, objective):
+    data = provider.get()
+    if data is None or squad not in data["lineups"][objective]:
+        return [no_update] * len(LINEUP_SLOTS)
+
+    # Best lineups are solved for every squad when the data is built
+    return data["lineups"][objective][squad]
+
+
+@app.callback(
+    Output("trade_squad_players", "options"),
+    Output("trade_partner_players", "options"),
+    Output("trade_candidates", "data"),
+    Input("trade_squad_dropdown", "value"),
+    Input("trade_partner_dropdown", "value"),
+)
+@instrument()
+def update_trade_options(squad, partner):
+    data = provider.get()
+    if data is None:
+        return [], [], []
+
+    # Trades are ranked across the league until the squads are picked
+    candidates = data["trades"].rank_trades(squad, partner, limit=100)
+
+    return (
+        squad_player_options(data["roster_index"], squad),
+        squad_player_options(data["roster_index"], partner),
+        candidates.round(1).to_dict("records"),
+    )
+
+
+@app.callback(
+    Output("trade_evaluation", "data"),
+    Input("trade_squad_players", "value"),
+    Input("trade_partner_players", "value"),
+    State("trade_squad_dropdown", "value"),
+    State("trade_partner_dropdown", "value"),
+)
+@instrument()
+def evaluate_trade(gives, receives, squad, partner):
+    data = provider.get()
+    if data is None or not squad or not partner or not (gives or receives):
+        return []
+
+    evaluation = data["trades"].evaluate(squad, gives or [], partner, receives or [])
+
+    return evaluation.round(1).to_dict("records")
+
+
+@app.callback(
+    Output("form_graph", "figure"),
+    Input("form_players", "value"),
+)
+@instrument()
+def update_form_figure(players):
+    data = provider.get()
+    if data is None or not players:
+        return go.Figure()
+
+    names = data["form_table"]["Player"].reindex(players).tolist()
+
+    return build_form_figure(data["form"], players, names)
 
 
 @app.callback(
@@ -393,8 +719,21 @@ def render_content(tab):
     Input("flex_dropdown_alt", "value"),
     Input("dst_dropdown_alt", "value"),
     Input("k_dropdown_alt", "value"),
+    Input("model_dropdown", "value"),
+    Input("correlated_checklist", "value"),
+    # Simulations run in the background, a job still running when the inputs
+    # change is cancelled
+    background=True,
+    progress=[
+        Output("simulation_progress", "value"),
+        Output("simulation_progress", "max"),
+    ],
+    running=[(Output("cancel_simulation_button", "disabled"), False, True)],
+    cancel=[Input("cancel_simulation_button", "n_clicks")],
 )
+@instrument()
 def update_plot(
+    set_progress,
     qb_dropdown,
     rb1_dropdown,
     rb2_dropdown,
@@ -415,122 +754,49 @@ def update_plot(
     flex_dropdown_alt,
     dst_dropdown_alt,
     k_dropdown_alt,
+    model="exponential",
+    correlated=(),
 ):
-    if dst_dropdown_alt:
-        score_dist = []
-        score_dist_alt = []
-
-        for _ in range(10000):
-            qb_score = np.random.exponential(
-                player_params.loc[qb_dropdown, "mean"],
-            )
-            rb1_score = np.random.exponential(
-                player_params.loc[rb1_dropdown, "mean"],
-            )
-            rb2_score = np.random.exponential(
-                player_params.loc[rb2_dropdown, "mean"],
-            )
-            wr1_score = np.random.exponential(
-                player_params.loc[wr1_dropdown, "mean"],
-            )
-            wr2_score = np.random.exponential(
-                player_params.loc[wr2_dropdown, "mean"],
-            )
-            wr3_score = np.random.exponential(
-                player_params.loc[wr3_dropdown, "mean"],
-            )
-            te_score = np.random.exponential(
-                player_params.loc[te_dropdown, "mean"],
-            )
-            flex_score = np.random.exponential(
-                player_params.loc[flex_dropdown, "mean"],
-            )
-            kicker_score = np.random.exponential(
-                player_params.loc[k_dropdown, "mean"],
-            )
-            dst_score = np.random.exponential(
-                player_params.loc[dst_dropdown, "mean"],
-            )
-
-            total_score = (
-                qb_score
-                + rb1_score
-                + rb2_score
-                + wr1_score
-                + wr2_score
-                + wr3_score
-                + te_score
-                + flex_score
-                + kicker_score
-                + dst_score
-            )
-
-            score_dist.append(total_score)
-
-            qb_score_alt = np.random.exponential(
-                player_params.loc[qb_dropdown_alt, "mean"],
-            )
-            rb1_score_alt = np.random.exponential(
-                player_params.loc[rb1_dropdown_alt, "mean"],
-            )
-            rb2_score_alt = np.random.exponential(
-                player_params.loc[rb2_dropdown_alt, "mean"],
-            )
-            wr1_score_alt = np.random.exponential(
-                player_params.loc[wr1_dropdown_alt, "mean"],
-            )
-            wr2_score_alt = np.random.exponential(
-                player_params.loc[wr2_dropdown_alt, "mean"],
-            )
-            wr3_score_alt = np.random.exponential(
-                player_params.loc[wr3_dropdown_alt, "mean"],
-            )
-            te_score_alt = np.random.exponential(
-                player_params.loc[te_dropdown_alt, "mean"],
-            )
-            flex_score_alt = np.random.exponential(
-                player_params.loc[flex_dropdown_alt, "mean"],
-            )
-            kicker_score_alt = np.random.exponential(
-                player_params.loc[k_dropdown_alt, "mean"],
-            )
-            dst_score_alt = np.random.exponential(
-                player_params.loc[dst_dropdown_alt, "mean"],
-            )
-
-            total_score_alt = (
-                qb_score_alt
-                + rb1_score_alt
-                + rb2_score_alt
-                + wr1_score_alt
-                + wr2_score_alt
-                + wr3_score_alt
-                + te_score_alt
-                + flex_score_alt
-                + kicker_score_alt
-                + dst_score_alt
-            )
+    lineup = [
+        qb_dropdown,
+        rb1_dropdown,
+        rb2_dropdown,
+        wr1_dropdown,
+        wr2_dropdown,
+        wr3_dropdown,
+        te_dropdown,
+        flex_dropdown,
+        k_dropdown,
+        dst_dropdown,
+    ]
+    lineup_alt = [
+        qb_dropdown_alt,
+        rb1_dropdown_alt,
+        rb2_dropdown_alt,
+        wr1_dropdown_alt,
+        wr2_dropdown_alt,
+        wr3_dropdown_alt,
+        te_dropdown_alt,
+        flex_dropdown_alt,
+        k_dropdown_alt,
+        dst_dropdown_alt,
+    ]
 
-            score_dist_alt.append(total_score_alt)
+    data = provider.get()
 
-        fig = go.Figure()
-        fig.add_trace(
-            go.Histogram(x=score_dist, opacity=0.5, name="Original", marker_color="red")
+    # Player ids start at 0, so check for unselected dropdowns explicitly
+    if data is not None and None not in lineup and None not in lineup_alt:
+        # Simulate both lineups in a single batched draw
+        totals = data["simulator"].simulate(
+            [lineup, lineup_alt],
+            model=model,
+            correlated="correlated" in correlated,
+            progress=lambda done, total: set_progress((str(done), str(total))),
         )
-        fig.add_vline(x=np.median(score_dist), line_dash="dash", line_color="red")
 
-        fig.add_trace(
-            go.Histogram(
-                x=score_dist_alt, opacity=0.5, name="Alternative", marker_color="blue"
-            )
-        )
-        fig.add_vline(x=np.median(score_dist_alt), line_dash="dash", line_color="blue")
-        fig.update_layout(
-            title_text="Sampled Results",  # title of plot
-            xaxis_title_text="Team Points",  # xaxis label
-            yaxis_title_text="Count",  # yaxis label
-            bargap=0.2,  # gap between bars of adjacent location coordinates
-            template="plotly_white",
+        # Totals are binned here so only the bin counts are sent to the browser
+        fig = build_distribution_figure(
+            totals, names=["Original", "Alternative"], colors=["red", "blue"]
         )
 
         return fig
@@ -539,5 +805,18 @@ def update_plot(
         return go.Figure()
 
 
+# WSGI application for gunicorn
+server = app.server
+
+
+def run_loader() -> None:
+    """Write snapshots for the server's workers, rebuilding them every
+    DATA_REFRESH_INTERVAL seconds if it is set"""
+    DataProvider(publish_snapshot).start(refresh_interval=DATA_REFRESH_INTERVAL).join()
+
+
 if __name__ == "__main__":
-    app.run_server(debug=True, host="0.0.0.0", port=8080)
+    if DATA_ROLE == "loader":
+        run_loader()
+    else:
+        app.run(debug=True, host="0.0.0.0", port=8080)
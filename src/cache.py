@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+
+class ScrapeCache:
+    def __init__(
+        self,
+        cache_dir: str = "./data/cache",
+        ttl: float = 6 * 60 * 60,
+        offline: bool = False,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.offline = offline
+
+    def key(self, url: str, season: int, start: int, end: int) -> str:
+        """Build the cache key for a scraped page
+        Args:
+            url (str): Base url of the page being scraped
+            season (int): Season the page covers
+            start (int): First gameweek on the page
+            end (int): Last gameweek on the page
+        Returns:
+            str: Hash identifying the cached entry
+        """
+        return hashlib.sha1(f"{url}|{season}|{start}|{end}".encode()).hexdigest()
+
+    def _data_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _metadata_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def metadata(self, key: str) -> dict:
+        """Metadata stored alongside a cached entry, empty if there is none"""
+        try:
+            with open(self._metadata_path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def is_fresh(self, key: str) -> bool:
+        """Whether a cached entry exists and is younger than the ttl"""
+        fetched_at = self.metadata(key).get("fetched_at")
+
+        return (
+            fetched_at is not None
+            and os.path.exists(self._data_path(key))
+            and time.time() - fetched_at < self.ttl
+        )
+
+    def load(self, key: str) -> pd.DataFrame:
+        """Read a cached entry from disk
+        Returns:
+            pd.DataFrame: Cached data, or None if the entry does not exist
+        """
+        if not os.path.exists(self._data_path(key)):
+            return None
+
+        return pd.read_parquet(self._data_path(key))
+
+    def save(self, key: str, data: pd.DataFrame, **metadata) -> None:
+        """Write an entry to disk along with its metadata
+        Args:
+            key (str): Cache key for the entry
+            data (pd.DataFrame): Data to be cached
+            **metadata: Additional values such as the url or ETag of the
+                response to store with the entry
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = f"{self._data_path(key)}.{os.getpid()}.tmp"
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self._data_path(key))
+
+        self._write_metadata(key, {**metadata, "fetched_at": time.time()})
+
+    def touch(self, key: str) -> None:
+        """Mark a cached entry as fresh without rewriting its data"""
+        self._write_metadata(key, {**self.metadata(key), "fetched_at": time.time()})
+
+    def _write_metadata(self, key: str, metadata: dict) -> None:
+        tmp_path = f"{self._metadata_path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+        os.replace(tmp_path, self._metadata_path(key))
@@ -0,0 +1,426 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.special import gammaincinv, ndtr  # pylint: disable=no-name-in-module
+
+from src.features import played_weeks
+
+# Score distribution models a lineup can be simulated with
+DISTRIBUTION_MODELS = {
+    "exponential": "Exponential of the mean",
+    "gamma": "Gamma matched to the mean and variance",
+    "zero-inflated": "Gamma with a chance of a zero (BYE) week",
+    "bootstrap": "Resampled weekly scores",
+    "form": "Zero-inflated gamma centred on recent form",
+}
+
+# Precomputed arrays a PlayerDistributions can be rebuilt from
+DISTRIBUTION_ARRAYS = [
+    "scores",
+    "mean",
+    "var",
+    "shape",
+    "scale",
+    "p_zero",
+    "played_mean",
+    "played_shape",
+    "played_scale",
+    "sorted_scores",
+    "team_codes",
+    "team_positions",
+    "block_offsets",
+    "correlation_blocks",
+    "form_mean",
+    "form_scale",
+]
+
+
+def weekly_tables(data: pd.DataFrame) -> tuple:
+    """Reshape the weekly points of every player for the simulations
+    Args:
+        data (pd.DataFrame): Combined data for NFL players
+    Returns:
+        tuple: Long format weekly points, mean and std of each player's
+            points, and a player by week table of points. Players listed
+            more than once are averaged.
+    """
+    weeks = [col for col in data if col.isdigit()]
+    players_long = data[["PlayerID", "Player", "Position", "Team", *weeks]].melt(
+        id_vars=["PlayerID", "Player", "Position", "Team"]
+    )
+
+    players_long["variable"] = players_long["variable"].astype(int)
+
+    players_long.sort_values(["PlayerID", "variable"], inplace=True)
+
+    player_params = players_long.groupby(["PlayerID"])["value"].agg(["mean", "std"])
+
+    weekly = players_long.pivot_table(
+        index="PlayerID", columns="variable", values="value", aggfunc="mean"
+    )
+
+    return players_long, player_params, weekly
+
+
+def gamma_parameters(mean: np.ndarray, var: np.ndarray) -> tuple:
+    """Method of moments gamma shape and scale
+    Args:
+        mean (np.ndarray): Mean score of each player
+        var (np.ndarray): Variance of each player's score
+    Returns:
+        tuple: Shape and scale arrays, NaN where the scores are constant and
+            no gamma fits
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fits = (mean > 0) & (var > 0)
+        shape = np.where(fits, mean**2 / var, np.nan)
+        scale = np.where(fits, var / mean, np.nan)
+
+    return shape, scale
+
+
+def clip_correlation(correlation: np.ndarray) -> np.ndarray:
+    """Nearest positive definite correlation matrix, found by clipping the
+    eigenvalues and restoring the unit diagonal"""
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    if eigenvalues.min() < 1e-6:
+        correlation = (eigenvectors * np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+        scale = np.sqrt(np.diag(correlation))
+        correlation /= scale[:, None] * scale[None, :]
+
+    return correlation
+
+
+def team_correlation(
+    scores: np.ndarray, teams: np.ndarray, shrinkage: float = 0.5
+) -> tuple:
+    """Correlation of weekly scores between teammates, one block per team
+    as players on different teams are treated as independent
+    Args:
+        scores (np.ndarray): Player by week array of points scored
+        teams (np.ndarray): Team of each player
+        shrinkage (float): Fraction the estimated correlations are shrunk
+            towards zero, as a handful of weeks gives noisy estimates
+    Returns:
+        tuple: Code of each player's team, and for each team code the
+            positive definite correlation matrix between its players in the
+            order they're listed
+    """
+    centred = scores - scores.mean(axis=1, keepdims=True)
+    norms = np.sqrt((centred**2).sum(axis=1, keepdims=True))
+    standardised = np.divide(
+        centred, norms, out=np.zeros_like(centred), where=norms > 0
+    )
+
+    codes = pd.factorize(teams)[0]
+    order = np.argsort(codes, kind="stable")
+    starts = np.searchsorted(
+        codes[order], np.arange(codes.max() + 2 if len(codes) else 1)
+    )
+
+    blocks = []
+    for start, stop in zip(starts[:-1], starts[1:]):
+        members = standardised[order[start:stop]]
+        block = (members @ members.T) * (1 - shrinkage)
+        np.fill_diagonal(block, 1.0)
+        blocks.append(block if len(block) == 1 else clip_correlation(block))
+
+    return codes, blocks
+
+
+class PlayerDistributions:
+    def __init__(
+        self,
+        weekly: pd.DataFrame,
+        teams: pd.Series = None,
+        shrinkage: float = 0.5,
+        form: pd.Series = None,
+        factor_cache_size: int = 128,
+    ) -> None:
+        """Precompute the parameters of every model from the weekly scores
+        Args:
+            weekly (pd.DataFrame): Player by week table of points scored,
+                with BYE and unplayed weeks as 0
+            teams (pd.Series): NFL team of each player, used to correlate
+                teammates' scores in correlated simulations
+            shrinkage (float): Fraction teammate correlations are shrunk
+                towards zero
+            form (pd.Series): Recent form of each player, such as the
+                exponentially weighted form from PlayerForm, in points per
+                game played, defaults to the mean of the games played
+            factor_cache_size (int): Number of sets of players whose
+                correlation factor is kept, least recently used first out
+        """
+        scores, _ = played_weeks(weekly)
+
+        self.index = weekly.index
+        self.scores = scores
+
+        self.mean = scores.mean(axis=1) if scores.shape[1] else np.zeros(len(scores))
+        self.var = scores.var(axis=1) if scores.shape[1] else np.zeros(len(scores))
+        self.shape, self.scale = gamma_parameters(self.mean, self.var)
+
+        # The zero-inflated model fits its gamma to the weeks a player scored
+        played = scores != 0
+        n_played = played.sum(axis=1)
+        self.p_zero = 1 - n_played / max(scores.shape[1], 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            played_mean = np.where(played, scores, 0).sum(axis=1) / n_played
+            played_var = (
+                np.where(played, (scores - played_mean[:, None]) ** 2, 0).sum(axis=1)
+                / n_played
+            )
+        self.played_mean = np.nan_to_num(played_mean)
+        self.played_shape, self.played_scale = gamma_parameters(
+            self.played_mean, np.nan_to_num(played_var)
+        )
+
+        # Form is measured over the games a player played, so the form
+        # model is the zero-inflated one with its played gamma rescaled to
+        # the player's form, keeping its shape
+        self.form_mean = (
+            self.played_mean
+            if form is None
+            else form.reindex(weekly.index).fillna(0).to_numpy(dtype="float64")
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.form_scale = self.form_mean / self.played_shape
+
+        # Sorted scores give the bootstrap model's inverse CDF
+        self.sorted_scores = np.sort(scores, axis=1)
+
+        # The correlation is estimated once per refresh, while the Cholesky
+        # factor of each set of players is computed when first simulated.
+        # Only each team's block is stored, flattened one after another.
+        teams = (
+            pd.Series(np.nan, index=weekly.index, dtype=object)
+            if teams is None
+            else teams.reindex(weekly.index).astype(object)
+        )
+        # Free agents and players without a team aren't teammates, so each
+        # is given a block of their own
+        unattached = pd.Series(np.arange(len(teams)), index=teams.index)
+        teams = teams.where(teams.notna() & (teams != "FA"), unattached)
+        codes, blocks = team_correlation(scores, teams.to_numpy(), shrinkage)
+        self.team_codes = codes
+        self.team_positions = (
+            pd.Series(codes).groupby(codes).cumcount().to_numpy(dtype="int64")
+        )
+        self.block_offsets = np.cumsum([0] + [block.size for block in blocks])
+        self.correlation_blocks = (
+            np.concatenate([block.ravel() for block in blocks])
+            if blocks
+            else np.zeros(0)
+        )
+        self.factor_cache_size = factor_cache_size
+        self._factors = OrderedDict()
+
+        # Simulations are cached by version, which changes with anything
+        # the distributions are fitted from
+        version = hashlib.sha1(pd.util.hash_pandas_object(weekly).to_numpy())
+        version.update(pd.util.hash_pandas_object(teams.astype(str)).to_numpy())
+        version.update(self.form_mean)
+        version.update(repr(shrinkage).encode())
+        self.version = version.hexdigest()
+
+    def to_arrays(self) -> dict:
+        """Precomputed arrays, with the player index, for a snapshot"""
+        arrays = {name: getattr(self, name) for name in DISTRIBUTION_ARRAYS}
+
+        return {"index": self.index.to_numpy(), **arrays}
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: dict, version: str, factor_cache_size: int = 128
+    ) -> "PlayerDistributions":
+        """Distributions backed by the arrays from to_arrays, without refitting"""
+        distributions = cls.__new__(cls)
+        distributions.index = pd.Index(arrays["index"])
+        distributions.version = version
+        for name in DISTRIBUTION_ARRAYS:
+            setattr(distributions, name, arrays[name])
+        distributions.factor_cache_size = factor_cache_size
+        distributions._factors = OrderedDict()
+
+        return distributions
+
+    def rows(self, players: list) -> np.ndarray:
+        """Row of each player in the parameter arrays"""
+        rows = self.index.get_indexer(players)
+        if (rows == -1).any():
+            raise KeyError(f"Unknown players: {list(np.asarray(players)[rows == -1])}")
+
+        return rows
+
+    def sample(
+        self, model: str, rows: np.ndarray, size: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        """Draw scores for a set of players
+        Args:
+            model (str): One of DISTRIBUTION_MODELS
+            rows (np.ndarray): Rows of the players to sample
+            size (int): Number of draws per player
+            rng (np.random.Generator): Source of randomness
+        Returns:
+            np.ndarray: Array of shape (size, len(rows))
+        """
+        if model == "exponential":
+            return rng.standard_exponential((size, len(rows))) * self.mean[rows]
+
+        if model == "gamma":
+            return self._sample_gamma(
+                self.mean[rows], self.shape[rows], self.scale[rows], size, rng
+            )
+
+        if model in ("zero-inflated", "form"):
+            mean, scale = (
+                (self.played_mean, self.played_scale)
+                if model == "zero-inflated"
+                else (self.form_mean, self.form_scale)
+            )
+            draws = self._sample_gamma(
+                mean[rows], self.played_shape[rows], scale[rows], size, rng
+            )
+            return np.where(rng.random(draws.shape) < self.p_zero[rows], 0, draws)
+
+        if model == "bootstrap":
+            if not self.scores.shape[1]:
+                return np.zeros((size, len(rows)))
+            weeks = rng.integers(0, self.scores.shape[1], (size, len(rows)))
+            return self.scores[rows, weeks]
+
+        raise ValueError(f"Unknown distribution model: {model}")
+
+    def correlation(self, rows: np.ndarray) -> np.ndarray:
+        """Correlation matrix between a set of players"""
+        correlation = np.zeros((len(rows), len(rows)))
+        codes = self.team_codes[rows]
+
+        for code in np.unique(codes):
+            members = np.flatnonzero(codes == code)
+            correlation[np.ix_(members, members)] = self._team_block(
+                code, rows[members]
+            )
+
+        return correlation
+
+    def _team_block(self, code: int, rows: np.ndarray) -> np.ndarray:
+        offset = self.block_offsets[code]
+        size = int(np.sqrt(self.block_offsets[code + 1] - offset))
+        block = self.correlation_blocks[offset : offset + size * size]
+        positions = self.team_positions[rows]
+
+        return block.reshape(size, size)[np.ix_(positions, positions)]
+
+    def correlation_factor(self, rows: np.ndarray) -> np.ndarray:
+        """Square root of the correlation between a set of players, made up
+        of the Cholesky factor of each team's players, the most recently
+        used kept for reuse"""
+        key = tuple(rows)
+        if key in self._factors:
+            self._factors.move_to_end(key)
+        else:
+            factor = np.zeros((len(rows), len(rows)))
+            codes = self.team_codes[rows]
+
+            for code in np.unique(codes):
+                members = np.flatnonzero(codes == code)
+                correlation = self._team_block(code, rows[members])
+                try:
+                    team_factor = np.linalg.cholesky(correlation)
+                except np.linalg.LinAlgError:
+                    # A player picked twice makes the block singular, any
+                    # square root still samples it correctly
+                    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+                    team_factor = eigenvectors * np.sqrt(np.maximum(eigenvalues, 0))
+                factor[np.ix_(members, members)] = team_factor
+
+            self._factors[key] = factor
+            while len(self._factors) > self.factor_cache_size:
+                self._factors.popitem(last=False)
+
+        return self._factors[key]
+
+    def sample_correlated(
+        self, model: str, rows: np.ndarray, size: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        """Draw scores for a set of players jointly, through a Gaussian copula
+        so each player keeps the marginal distribution of the model
+        Args:
+            model (str): One of DISTRIBUTION_MODELS
+            rows (np.ndarray): Rows of the players to sample
+            size (int): Number of draws per player
+            rng (np.random.Generator): Source of randomness
+        Returns:
+            np.ndarray: Array of shape (size, len(rows))
+        """
+        normals = (
+            rng.standard_normal((size, len(rows))) @ self.correlation_factor(rows).T
+        )
+
+        return self.quantile(model, rows, ndtr(normals))
+
+    def quantile(self, model: str, rows: np.ndarray, q: np.ndarray) -> np.ndarray:
+        """Inverse CDF of each player's score distribution
+        Args:
+            model (str): One of DISTRIBUTION_MODELS
+            rows (np.ndarray): Rows of the players
+            q (np.ndarray): Array of shape (n, len(rows)) of probabilities
+        Returns:
+            np.ndarray: Scores at the given quantiles
+        """
+        if model == "exponential":
+            return -self.mean[rows] * np.log1p(-q)
+
+        if model == "gamma":
+            return self._gamma_quantile(
+                self.mean[rows], self.shape[rows], self.scale[rows], q
+            )
+
+        if model in ("zero-inflated", "form"):
+            mean, scale = (
+                (self.played_mean, self.played_scale)
+                if model == "zero-inflated"
+                else (self.form_mean, self.form_scale)
+            )
+            p_zero = self.p_zero[rows]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                played_q = np.clip((q - p_zero) / (1 - p_zero), 0, 1)
+            scores = self._gamma_quantile(
+                mean[rows], self.played_shape[rows], scale[rows], played_q
+            )
+            return np.where(q < p_zero, 0, scores)
+
+        if model == "bootstrap":
+            n_weeks = self.sorted_scores.shape[1]
+            if not n_weeks:
+                return np.zeros(q.shape)
+            weeks = np.minimum((q * n_weeks).astype(int), n_weeks - 1)
+            return self.sorted_scores[rows, weeks]
+
+        raise ValueError(f"Unknown distribution model: {model}")
+
+    @staticmethod
+    def _gamma_quantile(
+        mean: np.ndarray, shape: np.ndarray, scale: np.ndarray, q: np.ndarray
+    ) -> np.ndarray:
+        fitted = ~np.isnan(shape)
+        scores = gammaincinv(np.where(fitted, shape, 1), q)
+
+        return np.where(fitted, scores * np.where(fitted, scale, 0), mean)
+
+    @staticmethod
+    def _sample_gamma(
+        mean: np.ndarray,
+        shape: np.ndarray,
+        scale: np.ndarray,
+        size: int,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        # Players without a fitted gamma always score their mean
+        fitted = ~np.isnan(shape)
+        draws = rng.standard_gamma(np.where(fitted, shape, 1), (size, len(mean)))
+
+        return np.where(fitted, draws * np.where(fitted, scale, 0), mean)
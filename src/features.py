@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+
+# Games the rolling form and consistency are measured over
+FORM_WINDOW = 4
+
+# Games it takes for a week's weight in the exponentially weighted form to
+# halve
+FORM_HALFLIFE = 3.0
+
+# Quantiles of a player's games reported as their floor and ceiling
+FLOOR_QUANTILE = 0.1
+CEILING_QUANTILE = 0.9
+
+# Feature arrays a PlayerForm can be rebuilt from
+FORM_ARRAYS = [
+    "scores",
+    "bye",
+    "played",
+    "games_available",
+    "games_played",
+    "rolling_mean",
+    "rolling_std",
+    "ewma",
+    "change",
+    "mean",
+    "std",
+    "floor",
+    "ceiling",
+    "last_change",
+]
+
+
+def bye_weeks(scores: np.ndarray, teams: np.ndarray) -> np.ndarray:
+    """Weeks each player's NFL team had a bye, taken as the weeks nobody on
+    the team scored while the rest of the league played
+    Args:
+        scores (np.ndarray): Player by week array of points scored
+        teams (np.ndarray): NFL team of each player
+    Returns:
+        np.ndarray: Boolean array of the same shape as scores
+    """
+    codes = pd.factorize(teams)[0]
+    team_scored = np.zeros((codes.max() + 1 if len(codes) else 0, scores.shape[1]))
+    np.add.at(team_scored, codes, scores != 0)
+
+    return (team_scored[codes] == 0) & (scores != 0).any(axis=0)
+
+
+def played_weeks(weekly: pd.DataFrame) -> tuple:
+    """Points scored in the weeks played so far, taken as the weeks anybody
+    scored in
+    Args:
+        weekly (pd.DataFrame): Player by week table of points scored, with
+            BYE and unplayed weeks as 0
+    Returns:
+        tuple: Player by week array of points scored in the weeks played,
+            and the columns of those weeks
+    """
+    scores = weekly.to_numpy(dtype="float64")
+    weeks_played = scores.any(axis=0)
+
+    return np.ascontiguousarray(scores[:, weeks_played]), weekly.columns[weeks_played]
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last non-NaN value along each row"""
+    positions = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+
+    return np.take_along_axis(values, np.maximum.accumulate(positions, axis=1), 1)
+
+
+class PlayerForm:
+    def __init__(
+        self,
+        weekly: pd.DataFrame,
+        teams: pd.Series = None,
+        window: int = FORM_WINDOW,
+        halflife: float = FORM_HALFLIFE,
+    ) -> None:
+        """Compute every player's weekly form features at once from a dense
+        player by week matrix, counting only the games each player played
+        Args:
+            weekly (pd.DataFrame): Player by week table of points scored,
+                with BYE and unplayed weeks as 0
+            teams (pd.Series): NFL team of each player, used to tell bye
+                weeks from missed games
+            window (int): Games the rolling mean and std are taken over
+            halflife (float): Halflife in games of the exponentially
+                weighted form
+        """
+        scores, self.weeks = played_weeks(weekly)
+        n_weeks = scores.shape[1]
+
+        self.index = weekly.index
+        self.scores = scores
+        self.bye = (
+            np.zeros(scores.shape, dtype=bool)
+            if teams is None
+            else bye_weeks(scores, teams.reindex(weekly.index).astype(str).to_numpy())
+        )
+        # A zero outside a bye week is a missed game rather than a game
+        self.played = scores != 0
+        self.games_available = (~self.bye).sum(axis=1)
+        self.games_played = self.played.sum(axis=1)
+
+        # Each player's games are moved to the front of their row in week
+        # order, so windows count games rather than weeks for every player
+        # at once
+        order = np.argsort(~self.played, axis=1, kind="stable")
+        games = np.take_along_axis(np.where(self.played, scores, 0), order, axis=1)
+        valid = np.arange(n_weeks) < self.games_played[:, None]
+
+        sums = np.pad(np.cumsum(games, axis=1), ((0, 0), (1, 0)))
+        squares = np.pad(np.cumsum(games**2, axis=1), ((0, 0), (1, 0)))
+        end = np.arange(1, n_weeks + 1)
+        start = np.maximum(end - window, 0)
+        counts = end - start
+        rolling_mean = (sums[:, end] - sums[:, start]) / counts
+        rolling_var = (squares[:, end] - squares[:, start]) / counts - rolling_mean**2
+
+        # Exponential weights of every earlier game at each game, normalised
+        # as pandas' ewm(adjust=True) does
+        decay = 0.5 ** (1 / halflife)
+        lags = np.arange(n_weeks)[None, :] - np.arange(n_weeks)[:, None]
+        weights = np.where(lags >= 0, decay ** np.maximum(lags, 0), 0)
+        ewma = (games @ weights) / weights.sum(axis=0)
+
+        changes = np.diff(games, axis=1, prepend=np.nan)
+
+        def to_weeks(values: np.ndarray) -> np.ndarray:
+            # Back to week order, with NaN in the weeks a player didn't play
+            weekly_values = np.full(scores.shape, np.nan)
+            np.put_along_axis(weekly_values, order, np.where(valid, values, np.nan), 1)
+            return weekly_values
+
+        # Form is carried through byes and missed games
+        self.rolling_mean = forward_fill(to_weeks(rolling_mean))
+        self.rolling_std = forward_fill(to_weeks(np.sqrt(np.maximum(rolling_var, 0))))
+        self.ewma = forward_fill(to_weeks(ewma))
+        self.change = to_weeks(changes)
+
+        self.mean = np.where(
+            self.games_played > 0, sums[:, -1] / np.maximum(self.games_played, 1), 0
+        )
+        self.std = np.sqrt(
+            np.maximum(
+                squares[:, -1] / np.maximum(self.games_played, 1) - self.mean**2, 0
+            )
+        )
+
+        # Quantiles interpolated between each player's sorted games
+        ranked = np.sort(np.where(valid, games, np.inf), axis=1)
+        self.floor, self.ceiling = (
+            self._quantile(ranked, self.games_played, q)
+            for q in (FLOOR_QUANTILE, CEILING_QUANTILE)
+        )
+
+        last_game = np.maximum(self.games_played - 1, 0)[:, None]
+        self.last_change = np.take_along_axis(
+            np.where(valid, changes, np.nan), last_game, axis=1
+        )[:, 0]
+
+    def to_arrays(self) -> dict:
+        """Feature arrays, with the player index and weeks, for a snapshot"""
+        arrays = {name: getattr(self, name) for name in FORM_ARRAYS}
+
+        return {
+            "index": self.index.to_numpy(),
+            "weeks": self.weeks.to_numpy(),
+            **arrays,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> "PlayerForm":
+        """Features backed by the arrays from to_arrays, without recomputing"""
+        form = cls.__new__(cls)
+        form.index = pd.Index(arrays["index"])
+        form.weeks = pd.Index(arrays["weeks"])
+        for name in FORM_ARRAYS:
+            setattr(form, name, arrays[name])
+
+        return form
+
+    @staticmethod
+    def _quantile(ranked: np.ndarray, n_games: np.ndarray, q: float) -> np.ndarray:
+        position = q * np.maximum(n_games - 1, 0)
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, np.maximum(n_games - 1, 0))
+        low = np.take_along_axis(ranked, lower[:, None], axis=1)[:, 0]
+        high = np.take_along_axis(ranked, upper[:, None], axis=1)[:, 0]
+
+        return np.where(n_games > 0, low + (high - low) * (position - lower), 0)
+
+    def latest(self, feature: str = "ewma") -> pd.Series:
+        """Each player's current value of a weekly feature, 0 before their
+        first game"""
+        values = getattr(self, feature)
+        latest = values[:, -1] if values.shape[1] else np.zeros(len(values))
+
+        return pd.Series(np.nan_to_num(latest), index=self.index)
+
+    def summary(self) -> pd.DataFrame:
+        """Current form and consistency of every player
+        Returns:
+            pd.DataFrame: Games played out of the games available, points
+                per game, rolling and exponentially weighted form, std,
+                floor, ceiling and change since the previous game
+        """
+        return pd.DataFrame(
+            {
+                "Games Played": self.games_played,
+                "Games Available": self.games_available,
+                "Points Per Game": self.mean,
+                "Form": self.latest("rolling_mean").to_numpy(),
+                "EWMA Form": self.latest("ewma").to_numpy(),
+                "Std": self.std,
+                "Floor": self.floor,
+                "Ceiling": self.ceiling,
+                "Last Change": self.last_change,
+            },
+            index=self.index,
+        )
@@ -0,0 +1,292 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Axes of each Free Agent Evaluator scatter plot
+SCATTER_FIGURES = {
+    "fig1": ("Price", "Avg"),
+    "fig2": ("Price", "Trade Value"),
+    "fig3": ("Avg", "Trade Value"),
+}
+
+# Columns every scatter plot uses besides its axes
+SCATTER_COLUMNS = ["Player", "Position", "Free Agent", "Years Remaining", "Squad"]
+
+# Number of bins simulated lineup totals are grouped into
+DISTRIBUTION_BINS = 60
+
+# Quantiles of the simulated totals shown on hover
+DISTRIBUTION_QUANTILES = [0.1, 0.5, 0.9]
+
+
+def dataset_version(data: pd.DataFrame) -> str:
+    """Hash identifying the contents of a dataset
+    Args:
+        data (pd.DataFrame): Data a figure is built from
+    Returns:
+        str: Hex digest that changes whenever any value changes
+    """
+    digest = hashlib.sha1(
+        pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes()
+    )
+    digest.update(",".join(data.columns).encode())
+
+    return digest.hexdigest()
+
+
+def fit_line(x: np.ndarray, y: np.ndarray) -> tuple:
+    """Ordinary least squares line through some points
+    Returns:
+        tuple: Slope and intercept, or None if there aren't two distinct x
+            values to fit
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+
+    dx = x - x.mean()
+    slope = (dx * (y - y.mean())).sum() / (dx * dx).sum()
+
+    return slope, y.mean() - slope * x.mean()
+
+
+def add_trendlines(fig: go.Figure) -> go.Figure:
+    """Add an OLS trendline for each group of markers, fitted with numpy
+    rather than statsmodels"""
+    for trace in list(fig.data):
+        fit = fit_line(trace.x, trace.y)
+        if fit is None:
+            continue
+
+        slope, intercept = fit
+        x = np.array([np.nanmin(trace.x), np.nanmax(trace.x)], dtype="float64")
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=intercept + slope * x,
+                mode="lines",
+                name=trace.name,
+                legendgroup=trace.legendgroup,
+                showlegend=False,
+                line=dict(color=trace.marker.color),
+                xaxis=trace.xaxis,
+                yaxis=trace.yaxis,
+                hovertemplate=(
+                    f"<b>OLS trendline</b><br>{trace.name}<br>"
+                    f"y = {slope:.4g} * x + {intercept:.4g}<extra></extra>"
+                ),
+            )
+        )
+
+    return fig
+
+
+def build_scatter(data: pd.DataFrame, x: str, y: str) -> go.Figure:
+    """Scatter plot of free agents against rostered players with trendlines"""
+    fig = px.scatter(
+        data,
+        x=x,
+        y=y,
+        color="Position",
+        facet_col="Free Agent",
+        size="Years Remaining",
+        hover_name="Player",
+        hover_data=["Squad", "Years Remaining"],
+        labels={"4": "Total Points Score", "Price": "Price"},
+    )
+    fig.add_hline(y=data[y].mean(), line_dash="dot")
+    fig.add_vline(x=data[x].mean(), line_dash="dot")
+    fig.update_traces(
+        marker=dict(line=dict(width=2, color="DarkSlateGrey")),
+        selector=dict(mode="markers"),
+    )
+    fig.update_xaxes(matches=None)
+
+    return add_trendlines(fig)
+
+
+class FigureCache:
+    def __init__(self) -> None:
+        self.figures = {}
+        self.versions = {}
+
+    def build(self, data: pd.DataFrame) -> dict:
+        """Build the scatter plots, reusing any whose inputs haven't changed
+        Args:
+            data (pd.DataFrame): Combined data for NFL players
+        Returns:
+            dict: Name to figure, as plain JSON ready to be served
+        """
+        for name, (x, y) in SCATTER_FIGURES.items():
+            inputs = data[[x, y, *SCATTER_COLUMNS]]
+            version = dataset_version(inputs)
+
+            if self.versions.get(name) != version:
+                fig = build_scatter(inputs, x, y)
+                self.figures[name] = json.loads(fig.to_json())
+                self.versions[name] = version
+
+        return dict(self.figures)
+
+
+def bin_distributions(totals: np.ndarray, bins: int = DISTRIBUTION_BINS) -> tuple:
+    """Bin simulated totals on edges shared by every distribution
+    Args:
+        totals (np.ndarray): Array of shape (n_distributions, n_sims)
+        bins (int): Number of bins
+    Returns:
+        tuple: Bin edges of length bins + 1 and counts of shape
+            (n_distributions, bins)
+    """
+    totals = np.atleast_2d(totals)
+    edges = np.histogram_bin_edges(totals, bins=bins)
+    counts = np.stack([np.histogram(row, bins=edges)[0] for row in totals])
+
+    return edges, counts
+
+
+def build_distribution_figure(
+    totals: np.ndarray, names: list, colors: list, bins: int = DISTRIBUTION_BINS
+) -> go.Figure:
+    """Overlaid histograms of simulated lineup totals, binned server side so
+    the figure's size doesn't grow with the number of samples
+    Args:
+        totals (np.ndarray): Array of shape (n_lineups, n_sims)
+        names (list): Legend name of each lineup
+        colors (list): Colour of each lineup
+        bins (int): Number of bins
+    """
+    edges, counts = bin_distributions(totals, bins)
+    quantiles = np.quantile(totals, DISTRIBUTION_QUANTILES, axis=1)
+
+    fig = go.Figure()
+    for i, (name, color) in enumerate(zip(names, colors)):
+        summary = ", ".join(
+            f"P{q * 100:.0f} {value:.1f}"
+            for q, value in zip(DISTRIBUTION_QUANTILES, quantiles[:, i])
+        )
+        fig.add_trace(
+            go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts[i],
+                opacity=0.5,
+                name=name,
+                marker_color=color,
+                hovertemplate=(
+                    f"<b>{name}</b><br>%{{x:.1f}} points: %{{y}}<br>"
+                    f"{summary}<extra></extra>"
+                ),
+            )
+        )
+        fig.add_vline(
+            x=quantiles[DISTRIBUTION_QUANTILES.index(0.5), i],
+            line_dash="dash",
+            line_color=color,
+        )
+
+    fig.update_layout(
+        title_text="Sampled Results",  # title of plot
+        xaxis_title_text="Team Points",  # xaxis label
+        yaxis_title_text="Count",  # yaxis label
+        barmode="overlay",
+        bargap=0.2,  # gap between bars of adjacent location coordinates
+        template="plotly_white",
+    )
+
+    return fig
+
+
+def build_win_probability_figure(win_probability: pd.DataFrame) -> go.Figure:
+    """Heatmap of the chance each squad beats each other squad in a week"""
+    fig = go.Figure(
+        go.Heatmap(
+            z=win_probability.to_numpy(),
+            x=win_probability.columns,
+            y=win_probability.index,
+            zmin=0,
+            zmax=1,
+            colorscale="RdBu",
+            hovertemplate="%{y} beat %{x}: %{z:.0%}<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        title_text="Head to Head Win Probability", template="plotly_white"
+    )
+
+    return fig
+
+
+def build_playoff_odds_figure(standings: pd.DataFrame) -> go.Figure:
+    """Bar chart of each squad's chance of making the playoffs"""
+    fig = go.Figure(
+        go.Bar(
+            x=standings["Squad"],
+            y=standings["Playoff Odds"],
+            customdata=standings[["Expected Wins", "Expected Points"]],
+            hovertemplate=(
+                "<b>%{x}</b><br>Playoff odds: %{y:.0%}<br>"
+                "Expected wins: %{customdata[0]:.1f}<br>"
+                "Expected points: %{customdata[1]:.0f}<extra></extra>"
+            ),
+        )
+    )
+    fig.update_layout(
+        title_text="Playoff Odds",
+        yaxis_tickformat=".0%",
+        template="plotly_white",
+    )
+
+    return fig
+
+
+def build_form_figure(form, players: list, names: list) -> go.Figure:
+    """Weekly points of a few players, with their exponentially weighted form
+    Args:
+        form (PlayerForm): Weekly form features of every player
+        players (list): PlayerIDs to plot
+        names (list): Name of each player
+    Returns:
+        go.Figure: A figure with points as markers and form as lines
+    """
+    rows = form.index.get_indexer(players)
+    weeks = [str(week) for week in form.weeks]
+    colors = px.colors.qualitative.Plotly
+
+    fig = go.Figure()
+    for i, (row, name) in enumerate(zip(rows, names)):
+        color = colors[i % len(colors)]
+        fig.add_trace(
+            go.Scatter(
+                x=weeks,
+                # Byes and missed games are left as gaps
+                y=np.where(form.played[row], form.scores[row], np.nan),
+                mode="markers",
+                marker_color=color,
+                name=f"{name} points",
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=weeks,
+                y=form.ewma[row],
+                mode="lines",
+                line_color=color,
+                name=f"{name} form",
+            )
+        )
+    fig.update_layout(
+        title_text="Weekly Form",
+        xaxis_title="Week",
+        yaxis_title="Points",
+        template="plotly_white",
+    )
+
+    return fig
@@ -0,0 +1,101 @@
+import functools
+
+import diskcache
+from dash import DiskcacheManager
+
+from src.metrics import MetricsRegistry
+
+# Queue in the job cache that finished jobs leave their metrics on
+JOB_METRICS = "job-metrics"
+
+
+def _run_job(handle, metrics: MetricsRegistry, expire: int, job_fn, *args) -> None:
+    # The forked job starts with a copy of the parent's metrics, so only
+    # what the job itself records is reported back
+    metrics.reset()
+    try:
+        job_fn(*args)
+    finally:
+        if metrics.enabled:
+            handle.push(metrics.state(), prefix=JOB_METRICS, expire=expire)
+
+
+class SharedJobManager(DiskcacheManager):
+    def __init__(
+        self,
+        cache_dir: str = "./data/jobs",
+        cache_by: list = None,
+        expire: int = 3600,
+        metrics: MetricsRegistry = None,
+    ) -> None:
+        """Run background callbacks in subprocesses with their results on
+        disk, so no broker is needed, starting each distinct job only once
+        Args:
+            cache_dir (str): Directory of the job queue and results
+            cache_by (list): Functions whose return values are added to the
+                inputs a job is identified by, such as the data's version
+            expire (int): Seconds an unused result is kept for
+            metrics (MetricsRegistry): Registry jobs record to, which their
+                metrics are returned to by collect_metrics
+        """
+        super().__init__(diskcache.Cache(cache_dir), cache_by or [], expire)
+        self.metrics = metrics
+
+    @staticmethod
+    def _job_key(key: str) -> str:
+        return f"{key}-job"
+
+    @staticmethod
+    def _subscribers_key(job) -> str:
+        return f"job-{job}-subscribers"
+
+    def call_job_fn(self, key, job_fn, args, context):
+        """Start a job, or join the running one with the same inputs"""
+        if self.metrics is not None:
+            job_fn = functools.partial(
+                _run_job, self.handle, self.metrics, self.expire, job_fn
+            )
+
+        # Locked so two requests can't both see no job and start one each
+        with self.handle.transact():
+            job = self.handle.get(self._job_key(key))
+            if job is not None and self.job_running(job):
+                self.handle.incr(self._subscribers_key(job))
+                return job
+
+            job = super().call_job_fn(key, job_fn, args, context)
+            self.handle.set(self._job_key(key), job, expire=self.expire)
+            self.handle.set(self._subscribers_key(job), 1, expire=self.expire)
+
+        return job
+
+    def collect_metrics(self) -> int:
+        """Merge the metrics of finished jobs into this process's registry,
+        each job's into whichever process collects them first
+        Returns:
+            int: Number of jobs collected
+        """
+        collected = 0
+        while self.metrics is not None:
+            _, state = self.handle.pull(prefix=JOB_METRICS)
+            if state is None:
+                break
+            self.metrics.merge(state)
+            collected += 1
+
+        return collected
+
+    def terminate_job(self, job):
+        """Stop following a job, which is only killed once nobody else is
+        waiting on it, so a client changing its inputs doesn't cancel
+        another's identical job"""
+        if job is None:
+            return
+
+        with self.handle.transact():
+            remaining = self.handle.decr(self._subscribers_key(job), default=1)
+            if remaining > 0:
+                return
+            self.handle.delete(self._subscribers_key(job))
+
+        super().terminate_job(job)
@@ -0,0 +1,207 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.distributions import PlayerDistributions
+
+
+def round_robin_schedule(n_squads: int, n_weeks: int) -> np.ndarray:
+    """Schedule where every squad plays every other in turn
+    Args:
+        n_squads (int): Number of squads
+        n_weeks (int): Number of weeks to schedule
+    Returns:
+        np.ndarray: Array of shape (n_weeks, n_squads) giving the opponent
+            of each squad each week, -1 for a bye
+    """
+    # Circle method, with a dummy squad standing in for the bye
+    teams = list(range(n_squads)) + ([-1] if n_squads % 2 else [])
+    schedule = np.full((n_weeks, n_squads), -1)
+
+    for week in range(n_weeks):
+        half = len(teams) // 2
+        for home, away in zip(teams[:half], teams[::-1][:half]):
+            if home != -1 and away != -1:
+                schedule[week, home] = away
+                schedule[week, away] = home
+        teams = [teams[0], teams[-1], *teams[1:-1]]
+
+    return schedule
+
+
+def _simulate_chunk(
+    distributions: PlayerDistributions,
+    rows: list,
+    schedule: np.ndarray,
+    model: str,
+    correlated: bool,
+    n_sims: int,
+    seed: np.random.SeedSequence,
+    playoff_teams: int,
+) -> dict:
+    """Simulate a block of seasons and return the counts needed to combine
+    it with the other blocks"""
+    rng = np.random.default_rng(seed)
+    sample = distributions.sample_correlated if correlated else distributions.sample
+    n_weeks = len(schedule)
+
+    # Squad by simulation by week scores
+    scores = np.stack(
+        [
+            (
+                sample(model, squad_rows, n_sims * n_weeks, rng).sum(axis=1)
+                if len(squad_rows)
+                else np.zeros(n_sims * n_weeks)
+            )
+            for squad_rows in rows
+        ]
+    ).reshape(len(rows), n_sims, n_weeks)
+
+    # Every week's scores are a sample of every possible matchup
+    beats = np.stack([(squad > scores).sum(axis=(1, 2)) for squad in scores])
+
+    opponents = scores[schedule.T, :, np.arange(n_weeks)[None, :]]
+    won = (scores.transpose(0, 2, 1) > opponents) & (schedule.T != -1)[..., None]
+    wins = won.sum(axis=1)
+    points = scores.sum(axis=2)
+
+    # Squads are ranked on wins, with points scored as the tie break
+    ranking = np.argsort(-(wins * (points.max() + 1) + points), axis=0)
+    ranks = np.argsort(ranking, axis=0)
+
+    return {
+        "beats": beats,
+        "wins": wins.sum(axis=1),
+        "points": points.sum(axis=1),
+        "playoffs": (ranks < playoff_teams).sum(axis=1),
+    }
+
+
+class LeagueSimulator:
+    def __init__(
+        self,
+        n_sims: int = 10000,
+        seed: int = None,
+        chunk_size: int = 5000,
+        max_workers: int = None,
+        parallel_threshold: int = 50000,
+    ) -> None:
+        self.n_sims = n_sims
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        # Below this many simulations a process pool costs more than it saves
+        self.parallel_threshold = parallel_threshold
+        self._results = {}
+
+    def simulate(
+        self,
+        distributions: PlayerDistributions,
+        lineups: dict,
+        n_weeks: int = 1,
+        playoff_teams: int = 4,
+        model: str = "exponential",
+        correlated: bool = False,
+    ) -> dict:
+        """Simulate every squad's lineup against each other and through a
+        round robin season
+        Args:
+            distributions (PlayerDistributions): Fitted score distributions
+            lineups (dict): Squad to list of PlayerIDs, with None for
+                empty slots
+            n_weeks (int): Number of weeks left in the season
+            playoff_teams (int): Number of squads that make the playoffs,
+                capped so at least one squad misses out
+            model (str): Distribution model to sample from
+            correlated (bool): Whether teammates' scores are sampled jointly
+        Returns:
+            dict: "win_probability", a squad by squad DataFrame of the
+                chance the row squad beats the column squad in a week, and
+                "standings", a DataFrame of expected wins, points and
+                playoff odds
+        """
+        squads = list(lineups)
+        # With every squad in the playoffs the odds would all be 1
+        playoff_teams = max(min(playoff_teams, len(squads) - 1), 1)
+        key = (
+            distributions.version,
+            tuple((squad, tuple(lineups[squad])) for squad in squads),
+            n_weeks,
+            playoff_teams,
+            model,
+            correlated,
+            self.n_sims,
+            self.seed,
+        )
+        if key not in self._results:
+            # Results from earlier data builds won't be asked for again
+            self._results = {
+                cached: results
+                for cached, results in self._results.items()
+                if cached[0] == distributions.version
+            }
+            self._results[key] = self._simulate(
+                distributions, lineups, n_weeks, playoff_teams, model, correlated
+            )
+
+        return self._results[key]
+
+    def _simulate(
+        self,
+        distributions: PlayerDistributions,
+        lineups: dict,
+        n_weeks: int,
+        playoff_teams: int,
+        model: str,
+        correlated: bool,
+    ) -> dict:
+        squads = list(lineups)
+        rows = [
+            distributions.rows(sorted(p for p in lineups[squad] if p is not None))
+            for squad in squads
+        ]
+        schedule = round_robin_schedule(len(squads), n_weeks)
+
+        # Blocks of simulations get their own seeds, so results are the same
+        # whether or not they are run in parallel
+        sizes = [
+            min(self.chunk_size, self.n_sims - start)
+            for start in range(0, self.n_sims, self.chunk_size)
+        ]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        args = [
+            (
+                distributions,
+                rows,
+                schedule,
+                model,
+                correlated,
+                size,
+                seed,
+                playoff_teams,
+            )
+            for size, seed in zip(sizes, seeds)
+        ]
+
+        if self.n_sims >= self.parallel_threshold and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                chunks = list(executor.map(_simulate_chunk, *zip(*args)))
+        else:
+            chunks = [_simulate_chunk(*chunk_args) for chunk_args in args]
+
+        totals = {name: sum(chunk[name] for chunk in chunks) for name in chunks[0]}
+
+        return {
+            "win_probability": pd.DataFrame(
+                totals["beats"] / (self.n_sims * n_weeks), index=squads, columns=squads
+            ),
+            "standings": pd.DataFrame(
+                {
+                    "Squad": squads,
+                    "Expected Wins": totals["wins"] / self.n_sims,
+                    "Expected Points": totals["points"] / self.n_sims,
+                    "Playoff Odds": totals["playoffs"] / self.n_sims,
+                }
+            ).sort_values("Playoff Odds", ascending=False, ignore_index=True),
+        }
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+from src.distributions import PlayerDistributions
+from src.rosters import FLEX_POSITIONS, LINEUP_SLOTS
+
+# Statistic of each player's score a lineup is chosen to maximise, with the
+# quantile it is taken at
+LINEUP_OBJECTIVES = {
+    "mean": ("Expected points", None),
+    "median": ("Median points", 0.5),
+    "floor": ("Safe floor (10th percentile)", 0.1),
+}
+
+# Cost of leaving a slot empty, worse than any player who can fill it
+EMPTY_SLOT_COST = 1e6
+
+
+def slot_eligibility(positions: np.ndarray) -> np.ndarray:
+    """Which slots in LINEUP_SLOTS each player can fill
+    Args:
+        positions (np.ndarray): Position of each player
+    Returns:
+        np.ndarray: Boolean array of shape (n_players, n_slots)
+    """
+    positions = np.asarray(positions, dtype=str)
+
+    return np.stack(
+        [
+            (
+                np.isin(positions, FLEX_POSITIONS)
+                if position == "FLEX"
+                else positions == position
+            )
+            for _, _, position in LINEUP_SLOTS
+        ],
+        axis=1,
+    )
+
+
+def player_scores(
+    distributions: PlayerDistributions,
+    player_ids,
+    objective: str = "mean",
+    model: str = "exponential",
+) -> np.ndarray:
+    """Score each player contributes to a lineup's objective
+    Args:
+        distributions (PlayerDistributions): Fitted score distributions
+        player_ids (Iterable): Players to score
+        objective (str): One of LINEUP_OBJECTIVES
+        model (str): Distribution model the quantiles are taken from
+    Returns:
+        np.ndarray: Score of each player
+    """
+    rows = distributions.rows(player_ids)
+    _, q = LINEUP_OBJECTIVES[objective]
+
+    if q is None:
+        return distributions.mean[rows]
+
+    return distributions.quantile(model, rows, np.full((1, len(rows)), q))[0]
+
+
+def optimal_lineup(players: pd.DataFrame, scores: np.ndarray) -> list:
+    """Best legal lineup, found exactly as an assignment of players to slots
+    Args:
+        players (pd.DataFrame): PlayerID and Position of each player on the
+            squad
+        scores (np.ndarray): Score of each player to maximise the sum of
+    Returns:
+        list: PlayerID for each slot in LINEUP_SLOTS, None where the squad
+            has nobody who can fill it
+    """
+    eligible = slot_eligibility(players["Position"].astype(str).to_numpy())
+    costs = np.where(
+        eligible, -np.asarray(scores, dtype="float64")[:, None], 2 * EMPTY_SLOT_COST
+    )
+
+    # A placeholder for every slot lets a slot stay empty rather than make
+    # the assignment infeasible
+    costs = np.vstack([costs, np.full((len(LINEUP_SLOTS),) * 2, EMPTY_SLOT_COST)])
+
+    assigned, slots = linear_sum_assignment(costs)
+    lineup = [None] * len(LINEUP_SLOTS)
+    ids = players["PlayerID"].tolist()
+
+    for player, slot in zip(assigned, slots):
+        if player < len(ids) and eligible[player, slot]:
+            lineup[slot] = ids[player]
+
+    return lineup
+
+
+def optimal_lineups(
+    data: pd.DataFrame,
+    distributions: PlayerDistributions,
+    objective: str = "mean",
+    model: str = "exponential",
+) -> dict:
+    """Best lineup of every squad
+    Args:
+        data (pd.DataFrame): Combined data for NFL players
+        distributions (PlayerDistributions): Fitted score distributions
+        objective (str): One of LINEUP_OBJECTIVES
+        model (str): Distribution model the quantiles are taken from
+    Returns:
+        dict: Squad to list of PlayerIDs in LINEUP_SLOTS order
+    """
+    rostered = (
+        data.loc[data["Squad"] != "Free Agent"]
+        .drop_duplicates("PlayerID")
+        .reset_index(drop=True)
+    )
+    scores = player_scores(distributions, rostered["PlayerID"], objective, model)
+
+    return {
+        squad: optimal_lineup(players, scores[players.index])
+        for squad, players in rostered.groupby("Squad", observed=True)
+    }
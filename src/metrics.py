@@ -0,0 +1,260 @@
+import cProfile
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "nfl"
+
+
+def count_rows(result) -> int:
+    """Rows in a stage's result, or None if it isn't tabular"""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if isinstance(result, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(result)
+
+    return None
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False, trace_memory: bool = False) -> None:
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.stages = defaultdict(
+            lambda: {"calls": 0, "errors": 0, "seconds": 0.0, "rows": 0, "peak": 0}
+        )
+        self.events = defaultdict(int)
+        self.collectors = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def reset(self) -> None:
+        """Forget everything recorded, e.g. in a forked process that should
+        only report its own work"""
+        self.stages.clear()
+        self.events.clear()
+        # A lock held by another thread when the process forked would never
+        # be released
+        self._lock = threading.Lock()
+
+    def state(self) -> dict:
+        """Everything recorded, to be merged into another process's
+        registry"""
+        with self._lock:
+            return {
+                "stages": {name: dict(stats) for name, stats in self.stages.items()},
+                "events": dict(self.events),
+            }
+
+    def merge(self, state: dict) -> None:
+        """Add the stages and events recorded by another registry"""
+        with self._lock:
+            for name, other in state["stages"].items():
+                stats = self.stages[name]
+                for field in ["calls", "errors", "seconds", "rows"]:
+                    stats[field] += other[field]
+                stats["peak"] = max(stats["peak"], other["peak"])
+            for key, amount in state["events"].items():
+                self.events[key] += amount
+
+    def configure(self, enabled: bool, trace_memory: bool = False) -> None:
+        """Turn recording on or off, memory tracing slows every allocation so
+        is switched on separately"""
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def instrument(self, stage: str = None):
+        """Decorator recording the wall time, peak memory and result rows of
+        every call to a function
+        Args:
+            stage (str): Name to report the function under, defaults to its
+                qualified name
+        """
+
+        def decorator(func):
+            name = stage or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                # A single attribute check is all disabled metrics cost
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                return self._record(name, func, args, kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _record(self, name: str, func, args: tuple, kwargs: dict):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        # Stages nest, so each keeps its starting memory and the highest
+        # peak seen while it ran, as measuring a peak resets the tracker
+        stack = self._local.__dict__.setdefault("stack", [])
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            stack.append([current, 0])
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+        finally:
+            seconds = time.perf_counter() - start
+            growth = 0
+            if tracing:
+                baseline, inner_peak = stack.pop()
+                peak = max(inner_peak, tracemalloc.get_traced_memory()[1])
+                growth = max(peak - baseline, 0)
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], peak)
+
+            with self._lock:
+                stats = self.stages[name]
+                stats["calls"] += 1
+                stats["errors"] += failed
+                stats["seconds"] += seconds
+                stats["peak"] = max(stats["peak"], growth)
+
+        rows = count_rows(result)
+        if rows is not None:
+            with self._lock:
+                self.stages[name]["rows"] += rows
+
+        return result
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a call timed outside of a decorated function, such as a
+        whole HTTP request"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            stats = self.stages[name]
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+
+    def increment(self, event: str, amount: int = 1, **labels) -> None:
+        """Count an event such as a cache hit"""
+        if not self.enabled:
+            return
+
+        key = (event, tuple(sorted(labels.items())))
+        with self._lock:
+            self.events[key] += amount
+
+    def register_collector(self, name: str, collect) -> None:
+        """Export the numbers returned by a callable, e.g. a cache's stats,
+        every time the metrics are read"""
+        self.collectors[name] = collect
+
+    def export(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self.stages.items()}
+            events = dict(self.events)
+
+        lines = []
+        for metric, kind, field, description in [
+            ("stage_calls_total", "counter", "calls", "Calls to each stage"),
+            ("stage_errors_total", "counter", "errors", "Calls that raised"),
+            ("stage_seconds_total", "counter", "seconds", "Wall time"),
+            ("stage_rows_total", "counter", "rows", "Rows returned"),
+            (
+                "stage_peak_memory_bytes",
+                "gauge",
+                "peak",
+                "Largest memory growth during a call, when traced",
+            ),
+        ]:
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+            lines += [
+                f'{name}{{stage="{_label(stage)}"}} {stats[field]}'
+                for stage, stats in sorted(stages.items())
+            ]
+
+        for event in sorted({event for event, _ in events}):
+            name = f"{METRIC_PREFIX}_{event}_total"
+            lines.append(f"# TYPE {name} counter")
+            for (_, labels), value in sorted(
+                (key, value) for key, value in events.items() if key[0] == event
+            ):
+                label_text = ",".join(f'{k}="{_label(v)}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        for collector, collect in sorted(self.collectors.items()):
+            for field, value in collect().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    name = f"{METRIC_PREFIX}_{collector}_{field}"
+                    lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+
+        return "\n".join(lines) + "\n"
+
+
+# Registry the scrapper and the app record to
+METRICS = MetricsRegistry()
+
+instrument = METRICS.instrument
+
+
+class RequestProfiler:
+    def __init__(self, profile_dir: str = "./data/profiles") -> None:
+        self.profile_dir = profile_dir
+        self._local = threading.local()
+        # Only one profiler can run at a time, so concurrent requests asking
+        # to be profiled are served without one
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Start profiling the current request
+        Returns:
+            bool: Whether profiling started
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+
+        self._local.profile = cProfile.Profile()
+        self._local.profile.enable()
+
+        return True
+
+    def stop(self, name: str) -> str:
+        """Stop profiling and write the stats for snakeviz or pstats
+        Returns:
+            str: Path of the stats file, or None if nothing was profiled
+        """
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            return None
+
+        profile.disable()
+        self._local.profile = None
+        self._lock.release()
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = name.strip("/").replace("/", "_") or "index"
+        path = os.path.join(
+            self.profile_dir,
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{threading.get_ident()}.prof",
+        )
+        profile.dump_stats(path)
+
+        return path
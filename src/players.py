@@ -0,0 +1,157 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Generational suffixes that sources include inconsistently
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv"}
+
+# Ids returned for names that match no player, or more than one
+UNKNOWN_PLAYER = -1
+AMBIGUOUS_PLAYER = -2
+
+
+@lru_cache(maxsize=None)
+def normalise_name(name: str) -> str:
+    """Canonical form of a player name used to match it across sources
+    Args:
+        name (str): Player name as written by a source
+    Returns:
+        str: Lowercase ascii name without punctuation or suffixes, so
+            "D.J. Chark Jr." and "DJ Chark" give the same key
+    """
+    name = unicodedata.normalize("NFKD", str(name))
+    name = name.encode("ascii", "ignore").decode().lower()
+    name = re.sub(r"['.’]", "", name)
+    tokens = [token for token in re.split(r"[^a-z0-9]+", name) if token]
+
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+
+    return " ".join(tokens)
+
+
+def load_aliases(path: str = "./data/player-aliases.csv") -> dict:
+    """Read the table mapping alternative player names to the name used on
+    FantasyPros"""
+    aliases = pd.read_csv(path)
+
+    return dict(zip(aliases["Alias"], aliases["Player"]))
+
+
+class PlayerIndex:
+    def __init__(self, aliases: dict = None) -> None:
+        self.aliases = {
+            normalise_name(alias): normalise_name(player)
+            for alias, player in (aliases or {}).items()
+        }
+        self.names = []
+        self.teams = []
+        # Ids registered under each name, and each name and position, so
+        # sources without a position or team can still be matched
+        self.candidates = {}
+
+    def key(self, name: str, position: str = None) -> tuple:
+        """Canonical key for a player, after resolving name aliases"""
+        key = normalise_name(name)
+
+        return self.aliases.get(key, key), position
+
+    def add(self, names, positions, teams=None) -> np.ndarray:
+        """Register players, giving new players the next free id
+        Args:
+            names (Iterable): Player names
+            positions (Iterable): Position of each player
+            teams (Iterable): NFL team of each player, used to tell apart
+                players that share a name and position
+        Returns:
+            np.ndarray: Integer id of each player
+        """
+        ids = np.empty(len(names), dtype="int32")
+        teams = [None] * len(names) if teams is None else list(teams)
+        rows = {}
+        for i, (name, position) in enumerate(zip(names, positions)):
+            rows.setdefault(self.key(name, position), []).append(i)
+
+        for key, key_rows in rows.items():
+            existing = list(self.candidates.get(key, []))
+
+            # Players sharing a name and position keep their ids by team,
+            # rather than by the ranked order they were scraped in, then
+            # the rest are paired up in team order
+            unmatched = []
+            for i in sorted(key_rows, key=lambda i: str(teams[i])):
+                same_team = [
+                    player_id
+                    for player_id in existing
+                    if teams[i] is not None and self.teams[player_id] == teams[i]
+                ]
+                if same_team:
+                    ids[i] = same_team[0]
+                    existing.remove(same_team[0])
+                else:
+                    unmatched.append(i)
+
+            for i in unmatched:
+                ids[i] = existing.pop(0) if existing else self._register(key, names[i])
+
+            for i in key_rows:
+                # Players change teams, the latest one is used to break ties
+                self.teams[ids[i]] = teams[i]
+
+        return ids
+
+    def _register(self, key: tuple, name: str) -> int:
+        player_id = len(self.names)
+        self.names.append(name)
+        self.teams.append(None)
+        self.candidates.setdefault(key, []).append(player_id)
+        self.candidates.setdefault(key[0], []).append(player_id)
+
+        return player_id
+
+    def _match(self, name: str, position: str = None, team: str = None) -> int:
+        key = self.key(name, position)
+        candidates = self.candidates.get(key if position is not None else key[0])
+
+        if candidates and len(candidates) > 1 and team is not None:
+            # The team only breaks ties, a team matching none of them
+            # leaves the name ambiguous
+            candidates = [
+                player_id for player_id in candidates if self.teams[player_id] == team
+            ] or candidates
+
+        if not candidates:
+            return UNKNOWN_PLAYER
+
+        return candidates[0] if len(candidates) == 1 else AMBIGUOUS_PLAYER
+
+    def lookup(self, names, positions=None, teams=None) -> np.ndarray:
+        """Find the ids of players without registering new ones
+        Args:
+            names (Iterable): Player names
+            positions (Iterable): Position of each player, if the source
+                has them
+            teams (Iterable): NFL team of each player, only used to choose
+                between players sharing a name and position
+        Returns:
+            np.ndarray: Integer id of each player, UNKNOWN_PLAYER where it
+                is unknown and AMBIGUOUS_PLAYER where several players match
+        """
+        positions = [None] * len(names) if positions is None else positions
+        teams = [None] * len(names) if teams is None else teams
+
+        return np.fromiter(
+            (
+                self._match(name, position, team)
+                for name, position, team in zip(names, positions, teams)
+            ),
+            dtype="int32",
+            count=len(names),
+        )
+
+    def name(self, player_id: int) -> str:
+        """Name of a player as first registered"""
+        return self.names[player_id]
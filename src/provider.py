@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class DataProvider:
+    def __init__(self, build: Callable[[], dict]) -> None:
+        self.build = build
+        self.version = 0
+        self.error = None
+        self._data = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._worker = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether a dataset has been built and can be served"""
+        return self._ready.is_set()
+
+    def get(self) -> dict:
+        """Current snapshot of the data
+        Returns:
+            dict: Dataset and derived artifacts, or None while the first
+                build is still running. Callers should hold on to the
+                returned snapshot for the duration of a request so that a
+                concurrent refresh can't mix data from two builds.
+        """
+        return self._data
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the first build has finished"""
+        return self._ready.wait(timeout)
+
+    def refresh(self) -> None:
+        """Build a new snapshot and swap it in once it is complete, a build
+        returning None has nothing new and keeps the current snapshot"""
+        # Only one build at a time, the data being served is untouched until
+        # the new snapshot is fully built
+        with self._lock:
+            try:
+                data = self.build()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception("Failed to build data")
+                self.error = e
+                return
+
+            if data is None:
+                return
+
+            self._data = data
+            self.version += 1
+            self.error = None
+            self._ready.set()
+
+    def start(
+        self, refresh_interval: float = None, retry_interval: float = 60
+    ) -> threading.Thread:
+        """Build the data in a background thread
+        Args:
+            refresh_interval (float): Seconds between rebuilds once the data
+                has loaded, or None to build only once
+            retry_interval (float): Seconds to wait before retrying if the
+                first build fails
+        Returns:
+            threading.Thread: The background worker
+        """
+        if self._worker is not None and self._worker.is_alive():
+            return self._worker
+
+        def run():
+            while True:
+                self.refresh()
+                if self.ready and refresh_interval is None:
+                    return
+                time.sleep(refresh_interval if self.ready else retry_interval)
+
+        self._worker = threading.Thread(target=run, name="data-provider", daemon=True)
+        self._worker.start()
+
+        return self._worker
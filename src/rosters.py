@@ -0,0 +1,67 @@
+import pandas as pd
+
+# Dropdown id prefix, label and roster position of each slot in a line up
+LINEUP_SLOTS = [
+    ("qb", "QB", "QB"),
+    ("rb1", "RB", "RB"),
+    ("rb2", "RB", "RB"),
+    ("wr1", "WR", "WR"),
+    ("wr2", "WR", "WR"),
+    ("wr3", "WR", "WR"),
+    ("te", "TE", "TE"),
+    ("flex", "Flex", "FLEX"),
+    ("k", "K", "K"),
+    ("dst", "DST", "DST"),
+]
+
+# Positions that can fill the flex slot
+FLEX_POSITIONS = ["RB", "WR", "TE"]
+
+
+def build_roster_index(data: pd.DataFrame) -> dict:
+    """Group the dropdown options for every squad and position in one pass
+    Args:
+        data (pd.DataFrame): Combined data for NFL players
+    Returns:
+        dict: Squad to position to list of dropdown options, including a
+            FLEX entry made up of the flex eligible positions
+    """
+    index = {}
+
+    for (squad, position), players in data.groupby(
+        ["Squad", "Position"], observed=True, sort=False
+    ):
+        index.setdefault(squad, {})[position] = [
+            {"label": player, "value": player_id}
+            for player, player_id in zip(
+                players["Player"], players["PlayerID"].tolist()
+            )
+        ]
+
+    for positions in index.values():
+        positions["FLEX"] = [
+            option
+            for position in FLEX_POSITIONS
+            for option in positions.get(position, [])
+        ]
+
+    return index
+
+
+def squad_options(index: dict) -> list:
+    """Dropdown options for the squads that own players"""
+    return [
+        {"label": squad, "value": squad}
+        for squad in sorted(index)
+        if squad != "Free Agent"
+    ]
+
+
+def squad_player_options(index: dict, squad: str) -> list:
+    """Dropdown options for every player on a squad"""
+    return [
+        option
+        for position, options in index.get(squad, {}).items()
+        if position != "FLEX"
+        for option in options
+    ]
@@ -1,77 +1,278 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 import requests
 from bs4 import BeautifulSoup
-from sklearn.linear_model import LinearRegression
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.cache import ScrapeCache
+from src.metrics import METRICS, instrument
+from src.players import PlayerIndex, load_aliases
+from src.trade_values import TradeValueHistory
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover
+    lxml_html = None
+
+LEADERS_URL = "https://www.fantasypros.com/nfl/reports/leaders/"
+
+# Columns stored as categoricals in the dataset, all other numeric columns
+# apart from the integer player ids are stored as float32
+CATEGORICAL_COLUMNS = ["Position", "Team", "Squad"]
+
+# Path of the leaders page for each scoring format
+SCORING_FORMATS = {"standard": "", "half-ppr": "half-ppr/", "ppr": "ppr/"}
+
+# Names used in the dataset for headers on the leaders page
+HEADER_NAMES = {"Pos": "Position", "AVG": "Avg"}
+
+
+def split_leaders_url(url: str) -> tuple:
+    """Split a leaders page url into the base url of every leaders page and
+    its scoring format
+    Args:
+        url (str): Url of a leaders page, e.g. LEADERS_URL followed by "ppr"
+    Returns:
+        tuple: Base url and one of SCORING_FORMATS
+    """
+    url = url.rstrip("/") + "/"
+    for scoring, path in SCORING_FORMATS.items():
+        if path and url.endswith(f"/{path}"):
+            return url[: -len(path)], scoring
+
+    return url, "standard"
+
+
+def _collect_columns(rows, n_columns: int = 0) -> list:
+    """Stream the cell text of each row into one list per column, skipping
+    rows that don't span the whole table"""
+    columns = None
+
+    for cells in rows:
+        if columns is None:
+            columns = [[] for _ in range(n_columns or len(cells))]
+        if len(cells) != len(columns):
+            continue
+        for column, cell in zip(columns, cells):
+            column.append(cell)
+
+    return columns or []
+
+
+@instrument()
+def parse_table_lxml(content: bytes) -> tuple:
+    """Read the first table on the page with lxml
+    Args:
+        content (bytes): Raw html of the page
+    Returns:
+        tuple: Header names and the cell text of each column
+    """
+    # FantasyPros serves utf-8, without this lxml falls back to latin-1 when
+    # the page doesn't declare a charset
+    tree = lxml_html.fromstring(content, parser=lxml_html.HTMLParser(encoding="utf-8"))
+    tbody = tree.find(".//tbody")
+    thead = tbody.getparent().find("thead")
+    headers = (
+        [th.text_content().strip() for th in thead.iter("th")]
+        if thead is not None
+        else []
+    )
+    rows = (
+        [td.text_content() for td in tr.iterfind("td")] for tr in tbody.iterfind("tr")
+    )
+
+    return headers, _collect_columns(rows, len(headers))
+
+
+@instrument()
+def parse_table_html_parser(content: bytes) -> tuple:
+    """Read the first table on the page with BeautifulSoup's pure Python
+    parser
+    Args:
+        content (bytes): Raw html of the page
+    Returns:
+        tuple: Header names and the cell text of each column
+    """
+    tbody = BeautifulSoup(content, "html.parser").find("tbody")
+    thead = tbody.find_previous_sibling("thead")
+    headers = (
+        [th.text.strip() for th in thead.find_all("th")] if thead is not None else []
+    )
+    rows = ([td.text for td in tr.find_all("td")] for tr in tbody.find_all("tr"))
+
+    return headers, _collect_columns(rows, len(headers))
+
+
+@instrument()
+def apply_schema(data: pd.DataFrame) -> pd.DataFrame:
+    """Convert the dataset to its compact dtypes in a single pass
+    Args:
+        data (pd.DataFrame): Player data
+    Returns:
+        pd.DataFrame: Same data with categorical labels and float32 numbers
+    """
+    dtypes = {col: "category" for col in CATEGORICAL_COLUMNS if col in data}
+    dtypes.update(
+        {col: "float32" for col in data.select_dtypes("number") if col != "PlayerID"}
+    )
+
+    return data.astype(dtypes)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Compare the memory used by each column of two versions of a dataset
+    Args:
+        before (pd.DataFrame): Original data
+        after (pd.DataFrame): Same data with a different schema
+    Returns:
+        pd.DataFrame: Bytes used by each column before and after, with the
+            totals in the last row
+    """
+    report = pd.DataFrame(
+        {
+            "Before": before.memory_usage(index=False, deep=True),
+            "After": after.memory_usage(index=False, deep=True),
+        }
+    )
+    report.loc["Total"] = report.sum()
+    report["Saving"] = 1 - report["After"] / report["Before"]
+
+    return report
+
+
+class RateLimiter:
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval = 1.0 / requests_per_second
+        self._next_request = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the next request is allowed to be made"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._next_request - now, 0.0)
+            self._next_request = max(self._next_request, now) + self.interval
+
+        time.sleep(wait)
+
+
+PARSERS = {"lxml": parse_table_lxml, "html.parser": parse_table_html_parser}
+
+DEFAULT_PARSER = "lxml" if lxml_html is not None else "html.parser"
 
 
 class NFLDataScrapper:
     def __init__(
-        self, url: str = "https://www.fantasypros.com/nfl/reports/leaders/ppr"
+        self,
+        url: str = f"{LEADERS_URL}ppr",
+        cache: ScrapeCache = None,
+        parser: str = DEFAULT_PARSER,
+        max_workers: int = 4,
+        requests_per_second: float = 2.0,
+        retries: int = 3,
     ) -> None:
         self.url = url
+        # Other seasons and scoring formats are fetched from the same site,
+        # with the url's scoring format as the default
+        self.base_url, self.scoring = split_leaders_url(url)
+        self.cache = cache
+        self.parser = parser
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.session = self._create_session(retries)
         self.latest_gameweek = None
         self.weeks = None
+        self.player_database = None
+        self.dataset = None
+        self._player_index = None
+        self.unmatched = None
+        self.trade_values = None
+        self.price_model = None
+        self.unfitted_positions = []
 
-    def generate_nfl_dataset(self):
-        """Generate a dataset containing the weekly performances of NFL players"""
-        html = requests.get(
-            "https://www.fantasypros.com/nfl/reports/leaders/?year=2022&start=1&end=18"
-        )
+    @property
+    def player_index(self) -> PlayerIndex:
+        """Index giving every scraped player an id, created with the name
+        aliases when first used"""
+        if self._player_index is None:
+            self._player_index = PlayerIndex(load_aliases())
 
-        soup = BeautifulSoup(html.content, "html.parser")
-        tbody = soup.find_all("tbody")
-        data = [info.text for info in tbody[0].find_all("td")]
-
-        player_database = pd.DataFrame(
-            np.array(data).reshape(int(len(data) / 24), 24),
-            columns=[
-                "Rank",
-                "Player",
-                "Position",
-                "Team",
-                "1",
-                "2",
-                "3",
-                "4",
-                "5",
-                "6",
-                "7",
-                "8",
-                "9",
-                "10",
-                "11",
-                "12",
-                "13",
-                "14",
-                "15",
-                "16",
-                "17",
-                "18",
-                "Avg",
-                "TTL",
-            ],
+        return self._player_index
+
+    def _create_session(self, retries: int) -> requests.Session:
+        """Keep-alive session shared by all requests, retrying transient
+        failures with exponential backoff"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_maxsize=self.max_workers,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"],
+            ),
         )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
 
-        player_database["Player"] = player_database["Player"].apply(lambda x: x.strip())
-        player_database = player_database.replace("BYE", 0.0)
-        player_database = player_database.replace("-", 0.0)
+        return session
 
-        for col in player_database:
-            if col in ["Player", "Position", "Team"]:
-                continue
-            else:
-                player_database[col] = player_database[col].astype("float16")
+    @instrument()
+    def generate_nfl_dataset(self, incremental: bool = False):
+        """Generate a dataset containing the weekly performances of NFL players
+        Args:
+            incremental (bool): Only fetch the gameweeks that haven't been
+                stored yet and rebuild the positions whose players changed
+        """
+        if not incremental:
+            self.player_database = self.fetch_player_database()
+            self.dataset = self.build_dataset(self.player_database)
 
-        # Read owner database into memory
-        owner_database = pd.read_csv("./data/nfl-dynasty-rosters.csv")
+            return self.dataset
 
-        # Combine player database with owner database
-        merged_players_with_owners = player_database.merge(
-            owner_database[["Player", "Squad", "Years Remaining", "Price"]],
-            how="left",
-            left_on="Player",
-            right_on="Player",
+        changed = self.update_player_database()
+
+        if self.dataset is None:
+            self.dataset = self.build_dataset(self.player_database)
+        elif len(changed):
+            # PAR and price models are fitted per position, so only the
+            # positions with changed players need to be rebuilt
+            positions = changed["Position"].unique()
+            rebuilt = self.build_dataset(
+                self.player_database[self.player_database["Position"].isin(positions)]
+            )
+            dataset = pd.concat(
+                [self.dataset[~self.dataset["Position"].isin(positions)], rebuilt]
+            )
+            self.dataset = apply_schema(self.rank_players(dataset))
+
+        return self.dataset
+
+    @instrument()
+    def build_dataset(self, player_database: pd.DataFrame) -> pd.DataFrame:
+        """Combine weekly performances with owner, price and trade value data
+        Args:
+            player_database (pd.DataFrame): Weekly points scored by each player
+        Returns:
+            pd.DataFrame: Combined data for NFL players
+        """
+        # Give every scraped player an id, names from the other sources are
+        # matched against these
+        player_database = player_database.assign(
+            PlayerID=self.player_index.add(
+                player_database["Player"],
+                player_database["Position"],
+                player_database["Team"],
+            )
+        )
+
+        merged_players_with_owners, unmatched_owners = self.merge_owners(
+            player_database
         )
 
         # Preprocess the data
@@ -83,32 +284,352 @@ class NFLDataScrapper:
         # Add predictions for the price of free agents
         merged_players_with_owners = self.add_price_data(merged_players_with_owners)
 
-        # Load trade value data
-        trade_values = pd.read_csv("./data/trade-value-jan-23.csv")
+        merged_players_with_owners, unmatched_values = self.merge_trade_values(
+            merged_players_with_owners
+        )
 
-        # Combine stats player database with trade values for players
-        merged_players_with_owners = pd.merge(
+        # Keep track of names that couldn't be matched to a scraped player
+        self.unmatched = pd.concat(
+            [
+                unmatched_owners.assign(Source="Rosters"),
+                unmatched_values.assign(Source="Trade Values"),
+            ],
+            ignore_index=True,
+        )
+
+        return apply_schema(merged_players_with_owners)
+
+    @instrument()
+    def merge_owners(self, player_database: pd.DataFrame) -> tuple:
+        """Add the squad and contract of every rostered player
+        Args:
+            player_database (pd.DataFrame): Weekly points scored by each
+                player, with their PlayerID
+        Returns:
+            tuple: Merged data and the roster names that matched no player,
+                or more than one
+        """
+        # Read owner database into memory
+        owner_database = pd.read_csv("./data/nfl-dynasty-rosters.csv")
+        # Rosters have no team, so players sharing a name and position
+        # can't be told apart and are reported rather than guessed
+        owner_database["PlayerID"] = self.player_index.lookup(
+            owner_database["Player"], owner_database["Position"]
+        )
+
+        # Combine player database with owner database
+        merged_players_with_owners = player_database.merge(
+            owner_database.loc[
+                owner_database["PlayerID"] >= 0,
+                ["PlayerID", "Squad", "Years Remaining", "Price"],
+            ],
+            how="left",
+            on="PlayerID",
+        )
+
+        return (
             merged_players_with_owners,
-            trade_values[["Player", "Team", "Trade Value"]],
+            owner_database.loc[owner_database["PlayerID"] < 0, ["Player"]],
+        )
+
+    @instrument()
+    def merge_trade_values(self, data: pd.DataFrame) -> tuple:
+        """Add the latest trade value of every player
+        Args:
+            data (pd.DataFrame): Combined data for NFL players
+        Returns:
+            tuple: Merged data and the trade value names that matched no
+                player, or more than one
+        """
+        # Load the latest trade value data
+        if self.trade_values is None:
+            self.trade_values = TradeValueHistory.load()
+        # Players are added to the index as they're scraped, so the ids are
+        # looked up again on every merge
+        self.trade_values.identify(self.player_index)
+        trade_values = self.trade_values.value_at()
+
+        # Combine stats player database with trade values for players
+        data = data.merge(
+            trade_values.loc[
+                trade_values["PlayerID"] >= 0, ["PlayerID", "Trade Value"]
+            ],
             how="left",
-            right_on=["Player", "Team"],
-            left_on=["Player", "Team"],
+            on="PlayerID",
         )
 
         # Assign value of 1.0 to any player without a defined trade value
-        merged_players_with_owners["Trade Value"] = merged_players_with_owners[
-            "Trade Value"
-        ].fillna(1.0)
+        data["Trade Value"] = data["Trade Value"].fillna(1.0)
 
-        return merged_players_with_owners
+        return data, trade_values.loc[trade_values["PlayerID"] < 0, ["Player"]]
 
+    @instrument()
+    def update_player_database(self, season: int = 2022) -> pd.DataFrame:
+        """Fetch the gameweeks newer than the stored ones and merge them in
+        Args:
+            season (int): Season being tracked
+        Returns:
+            pd.DataFrame: Rows of the stored table that were added or changed
+        """
+        if self.player_database is None:
+            self.player_database = self._load_stored_weeks(season)
+
+        if self.player_database is None:
+            self.player_database = self.fetch_player_database(season)
+            changed = self.player_database
+        else:
+            # The latest stored week is fetched again as it may have been
+            # in progress, or had stat corrections, when it was stored
+            try:
+                latest = self.fetch_player_database(season, start=self.latest_gameweek)
+            except FileNotFoundError:
+                # Offline without anything newer cached, so nothing changed
+                latest = self.player_database.iloc[0:0]
+            self.player_database, changed = self.merge_weeks(
+                self.player_database, latest
+            )
+
+        self.weeks = [col for col in self.player_database if col.isdigit()]
+        played = (self.player_database[self.weeks] != 0).any()
+        self.latest_gameweek = int(played[played].index[-1]) if played.any() else 1
+
+        if self.cache is not None:
+            self.cache.save(
+                self._stored_weeks_key(season),
+                self.player_database,
+                latest_gameweek=self.latest_gameweek,
+            )
+
+        return changed
+
+    @instrument()
+    def merge_weeks(self, player_database: pd.DataFrame, latest: pd.DataFrame) -> tuple:
+        """Merge newly fetched gameweeks into the stored player-by-week table
+        Args:
+            player_database (pd.DataFrame): Stored weekly points per player
+            latest (pd.DataFrame): Freshly fetched points for the latest weeks
+        Returns:
+            tuple: The merged table and the rows that were added or changed
+        """
+        # Players sharing a name and position are told apart by the order
+        # in which they appear
+        keys = ["Player", "Position", "Occurrence"]
+        weeks = [col for col in latest if col.isdigit()]
+        stored_weeks = [col for col in player_database if col.isdigit()]
+
+        stored = player_database.assign(
+            Occurrence=player_database.groupby(keys[:2]).cumcount()
+        ).set_index(keys)
+        latest = latest.assign(
+            Occurrence=latest.groupby(keys[:2]).cumcount()
+        ).set_index(keys)
+
+        merged = stored.reindex(stored.index.union(latest.index, sort=False))
+        merged[stored_weeks] = merged[stored_weeks].fillna(0.0)
+
+        # Compare against the stored values before overwriting them
+        before = merged.loc[latest.index, weeks].to_numpy()
+        after = latest[weeks].to_numpy()
+        changed = merged.index.isin(latest.index[(before != after).any(axis=1)])
+        changed |= ~merged.index.isin(stored.index)
+
+        merged.loc[latest.index, weeks] = after
+        merged.loc[latest.index, "Team"] = latest["Team"]
+
+        # Totals are recomputed from the weekly columns for changed players,
+        # averaging over the weeks in which they scored
+        points = merged.loc[changed, stored_weeks].astype("float32")
+        ttl = points.sum(axis=1)
+        avg = ttl / (points != 0).sum(axis=1).clip(lower=1)
+        merged.loc[changed, "TTL"] = ttl.astype(merged["TTL"].dtype)
+        merged.loc[changed, "Avg"] = avg.astype(merged["Avg"].dtype)
+
+        merged = merged.reset_index()[player_database.columns]
+        changed = merged[changed]
+
+        return self.rank_players(merged), changed
+
+    @instrument()
+    def rank_players(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Order players by total points and renumber their rank"""
+        data = data.sort_values("TTL", ascending=False, kind="stable")
+        data["Rank"] = np.arange(1, len(data) + 1, dtype=data["Rank"].dtype)
+
+        return data.reset_index(drop=True)
+
+    def _stored_weeks_key(self, season: int) -> str:
+        # Keyed on the page of the scrapper's scoring format, so scrappers
+        # for other formats sharing the cache keep their own weeks
+        page_url = f"{self.base_url}{SCORING_FORMATS[self.scoring]}"
+
+        return self.cache.key(f"{page_url}#weeks", season, 1, 18)
+
+    def _load_stored_weeks(self, season: int) -> pd.DataFrame:
+        if self.cache is None:
+            return None
+
+        key = self._stored_weeks_key(season)
+        stored = self.cache.load(key)
+        latest_gameweek = self.cache.metadata(key).get("latest_gameweek")
+        # Without the latest week, e.g. an entry stored before it was
+        # recorded, the weeks are fetched again from the start
+        if stored is None or latest_gameweek is None:
+            return None
+
+        self.latest_gameweek = latest_gameweek
+
+        return stored
+
+    @instrument()
+    def fetch_player_database(
+        self,
+        season: int = 2022,
+        start: int = 1,
+        end: int = 18,
+        scoring: str = None,
+    ) -> pd.DataFrame:
+        """Fetch the weekly leaders table, reading from the cache when possible
+        Args:
+            season (int): Season to fetch
+            start (int): First gameweek to fetch
+            end (int): Last gameweek to fetch
+            scoring (str): Scoring format, one of SCORING_FORMATS, defaults
+                to the format of the scrapper's url
+        Returns:
+            pd.DataFrame: Weekly points scored by each player
+        """
+        page_url = f"{self.base_url}{SCORING_FORMATS[scoring or self.scoring]}"
+        url = f"{page_url}?year={season}&start={start}&end={end}"
+
+        if self.cache is None:
+            html = self._get(url)
+            html.raise_for_status()
+
+            return self.parse_player_database(html.content, start, end)
+
+        key = self.cache.key(page_url, season, start, end)
+        cached = self.cache.load(key)
+
+        if cached is not None and (self.cache.offline or self.cache.is_fresh(key)):
+            METRICS.increment("scrape_cache", result="hit")
+            return cached
+
+        if self.cache.offline:
+            raise FileNotFoundError(f"No cached data for {url} in offline mode")
+
+        # Revalidate a stale entry rather than downloading it again
+        headers = {}
+        etag = self.cache.metadata(key).get("etag")
+        if cached is not None and etag:
+            headers["If-None-Match"] = etag
+
+        html = self._get(url, headers=headers)
+
+        if html.status_code == 304:
+            METRICS.increment("scrape_cache", result="revalidated")
+            self.cache.touch(key)
+            return cached
+
+        METRICS.increment("scrape_cache", result="miss")
+
+        # Don't overwrite a good cache entry with an error page
+        html.raise_for_status()
+
+        player_database = self.parse_player_database(html.content, start, end)
+        self.cache.save(key, player_database, url=url, etag=html.headers.get("ETag"))
+
+        return player_database
+
+    @instrument()
+    def fetch_many(self, pages: list) -> pd.DataFrame:
+        """Fetch several leaders pages concurrently
+        Args:
+            pages (list): (season, scoring, start, end) tuple for each page
+        Returns:
+            pd.DataFrame: Long format table with one row per player, page and
+                gameweek
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            tables = list(
+                executor.map(
+                    lambda page: self.fetch_player_database(
+                        season=page[0], scoring=page[1], start=page[2], end=page[3]
+                    ),
+                    pages,
+                )
+            )
+
+        weekly = []
+        for (season, scoring, _, _), table in zip(pages, tables):
+            weeks = [col for col in table if col.isdigit()]
+            long = table.melt(
+                id_vars=["Player", "Position", "Team"],
+                value_vars=weeks,
+                var_name="Week",
+                value_name="Points",
+            )
+            long.insert(0, "Scoring", scoring)
+            long.insert(0, "Season", season)
+            weekly.append(long)
+
+        combined = pd.concat(weekly, ignore_index=True)
+        combined["Week"] = combined["Week"].astype(int)
+
+        return combined
+
+    @instrument()
+    def _get(self, url: str, headers: dict = None) -> requests.Response:
+        """Request a page through the shared session, within the rate limit"""
+        self.rate_limiter.wait()
+
+        return self.session.get(url, headers=headers or {}, timeout=30)
+
+    @instrument()
+    def parse_player_database(
+        self, content: bytes, start: int = 1, end: int = 18
+    ) -> pd.DataFrame:
+        """Parse the weekly leaders table from the html of the page
+        Args:
+            content (bytes): Raw html of the leaders page
+            start (int): First gameweek on the page
+            end (int): Last gameweek on the page
+        Returns:
+            pd.DataFrame: Weekly points scored by each player
+        """
+        headers, columns = PARSERS[self.parser](content)
+
+        # Fall back to the expected layout if the header can't be matched up
+        # with the rows
+        if len(headers) != len(columns):
+            headers = (
+                ["Rank", "Player", "Position", "Team"]
+                + [str(week) for week in range(start, end + 1)]
+                + ["Avg", "TTL"]
+            )
+
+        player_database = {}
+        for header, values in zip(headers, columns):
+            header = HEADER_NAMES.get(header, header)
+            values = [value.strip() for value in values]
+
+            if header in ["Player", "Position", "Team"]:
+                player_database[header] = values
+            else:
+                player_database[header] = np.array(
+                    [0.0 if value in ["BYE", "-"] else value for value in values],
+                    dtype="float32",
+                )
+
+        return pd.DataFrame(player_database)
+
+    @instrument()
     def clean_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """Additional preprocessing steps
         Returns:
             pd.DataFrame: pd.DataFrame with additional metadata added
         """
-        # Add roster status
-        data["Squad"] = data["Squad"].fillna("Free Agent")
+        # Add roster status, some squad names in the rosters have stray spaces
+        data["Squad"] = data["Squad"].str.strip().fillna("Free Agent")
         # Clarify free agent status
         data["Free Agent"] = data["Squad"] == "Free Agent"
         # Add missing values for agents - you can only sign them for 1 year
@@ -117,12 +638,15 @@ class NFLDataScrapper:
 
         return data
 
+    @instrument()
     def add_par_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """Add Points Above Replacement Data
         Return:
             pd.DataFrame: Data with additional fields relating to PAR added.
         """
-        avg_points_by_position = pd.DataFrame(data.groupby(["Position"])["TTL"].mean())
+        avg_points_by_position = pd.DataFrame(
+            data.groupby(["Position"], observed=True)["TTL"].mean()
+        )
         avg_points_by_position.columns = ["AvgPointsByPosition"]
 
         data = data.merge(
@@ -133,6 +657,46 @@ class NFLDataScrapper:
 
         return data
 
+    @instrument()
+    def fit_price_model(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Fit a least squares line of price against points for every
+        position in one pass
+        Args:
+            data (pd.DataFrame): DataFrame containing the combined data for
+                NFL players
+        Returns:
+            pd.DataFrame: Number of priced players, slope and intercept for
+                each position, NaN where a position has no priced players
+        """
+        priced = data.loc[data["Price"].notna(), ["Position", "TTL", "Price"]]
+        positions = priced["Position"]
+        x = priced["TTL"].astype("float64")
+        y = priced["Price"].astype("float64")
+
+        # Closed form simple regression from the per position sums of the
+        # centred values
+        x_mean = x.groupby(positions, observed=True).mean()
+        y_mean = y.groupby(positions, observed=True).mean()
+        dx = x - positions.map(x_mean).astype("float64")
+        dy = y - positions.map(y_mean).astype("float64")
+        sxx = (dx * dx).groupby(positions, observed=True).sum()
+        sxy = (dx * dy).groupby(positions, observed=True).sum()
+
+        # Like LinearRegression, a position without any spread in points is
+        # fitted with a flat line through its mean price
+        slope = (sxy / sxx).where(sxx > 0, 0.0)
+
+        model = pd.DataFrame(
+            {
+                "Samples": positions.value_counts(),
+                "Slope": slope,
+                "Intercept": y_mean - slope * x_mean,
+            }
+        )
+
+        return model.reindex(pd.Index(data["Position"].unique(), name="Position"))
+
+    @instrument()
     def add_price_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """Generate scoring model and add price predictions
         Args:
@@ -142,31 +706,22 @@ class NFLDataScrapper:
             pd.DataFrame: Same pd.DataFrame but with predicted value for
                 free agents based on their points scored.
         """
-        for position in data["Position"].unique():
-            try:
-                # Instantiate regression model
-                lr = LinearRegression()
-
-                # Fit the data to existing data based on points scored and the
-                # associated value of those players
-                lr.fit(
-                    data[(data["Position"] == position) & ~(data["Price"].isna())][
-                        "TTL"
-                    ].values.reshape(-1, 1),
-                    data[(data["Position"] == position) & ~(data["Price"].isna())][
-                        "Price"
-                    ].values.reshape(-1, 1),
-                )
+        model = self.fit_price_model(data)
 
-                data.loc[
-                    (data["Position"] == position) & (data["Price"].isna()), "Price"
-                ] = lr.predict(
-                    data.loc[
-                        (data["Position"] == position) & (data["Price"].isna()),
-                        "TTL",
-                    ].values.reshape(-1, 1)
-                )
-            except ValueError:
-                continue
+        # Keep the coefficients of positions that weren't refitted, e.g. by an
+        # incremental rebuild
+        if self.price_model is not None:
+            model = pd.concat(
+                [self.price_model.drop(model.index, errors="ignore"), model]
+            )
+        self.price_model = model
+        self.unfitted_positions = list(model.index[model["Slope"].isna()])
+
+        # Positions that couldn't be fitted are left without a price
+        missing = data["Price"].isna()
+        positions = data.loc[missing, "Position"]
+        slope = positions.map(model["Slope"]).astype("float64")
+        intercept = positions.map(model["Intercept"]).astype("float64")
+        data.loc[missing, "Price"] = intercept + slope * data.loc[missing, "TTL"]
 
         return data
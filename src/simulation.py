@@ -0,0 +1,234 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from src.distributions import PlayerDistributions
+
+
+class SimulationCache:
+    def __init__(
+        self,
+        maxsize: int = 128,
+        spill_dir: str = None,
+        store=None,
+        expire: float = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.spill_dir = spill_dir
+        # Every entry is also written through to a store shared between
+        # processes, such as a diskcache.Cache, so totals simulated in a
+        # background job or another worker are reused
+        self.store = store
+        self.expire = expire
+        self.hits = 0
+        self.shared_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _digest(key: tuple) -> str:
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def _spill_path(self, key: tuple) -> str:
+        return os.path.join(self.spill_dir, f"{self._digest(key)}.npy")
+
+    def _store_key(self, key: tuple) -> str:
+        return f"simulation-{self._digest(key)}"
+
+    def get(self, key: tuple) -> np.ndarray:
+        """Simulated totals for a key, or None if they aren't cached"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        if self.store is not None:
+            totals = self.store.get(self._store_key(key))
+            if totals is not None:
+                self.shared_hits += 1
+                self._remember(key, totals)
+                return totals
+
+        if self.spill_dir is not None and os.path.exists(self._spill_path(key)):
+            totals = np.load(self._spill_path(key))
+            os.remove(self._spill_path(key))
+            self.disk_hits += 1
+            self._remember(key, totals)
+            return totals
+
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple, totals: np.ndarray) -> None:
+        """Store simulated totals, evicting the least recently used entry
+        to disk, or dropping it, once the cache is full"""
+        self._remember(key, totals)
+
+        if self.store is not None:
+            self.store.set(self._store_key(key), totals, expire=self.expire)
+
+    def _remember(self, key: tuple, totals: np.ndarray) -> None:
+        self._entries[key] = totals
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            if self.spill_dir is not None:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                np.save(self._spill_path(evicted_key), evicted)
+
+    def stats(self) -> dict:
+        """Hit and miss counts for sizing the cache"""
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+class LineupSimulator:
+    def __init__(
+        self,
+        distributions: PlayerDistributions,
+        n_sims: int = 10000,
+        seed: int = None,
+        chunk_size: int = 250000,
+        cache: SimulationCache = None,
+        model: str = "exponential",
+        correlated: bool = False,
+    ) -> None:
+        self.distributions = distributions
+        self.n_sims = n_sims
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.model = model
+        self.correlated = correlated
+        # Cached results are only valid for the scores they were simulated
+        # from
+        self.version = distributions.version
+
+    def lineup_means(self, lineups: list) -> np.ndarray:
+        """Look up the mean score of every player in every lineup in one pass
+        Args:
+            lineups (list): List of lineups of equal length, each a list of
+                players as indexed in the weekly scores
+        Returns:
+            np.ndarray: Array of shape (n_lineups, n_slots) of mean scores
+        """
+        players = [player for lineup in lineups for player in lineup]
+        means = self.distributions.mean[self.distributions.rows(players)]
+
+        return means.reshape(len(lineups), -1)
+
+    def cache_key(
+        self, lineup: list, model: str = None, correlated: bool = None
+    ) -> tuple:
+        """Key identifying the simulated totals of a lineup"""
+        return (
+            self.version,
+            model or self.model,
+            self.correlated if correlated is None else correlated,
+            self.n_sims,
+            self.seed,
+            tuple(sorted(lineup)),
+        )
+
+    def simulate(
+        self,
+        lineups: list,
+        model: str = None,
+        correlated: bool = None,
+        progress: Callable[[int, int], None] = None,
+    ) -> np.ndarray:
+        """Sample the total points scored by each lineup, reusing cached
+        results for lineups that have been simulated before
+        Args:
+            lineups (list): List of lineups of equal length, each a list of
+                players as indexed in the weekly scores
+            model (str): Distribution model to sample from, defaults to the
+                simulator's model
+            correlated (bool): Whether teammates' scores are sampled
+                jointly, defaults to the simulator's setting
+            progress (Callable): Called with the samples drawn so far and
+                the total after each chunk
+        Returns:
+            np.ndarray: Array of shape (n_lineups, n_sims) containing the
+                simulated lineup totals
+        """
+        # The order players are picked in doesn't change a lineup's total
+        lineups = [sorted(lineup) for lineup in lineups]
+        model = model or self.model
+        correlated = self.correlated if correlated is None else correlated
+        totals = np.empty((len(lineups), self.n_sims))
+        missing = []
+
+        for i, lineup in enumerate(lineups):
+            cached = (
+                None
+                if self.cache is None
+                else self.cache.get(self.cache_key(lineup, model, correlated))
+            )
+            if cached is None:
+                missing.append(i)
+            else:
+                totals[i] = cached
+
+        if missing:
+            totals[missing] = self._draw(
+                [lineups[i] for i in missing], model, correlated, progress
+            )
+
+            if self.cache is not None:
+                for i in missing:
+                    self.cache.put(
+                        self.cache_key(lineups[i], model, correlated), totals[i]
+                    )
+
+        return totals
+
+    def _draw(
+        self,
+        lineups: list,
+        model: str,
+        correlated: bool,
+        progress: Callable[[int, int], None] = None,
+    ) -> np.ndarray:
+        """Simulate lineups in one batch, each from its own random stream so
+        its totals don't depend on the other lineups in the batch"""
+        rows = [self.distributions.rows(lineup) for lineup in lineups]
+        rngs = [self._rng(lineup) for lineup in lineups]
+        sample = (
+            self.distributions.sample_correlated
+            if correlated
+            else self.distributions.sample
+        )
+        totals = np.empty((len(lineups), self.n_sims))
+
+        # Draw in chunks so millions of samples don't need a full
+        # (n_sims, n_slots) matrix per lineup in memory at once
+        for start in range(0, self.n_sims, self.chunk_size):
+            stop = min(start + self.chunk_size, self.n_sims)
+            for i, rng in enumerate(rngs):
+                totals[i, start:stop] = sample(model, rows[i], stop - start, rng).sum(
+                    axis=1
+                )
+            if progress is not None:
+                progress(stop * len(lineups), self.n_sims * len(lineups))
+
+        return totals
+
+    def _rng(self, lineup: list) -> np.random.Generator:
+        if self.seed is None:
+            return np.random.default_rng()
+
+        lineup_hash = hashlib.sha1(repr(lineup).encode()).hexdigest()
+
+        return np.random.default_rng([self.seed, int(lineup_hash[:16], 16)])
@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# File naming the snapshot currently being served
+CURRENT = "CURRENT"
+
+
+def flatten(arrays: dict) -> dict:
+    """Name groups of arrays as group.name, so they can share a directory"""
+    flat = {}
+    for name, array in arrays.items():
+        if isinstance(array, dict):
+            flat.update({f"{name}.{member}": value for member, value in array.items()})
+        else:
+            flat[name] = array
+
+    return flat
+
+
+def unflatten(arrays: dict) -> dict:
+    """Regroup arrays flattened by flatten"""
+    nested = {}
+    for name, array in arrays.items():
+        group, _, member = name.partition(".")
+        if member:
+            nested.setdefault(group, {})[member] = array
+        else:
+            nested[name] = array
+
+    return nested
+
+
+# Each snapshot is a directory named by its version holding a .arrow file
+# per table, a .npy file per array, with grouped arrays named group.name, and
+# a metadata.json listing them. Arrays are memory-mapped when loaded, so the
+# classes rebuilt from them with from_arrays share their pages between
+# processes rather than each holding a copy.
+class SnapshotStore:
+    def __init__(self, snapshot_dir: str = "./data/snapshots", keep: int = 3) -> None:
+        self.snapshot_dir = snapshot_dir
+        # Older snapshots are kept a while, as a worker may still be loading
+        # one when a newer one is written
+        self.keep = keep
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.snapshot_dir, *parts)
+
+    def latest(self) -> str:
+        """Version of the most recently written snapshot, or None if there
+        isn't one yet"""
+        try:
+            with open(self._path(CURRENT), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self) -> list:
+        """Versions of the snapshots on disk, oldest first"""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+
+        return sorted(
+            entry
+            for entry in os.listdir(self.snapshot_dir)
+            if entry.isdigit() and os.path.isdir(self._path(entry))
+        )
+
+    def write(self, tables: dict, arrays: dict, metadata: dict = None) -> str:
+        """Write a snapshot and make it the latest in one atomic step
+        Args:
+            tables (dict): DataFrames to store as uncompressed Arrow files
+            arrays (dict): Numeric or fixed width string arrays to store as
+                .npy files, or dicts of them to store as a group
+            metadata (dict): Anything else that can be stored as JSON
+        Returns:
+            str: Version of the new snapshot
+        """
+        version = f"{time.time_ns():020d}"
+        # Files are written to a hidden directory so a half written snapshot
+        # is never picked up
+        staging = self._path(f".{version}")
+        os.makedirs(staging)
+
+        for name, table in tables.items():
+            table = pa.Table.from_pandas(table)
+            with pa.OSFile(os.path.join(staging, f"{name}.arrow"), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+        arrays = flatten(arrays)
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            # Object arrays can't be memory-mapped, strings are stored at a
+            # fixed width instead
+            if array.dtype == object:
+                array = array.astype(str)
+            np.save(os.path.join(staging, f"{name}.npy"), array, allow_pickle=False)
+
+        with open(os.path.join(staging, "metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {"tables": list(tables), "arrays": list(arrays), **(metadata or {})},
+                f,
+            )
+
+        os.rename(staging, self._path(version))
+
+        # Replacing the pointer is atomic, so readers see the old or the new
+        # version and never a mix
+        pointer = self._path(f".{CURRENT}-{version}")
+        with open(pointer, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer, self._path(CURRENT))
+
+        for old in self.versions()[: -self.keep]:
+            shutil.rmtree(self._path(old), ignore_errors=True)
+
+        return version
+
+    def load(self, version: str = None) -> dict:
+        """Memory-map a snapshot, so processes loading the same snapshot
+        share its pages rather than each holding a copy. Tables are backed by
+        the mapped Arrow buffers, rather than converted to numpy
+        Args:
+            version (str): Snapshot to load, defaults to the latest
+        Returns:
+            dict: version, tables, arrays and metadata of the snapshot
+        """
+        version = version or self.latest()
+        if version is None:
+            raise FileNotFoundError(f"No snapshot in {self.snapshot_dir}")
+
+        with open(self._path(version, "metadata.json"), encoding="utf-8") as f:
+            metadata = json.load(f)
+
+        tables = {}
+        for name in metadata["tables"]:
+            with pa.memory_map(self._path(version, f"{name}.arrow")) as source:
+                tables[name] = (
+                    pa.ipc.open_file(source)
+                    .read_all()
+                    .to_pandas(types_mapper=pd.ArrowDtype)
+                )
+
+        arrays = unflatten(
+            {
+                name: np.load(self._path(version, f"{name}.npy"), mmap_mode="r")
+                for name in metadata["arrays"]
+            }
+        )
+
+        return {
+            "version": version,
+            "tables": tables,
+            "arrays": arrays,
+            "metadata": metadata,
+        }
@@ -0,0 +1,179 @@
+import glob
+import os
+import re
+
+import pandas as pd
+
+from src.players import PlayerIndex
+
+MONTHS = {
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "sept": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
+
+# Monthly files are named like trade-value-jan-23.csv or trade-values-sept-22.csv
+FILE_PATTERN = re.compile(r"trade-values?-([a-z]+)-(\d{2})\.csv$")
+
+
+def read_trade_values(path: str) -> pd.DataFrame:
+    """Read one monthly trade value file into the common long format
+    Args:
+        path (str): Path to the csv, its name gives the month it covers
+    Returns:
+        pd.DataFrame: Date, Player, Team and Trade Value of each player
+    """
+    month, year = FILE_PATTERN.search(os.path.basename(path)).groups()
+
+    # Files name their player and value columns differently and some have
+    # trailing empty columns, but the first three are always the same
+    values = pd.read_csv(path).iloc[:, :3]
+    values.columns = ["Player", "Team", "Trade Value"]
+    values = values.dropna(subset=["Player", "Trade Value"])
+    values.insert(0, "Date", pd.Timestamp(2000 + int(year), MONTHS[month], 1))
+
+    return values
+
+
+def find_trade_value_files(data_dir: str = "./data") -> list:
+    """Monthly trade value files in the data directory"""
+    return sorted(
+        path
+        for path in glob.glob(os.path.join(data_dir, "trade-value*.csv"))
+        if FILE_PATTERN.search(os.path.basename(path))
+    )
+
+
+class TradeValueHistory:
+    def __init__(self, values: pd.DataFrame, player_index: PlayerIndex = None) -> None:
+        self.values = values.sort_values(["Date", "Player"], ignore_index=True)
+        self.wide = None
+        self.identify(player_index)
+
+    def identify(self, player_index: PlayerIndex = None) -> None:
+        """Give every value the id of its player, and pivot the history on
+        them so players sharing a name are kept apart
+        Args:
+            player_index (PlayerIndex): Index the players are looked up in,
+                such as the scrapper's, defaults to registering the players
+                month by month so they keep their id when they change team
+        """
+        if player_index is None:
+            player_index = PlayerIndex()
+            player_ids = pd.concat(
+                [
+                    pd.Series(
+                        player_index.add(
+                            month["Player"].tolist(),
+                            [None] * len(month),
+                            month["Team"].tolist(),
+                        ),
+                        index=month.index,
+                    )
+                    for _, month in self.values.groupby("Date", sort=True)
+                ]
+            )
+        else:
+            # Trade values have no position, the team tells apart players
+            # sharing a name
+            player_ids = player_index.lookup(
+                self.values["Player"], teams=self.values["Team"]
+            )
+
+        self.values["PlayerID"] = player_ids
+        # Month by player table that the point in time and trend queries
+        # are answered from, without the values matching no single player
+        self.wide = self.values.loc[self.values["PlayerID"] >= 0].pivot_table(
+            index="Date", columns="PlayerID", values="Trade Value", aggfunc="last"
+        )
+
+    @classmethod
+    def from_csvs(cls, paths: list = None) -> "TradeValueHistory":
+        """Build the history from the monthly csv files
+        Args:
+            paths (list): Files to read, defaults to every trade value file
+                in the data directory
+        """
+        paths = paths or find_trade_value_files()
+        values = pd.concat([read_trade_values(path) for path in paths])
+        values = values.astype({"Team": "category", "Trade Value": "float32"})
+
+        return cls(values)
+
+    @classmethod
+    def load(
+        cls, path: str = "./data/cache/trade-values.parquet", paths: list = None
+    ) -> "TradeValueHistory":
+        """Read the history from its Parquet file, rebuilding it from the
+        csv files if any of them is newer
+        Args:
+            path (str): Location of the Parquet file
+            paths (list): Monthly csv files the history is built from
+        """
+        paths = paths or find_trade_value_files()
+
+        if os.path.exists(path) and os.path.getmtime(path) >= max(
+            os.path.getmtime(source) for source in paths
+        ):
+            return cls(pd.read_parquet(path))
+
+        history = cls.from_csvs(paths)
+        history.save(path)
+
+        return history
+
+    def save(self, path: str) -> None:
+        """Write the long format history to a Parquet file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        # Ids depend on the index the players were looked up in, so they're
+        # assigned again when the history is loaded
+        self.values.drop(columns="PlayerID").to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def value_at(self, date=None) -> pd.DataFrame:
+        """Trade values as of a date
+        Args:
+            date: Point in time to query, defaults to the latest month
+        Returns:
+            pd.DataFrame: Player, Team, Trade Value and PlayerID from the
+                latest month on or before the date
+        """
+        dates = self.wide.index
+        if date is not None:
+            dates = dates[dates <= pd.Timestamp(date)]
+
+        values = self.values.loc[
+            self.values["Date"] == (dates[-1] if len(dates) else None)
+        ]
+
+        return values.drop(columns="Date").reset_index(drop=True)
+
+    def change(self, periods: int = 1) -> pd.DataFrame:
+        """Change in each player's trade value between months
+        Args:
+            periods (int): Number of months to compare across
+        Returns:
+            pd.DataFrame: Month by player table of value changes
+        """
+        return self.wide.diff(periods)
+
+    def trend(self, players: list) -> pd.DataFrame:
+        """Trade values of some players over time
+        Args:
+            players (list): Player ids
+        Returns:
+            pd.DataFrame: Month by player table of trade values
+        """
+        return self.wide.reindex(columns=players)
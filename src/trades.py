@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+from src.distributions import PlayerDistributions
+from src.lineups import optimal_lineup
+from src.simulation import LineupSimulator
+
+# Per player arrays a TradeAnalyzer can be rebuilt from
+TRADE_ARRAYS = [
+    "ids",
+    "squads",
+    "squad_codes",
+    "value",
+    "points",
+    "price",
+    "commitment",
+    "means",
+]
+
+
+class TradeAnalyzer:
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        distributions: PlayerDistributions,
+        simulator: LineupSimulator,
+    ) -> None:
+        self.distributions = distributions
+        self.simulator = simulator
+        self.players = (
+            data.loc[data["Squad"] != "Free Agent"]
+            .drop_duplicates("PlayerID")
+            .reset_index(drop=True)
+        )
+
+        # Per player arrays candidate trades are scored from
+        self.ids = self.players["PlayerID"].to_numpy()
+        self.squads = self.players["Squad"].astype(str).to_numpy()
+        self.squad_codes = pd.factorize(self.squads)[0]
+        self.value = self.players["Trade Value"].to_numpy(dtype="float64")
+        # Players below replacement level can be swapped for a free agent, so
+        # losing them costs no points
+        self.points = np.maximum(
+            self.players["PointsAboveReplacement"].to_numpy(dtype="float64"), 0
+        )
+        self.price = self.players["Price"].to_numpy(dtype="float64")
+        self.commitment = self.price * self.players["Years Remaining"].to_numpy(
+            dtype="float64"
+        )
+        self.means = distributions.mean[distributions.rows(self.ids)]
+
+    def to_arrays(self) -> dict:
+        """Per player arrays for a snapshot, next to the players table"""
+        return {name: getattr(self, name) for name in TRADE_ARRAYS}
+
+    @classmethod
+    def from_arrays(
+        cls,
+        players: pd.DataFrame,
+        arrays: dict,
+        distributions: PlayerDistributions,
+        simulator: LineupSimulator,
+    ) -> "TradeAnalyzer":
+        """Analyzer backed by its players table and the arrays from to_arrays"""
+        trades = cls.__new__(cls)
+        trades.players = players
+        trades.distributions = distributions
+        trades.simulator = simulator
+        for name in TRADE_ARRAYS:
+            setattr(trades, name, arrays[name])
+
+        return trades
+
+    def roster(self, squad: str, gives: list = (), receives: list = ()) -> np.ndarray:
+        """Rows of the players on a squad after a trade"""
+        on_squad = (self.squads == squad) & ~np.isin(self.ids, gives)
+
+        return np.flatnonzero(on_squad | np.isin(self.ids, receives))
+
+    def summarise(self, rows: np.ndarray) -> dict:
+        """Roster value, simulated weekly points and contract cost of a roster"""
+        lineup = optimal_lineup(self.players.iloc[rows], self.means[rows])
+        lineup = [player for player in lineup if player is not None]
+
+        return {
+            "Trade Value": self.value[rows].sum(),
+            "Weekly Points": (
+                self.simulator.simulate([lineup])[0].mean() if lineup else 0.0
+            ),
+            "Price": self.price[rows].sum(),
+            "Commitment": self.commitment[rows].sum(),
+        }
+
+    def evaluate(
+        self, squad: str, gives: list, partner: str, receives: list
+    ) -> pd.DataFrame:
+        """Compare both squads before and after a trade
+        Args:
+            squad (str): Squad proposing the trade
+            gives (list): PlayerIDs the squad sends
+            partner (str): Squad on the other side of the trade
+            receives (list): PlayerIDs the squad gets back
+        Returns:
+            pd.DataFrame: Before, after and change in trade value, simulated
+                weekly points of the best lineup and contract cost for each
+                squad
+        """
+        rows = []
+        for team, sent, got in [(squad, gives, receives), (partner, receives, gives)]:
+            before = self.summarise(self.roster(team))
+            after = self.summarise(self.roster(team, sent, got))
+            for measure in before:
+                rows.append(
+                    {
+                        "Squad": team,
+                        "Measure": measure,
+                        "Before": before[measure],
+                        "After": after[measure],
+                        "Change": after[measure] - before[measure],
+                    }
+                )
+
+        return pd.DataFrame(rows)
+
+    def rank_trades(
+        self,
+        squad: str = None,
+        partner: str = None,
+        limit: int = 50,
+        tolerance: float = 0.0,
+    ) -> pd.DataFrame:
+        """Find the 1-for-1 and 2-for-1 trades that gain the most points
+        above replacement while giving the partner at least as much trade
+        value as it sends
+        Args:
+            squad (str): Squad giving players, defaults to every squad
+            partner (str): Squad receiving them, defaults to every squad
+            limit (int): Number of trades to return
+            tolerance (float): Trade value the partner may lose and still
+                accept
+        Returns:
+            pd.DataFrame: Best trades first
+        """
+        givers = np.arange(len(self.ids))
+        if squad is not None:
+            givers = givers[self.squads == squad]
+
+        # Pairs of players from the same squad for the 2-for-1 trades
+        first, second = np.triu_indices(len(self.ids), 1)
+        same_squad = self.squad_codes[first] == self.squad_codes[second]
+        pairs = np.stack([first[same_squad], second[same_squad]], axis=1)
+        pairs = pairs[np.isin(pairs[:, 0], givers)]
+
+        packages = [(givers[:, None], 1), (pairs, 2)]
+        candidates = []
+        for package, size in packages:
+            # Every package against every player on another squad
+            gives = np.repeat(package, len(self.ids), axis=0)
+            receives = np.tile(np.arange(len(self.ids)), len(package))
+            legal = self.squad_codes[gives[:, 0]] != self.squad_codes[receives]
+            if partner is not None:
+                legal &= self.squads[receives] == partner
+            gives, receives = gives[legal], receives[legal]
+
+            points = self.points[receives] - self.points[gives].sum(axis=1)
+            partner_value = self.value[gives].sum(axis=1) - self.value[receives]
+            accepted = partner_value >= -tolerance
+            candidates.append(
+                (
+                    np.pad(
+                        gives[accepted], ((0, 0), (0, 2 - size)), constant_values=-1
+                    ),
+                    receives[accepted],
+                    points[accepted],
+                    partner_value[accepted],
+                )
+            )
+
+        gives, receives, points, partner_value = (
+            np.concatenate(arrays) for arrays in zip(*candidates)
+        )
+
+        # Only sort the trades that will be returned
+        best = (
+            np.argpartition(-points, limit)[:limit]
+            if len(points) > limit
+            else np.arange(len(points))
+        )
+        best = best[np.argsort(-points[best], kind="stable")]
+
+        return pd.DataFrame(
+            {
+                "Squad": self.squads[gives[best, 0]],
+                "Gives": [
+                    ", ".join(self.players["Player"].iloc[row[row >= 0]])
+                    for row in gives[best]
+                ],
+                "Partner": self.squads[receives[best]],
+                "Receives": self.players["Player"].to_numpy()[receives[best]],
+                "Points Change": points[best],
+                "Partner Value Change": partner_value[best],
+                "Price Change": self.price[receives[best]]
+                - np.where(gives[best] >= 0, self.price[gives[best]], 0).sum(axis=1),
+            }
+        )
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+# Longest contract projected, in seasons
+MAX_CONTRACT_YEARS = 5
+
+# Season totals below this are too noisy to measure a change from
+MIN_SEASON_POINTS = 20.0
+
+
+def flat_aging_curves(positions, max_years: int = MAX_CONTRACT_YEARS) -> pd.DataFrame:
+    """Aging curves that keep every player's points unchanged, used when
+    there is no history to fit from"""
+    return pd.DataFrame(
+        1.0,
+        index=pd.Index(sorted(set(positions)), name="Position"),
+        columns=range(max_years),
+    )
+
+
+def fit_aging_curves(
+    history: pd.DataFrame,
+    max_years: int = MAX_CONTRACT_YEARS,
+    min_points: float = MIN_SEASON_POINTS,
+) -> pd.DataFrame:
+    """Fit how a player's points change over the following seasons
+    Args:
+        history (pd.DataFrame): Long format weekly points over several
+            seasons, as returned by NFLDataScrapper.fetch_many
+        max_years (int): Number of seasons to project
+        min_points (float): Smallest season total a change is measured from
+    Returns:
+        pd.DataFrame: Position by years ahead table of the median ratio of a
+            player's season total to their total that many seasons before
+    """
+    totals = history.groupby(["Position", "Player", "Season"], observed=True)[
+        "Points"
+    ].sum()
+    # Player by season table with a column per season
+    wide = totals.unstack("Season").sort_index(axis=1)
+    seasons = wide.columns.to_numpy()
+    positions = wide.index.get_level_values("Position")
+
+    curves = flat_aging_curves(positions, max_years)
+    for years in range(1, max_years):
+        ratios = []
+        for start in range(len(seasons)):
+            later = np.flatnonzero(seasons == seasons[start] + years)
+            if not len(later):
+                continue
+            before = wide.iloc[:, start]
+            after = wide.iloc[:, later[0]]
+            # Only players who played in both seasons say how players age
+            ratio = (after / before).where((before >= min_points) & after.notna())
+            ratios.append(ratio)
+
+        if ratios:
+            curve = pd.concat(ratios).groupby(level="Position", observed=True).median()
+            curves[years] = curve.reindex(curves.index).fillna(curves[years - 1])
+        else:
+            curves[years] = curves[years - 1]
+
+    return curves
+
+
+def contract_values(
+    data: pd.DataFrame,
+    price_model: pd.DataFrame,
+    curves: pd.DataFrame,
+    discount_rate: float = 0.1,
+) -> pd.DataFrame:
+    """Value every player over the rest of their contract
+    Args:
+        data (pd.DataFrame): Combined data for NFL players
+        price_model (pd.DataFrame): Slope and Intercept of price against
+            points for each position, from NFLDataScrapper.fit_price_model
+        curves (pd.DataFrame): Position by years ahead aging curves
+        discount_rate (float): Rate later seasons are discounted at
+    Returns:
+        pd.DataFrame: Projected points, fair value, contract cost and
+            surplus value of each player, most valuable first
+    """
+    positions = data["Position"].astype(str)
+    years = np.clip(
+        data["Years Remaining"].fillna(1.0).to_numpy(dtype="float64"),
+        1,
+        curves.shape[1],
+    )
+    in_contract = np.arange(curves.shape[1])[None, :] < np.ceil(years)[:, None]
+    discount = (1 + discount_rate) ** -np.arange(curves.shape[1])
+
+    # Player by season projected totals, in the units the price model uses
+    multipliers = curves.reindex(positions).fillna(1.0).to_numpy()
+    points = data["TTL"].to_numpy(dtype="float64")[:, None] * multipliers
+
+    slope = positions.map(price_model["Slope"]).to_numpy(dtype="float64")
+    intercept = positions.map(price_model["Intercept"]).to_numpy(dtype="float64")
+    fair = intercept[:, None] + slope[:, None] * points
+    price = data["Price"].to_numpy(dtype="float64")[:, None]
+
+    surplus = np.where(in_contract, (fair - price) * discount, 0).sum(axis=1)
+
+    values = pd.DataFrame(
+        {
+            "Player": data["Player"].to_numpy(),
+            "Position": positions.to_numpy(),
+            "Squad": data["Squad"].astype(str).to_numpy(),
+            "Years Remaining": years,
+            "Price": price[:, 0],
+            "Projected Points": np.where(in_contract, points, 0).sum(axis=1),
+            "Fair Value": np.where(in_contract, fair * discount, 0).sum(axis=1),
+            "Contract Cost": np.where(in_contract, price * discount, 0).sum(axis=1),
+            "Surplus Value": surplus,
+        }
+    )
+
+    return values.sort_values(
+        "Surplus Value", ascending=False, ignore_index=True, na_position="last"
+    )
+
+
+class ContractValuation:
+    def __init__(
+        self, discount_rate: float = 0.1, max_years: int = MAX_CONTRACT_YEARS
+    ) -> None:
+        self.discount_rate = discount_rate
+        self.max_years = max_years
+        self.curves = None
+
+    @property
+    def fitted(self) -> bool:
+        """Whether the aging curves have been fitted, rather than held flat"""
+        return self.curves is not None
+
+    def fit(self, history: pd.DataFrame) -> pd.DataFrame:
+        """Fit the aging curves, which only needs doing once as the history
+        doesn't change"""
+        self.curves = fit_aging_curves(history, self.max_years)
+
+        return self.curves
+
+    def value(self, data: pd.DataFrame, price_model: pd.DataFrame) -> pd.DataFrame:
+        """Surplus value table, with flat aging curves until they're fitted"""
+        curves = (
+            self.curves
+            if self.curves is not None
+            else flat_aging_curves(data["Position"].astype(str), self.max_years)
+        )
+
+        return contract_values(data, price_model, curves, self.discount_rate)
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from src.cache import ScrapeCache
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    cache = ScrapeCache(cache_dir=str(tmp_path))
+
+    yield cache
+
+
+@pytest.fixture()
+def sample_data():
+    df = pd.DataFrame({"Player": ["Josh Allen", "Travis Kelce"], "TTL": [400.5, 300.0]})
+    yield df
+
+
+class TestCache(object):
+    def test_key(object, cache):
+        """Test that keys depend on the season and the weeks requested"""
+        key = cache.key("https://example.com", 2022, 1, 18)
+
+        assert key == cache.key("https://example.com", 2022, 1, 18)
+        assert key != cache.key("https://example.com", 2021, 1, 18)
+        assert key != cache.key("https://example.com", 2022, 1, 17)
+
+    def test_save_and_load(object, cache, sample_data):
+        """Test that cached data round trips through disk"""
+        cache.save("key", sample_data, etag='"abc"')
+
+        pd.testing.assert_frame_equal(cache.load("key"), sample_data)
+        assert cache.metadata("key")["etag"] == '"abc"'
+        assert cache.is_fresh("key")
+
+    def test_missing_entry(object, cache):
+        """Test that a missing entry is neither loaded nor fresh"""
+        assert cache.load("missing") is None
+        assert not cache.is_fresh("missing")
+
+    def test_ttl_expiry(object, tmp_path, sample_data):
+        """Test that entries older than the ttl are stale until touched"""
+        cache = ScrapeCache(cache_dir=str(tmp_path), ttl=0)
+        cache.save("key", sample_data)
+
+        assert not cache.is_fresh("key")
+
+        cache.ttl = 60
+        cache.touch("key")
+
+        assert cache.is_fresh("key")
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.distributions import PlayerDistributions, team_correlation, weekly_tables
+
+
+@pytest.fixture()
+def weekly():
+    rng = np.random.default_rng(0)
+    scores = rng.gamma(4.0, 3.0, (3, 12))
+    # Player 1 had two BYE weeks, player 2 always scores 6, week 12 is unplayed
+    scores[1, [2, 7]] = 0
+    scores[2] = 6.0
+    scores[:, 11] = 0
+    df = pd.DataFrame(scores, index=pd.Index([10, 11, 12], name="PlayerID"))
+    df.columns = range(1, 13)
+    yield df
+
+
+class TestDistributions(object):
+    def test_parameters(object, weekly):
+        """Test that unplayed weeks are dropped and BYE weeks counted"""
+        distributions = PlayerDistributions(weekly)
+
+        assert distributions.scores.shape == (3, 11)
+        assert distributions.scores.flags["C_CONTIGUOUS"]
+        assert distributions.p_zero == pytest.approx([0, 2 / 11, 0])
+        assert np.isnan(distributions.shape[2])
+
+    def test_weekly_tables(object):
+        """Test that every week column is kept, whatever the other columns"""
+        data = pd.DataFrame(
+            {
+                "Player": ["A", "B"],
+                "Position": ["QB", "WR"],
+                "Team": ["KC", "BUF"],
+                **{str(week): [float(week), 1.0] for week in range(1, 19)},
+                "TTL": [171.0, 18.0],
+                "PlayerID": [0, 1],
+            }
+        )
+
+        players_long, player_params, weekly = weekly_tables(data)
+
+        assert weekly.shape == (2, 18)
+        assert weekly.loc[0, 18] == 18.0
+        assert len(players_long) == 36
+        assert player_params.loc[1, "mean"] == 1.0
+
+    @pytest.mark.parametrize(
+        "model", ["exponential", "gamma", "zero-inflated", "bootstrap", "form"]
+    )
+    def test_sample_mean(object, weekly, model):
+        """Test that every model matches the players' mean scores"""
+        distributions = PlayerDistributions(weekly)
+        rng = np.random.default_rng(1)
+
+        draws = distributions.sample(model, np.array([0, 1, 2]), 200000, rng)
+
+        assert draws.shape == (200000, 3)
+        assert draws.mean(axis=0) == pytest.approx(distributions.mean, rel=0.02)
+
+    def test_zero_inflated_bye_weeks(object, weekly):
+        """Test that zero weeks are drawn at the observed BYE rate"""
+        distributions = PlayerDistributions(weekly)
+        rng = np.random.default_rng(2)
+
+        draws = distributions.sample("zero-inflated", np.array([1, 2]), 100000, rng)
+
+        assert (draws[:, 0] == 0).mean() == pytest.approx(2 / 11, abs=0.01)
+        assert (draws[:, 1] == 6.0).all()
+
+    def test_form_model(object, weekly):
+        """Test that the form model is centred on each player's form in the
+        games they play, keeping their chance of a zero week"""
+        form = pd.Series([20.0, 5.0], index=[11, 10])
+        distributions = PlayerDistributions(weekly, form=form)
+        rng = np.random.default_rng(3)
+        rows = np.array([0, 1, 2])
+
+        draws = distributions.sample("form", rows, 200000, rng)
+        quantiles = distributions.quantile("form", rows, np.full((1, 3), 0.1))
+
+        assert draws.mean(axis=0) == pytest.approx([5.0, 20.0 * 9 / 11, 0.0], rel=0.02)
+        assert (draws[:, 1] == 0).mean() == pytest.approx(2 / 11, rel=0.05)
+        assert quantiles[0, 1] == 0
+
+    def test_unknown_player(object, weekly):
+        """Test that an unknown player or model raises"""
+        distributions = PlayerDistributions(weekly)
+
+        with pytest.raises(KeyError):
+            distributions.rows([10, 99])
+        with pytest.raises(ValueError):
+            distributions.sample("normal", np.array([0]), 10, np.random.default_rng())
+
+    def test_team_correlation(object):
+        """Test that only teammates are correlated and the matrix factorises"""
+        rng = np.random.default_rng(3)
+        shared = rng.normal(10, 4, 10)
+        scores = np.stack([shared, shared + rng.normal(0, 1, 10), shared])
+        teams = np.array(["KC", "KC", "BUF"])
+
+        codes, blocks = team_correlation(scores, teams, shrinkage=0.5)
+
+        assert list(codes) == [0, 0, 1]
+        assert [block.shape for block in blocks] == [(2, 2), (1, 1)]
+        assert 0.3 < blocks[0][0, 1] <= 0.5
+        np.linalg.cholesky(blocks[0])
+
+    def test_correlation_blocks(object, weekly):
+        """Test that the correlation between any players is assembled from
+        the team blocks, with zeros between teams"""
+        weekly.iloc[1] = weekly.iloc[0] * 0.5 + 1
+        teams = pd.Series(["KC", "BUF", "KC"], index=weekly.index)
+        distributions = PlayerDistributions(weekly, teams=teams)
+        rows = np.array([2, 1, 0])
+
+        correlation = distributions.correlation(rows)
+        factor = distributions.correlation_factor(rows)
+
+        assert distributions.correlation_blocks.size == 5
+        assert np.allclose(np.diag(correlation), 1.0)
+        assert correlation[0, 1] == 0 and correlation[1, 2] == 0
+        assert np.allclose(factor @ factor.T, correlation)
+
+    def test_sample_correlated(object, weekly):
+        """Test that joint draws keep the marginals but add correlation"""
+        weekly.iloc[1] = weekly.iloc[0] * 0.5 + 1
+        teams = pd.Series(["KC", "KC", "BUF"], index=weekly.index)
+        distributions = PlayerDistributions(weekly, teams=teams, shrinkage=0.0)
+        rng = np.random.default_rng(4)
+
+        draws = distributions.sample_correlated("gamma", np.array([0, 1]), 100000, rng)
+
+        assert draws.mean(axis=0) == pytest.approx(distributions.mean[:2], rel=0.02)
+        assert np.corrcoef(draws.T)[0, 1] > 0.9
+
+    def test_unattached_players(object, weekly):
+        """Test that free agents and players without a team aren't
+        correlated with each other"""
+        weekly.iloc[1] = weekly.iloc[0] * 0.5 + 1
+        teams = pd.Series(["FA", "FA"], index=weekly.index[:2])
+        distributions = PlayerDistributions(weekly, teams=teams)
+
+        assert len(set(distributions.team_codes)) == 3
+        assert np.allclose(distributions.correlation(np.array([0, 1, 2])), np.eye(3))
+
+    def test_factor_cache_size(object, weekly):
+        """Test that only the most recently used correlation factors are kept"""
+        distributions = PlayerDistributions(weekly, factor_cache_size=2)
+
+        for rows in ([0], [1], [0], [2]):
+            distributions.correlation_factor(np.array(rows))
+
+        assert list(distributions._factors) == [(0,), (2,)]
+
+    def test_version(object, weekly):
+        """Test that the version changes with the teams and form as well as
+        the weekly scores"""
+        teams = pd.Series(["KC", "KC", "BUF"], index=weekly.index)
+        form = pd.Series([5.0, 6.0, 7.0], index=weekly.index)
+        version = PlayerDistributions(weekly, teams=teams, form=form).version
+
+        assert PlayerDistributions(weekly, teams=teams, form=form).version == version
+        assert PlayerDistributions(weekly, form=form).version != version
+        assert PlayerDistributions(weekly, teams=teams).version != version
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import PlayerForm, bye_weeks, played_weeks
+
+
+@pytest.fixture()
+def weekly():
+    # KC's bye is week 2, player 1 missed week 1 and week 5 is unplayed
+    yield pd.DataFrame(
+        {
+            1: [10.0, 0.0, 5.0, 3.0],
+            2: [0.0, 0.0, 7.0, 4.0],
+            3: [20.0, 6.0, 0.0, 5.0],
+            4: [30.0, 8.0, 9.0, 0.0],
+            5: [0.0, 0.0, 0.0, 0.0],
+        },
+        index=pd.Index([0, 1, 2, 3], name="PlayerID"),
+    )
+
+
+@pytest.fixture()
+def teams():
+    yield pd.Series(["KC", "KC", "BUF", "BUF"], index=[0, 1, 2, 3])
+
+
+class TestFeatures(object):
+    def test_bye_weeks(object, weekly, teams):
+        """Test that only weeks a whole team scored nothing are byes"""
+        bye = bye_weeks(weekly.to_numpy(), teams.to_numpy())
+
+        assert bye[:, 1].tolist() == [True, True, False, False]
+        assert bye.sum() == 2
+
+    def test_played_weeks(object, weekly):
+        """Test that only weeks somebody scored in are kept"""
+        scores, weeks = played_weeks(weekly)
+
+        assert scores.shape == (4, 4)
+        assert scores.flags["C_CONTIGUOUS"]
+        assert weeks.tolist() == [1, 2, 3, 4]
+
+    def test_games_played(object, weekly, teams):
+        """Test that byes aren't counted as missed games"""
+        form = PlayerForm(weekly, teams)
+
+        assert form.scores.shape == (4, 4)
+        assert form.games_available.tolist() == [3, 3, 4, 4]
+        assert form.games_played.tolist() == [3, 2, 3, 3]
+
+    def test_matches_pandas(object, weekly, teams):
+        """Test that the vectorised features match pandas over each player's
+        games"""
+        form = PlayerForm(weekly, teams, window=2, halflife=1.5)
+        summary = form.summary()
+
+        for row, player in enumerate(weekly.index):
+            games = pd.Series(form.scores[row][form.played[row]])
+            played = np.flatnonzero(form.played[row])
+
+            assert form.rolling_mean[row, played] == pytest.approx(
+                games.rolling(2, min_periods=1).mean()
+            )
+            assert form.ewma[row, played] == pytest.approx(
+                games.ewm(halflife=1.5).mean()
+            )
+            assert summary.loc[player, "Floor"] == pytest.approx(games.quantile(0.1))
+            assert summary.loc[player, "Ceiling"] == pytest.approx(games.quantile(0.9))
+            assert summary.loc[player, "Std"] == pytest.approx(games.std(ddof=0))
+            assert summary.loc[player, "Last Change"] == pytest.approx(
+                games.diff().iloc[-1]
+            )
+
+    def test_form_carried_through_byes(object, weekly, teams):
+        """Test that form carries through weeks a player didn't play"""
+        form = PlayerForm(weekly, teams)
+
+        assert np.isnan(form.rolling_mean[1, 0])
+        assert form.ewma[0, 1] == form.ewma[0, 0]
+        assert np.isnan(form.change[0, 1])
+        assert form.latest("ewma").index.tolist() == [0, 1, 2, 3]
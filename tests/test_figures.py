@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import PlayerForm
+from src.figures import (
+    FigureCache,
+    bin_distributions,
+    build_distribution_figure,
+    build_form_figure,
+    build_scatter,
+    dataset_version,
+    fit_line,
+)
+
+
+@pytest.fixture()
+def sample_data():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "Player": [f"Player {i}" for i in range(40)],
+            "Position": ["QB", "RB", "WR", "TE"] * 10,
+            "Free Agent": [False, False, False, False, True] * 8,
+            "Years Remaining": rng.integers(1, 4, 40).astype(float),
+            "Squad": ["Team1"] * 40,
+            "Price": rng.uniform(1, 60, 40),
+            "Avg": rng.uniform(0, 25, 40),
+            "Trade Value": rng.uniform(1, 70, 40),
+        }
+    )
+    yield df
+
+
+class TestFigures(object):
+    def test_fit_line(object):
+        """Test that the fit matches numpy's least squares polynomial fit"""
+        x = np.array([1.0, 2.0, 4.0, np.nan, 7.0])
+        y = np.array([2.0, 3.5, 9.0, 1.0, 13.0])
+
+        slope, intercept = fit_line(x, y)
+        expected = np.polyfit(x[[0, 1, 2, 4]], y[[0, 1, 2, 4]], 1)
+
+        assert (slope, intercept) == pytest.approx(tuple(expected))
+        assert fit_line([3.0, 3.0], [1.0, 2.0]) is None
+
+    def test_build_scatter(object, sample_data):
+        """Test that every group of markers gets a trendline"""
+        fig = build_scatter(sample_data, "Price", "Avg")
+
+        markers = [trace for trace in fig.data if trace.mode == "markers"]
+        lines = [trace for trace in fig.data if trace.mode == "lines"]
+
+        assert len(markers) == 8
+        assert len(lines) == 8
+        assert {line.xaxis for line in lines} == {"x", "x2"}
+
+    def test_figure_cache(object, sample_data):
+        """Test that only figures whose inputs changed are rebuilt"""
+        cache = FigureCache()
+        first = cache.build(sample_data)
+
+        sample_data["Trade Value"] += 1
+        second = cache.build(sample_data)
+
+        assert second["fig1"] is first["fig1"]
+        assert second["fig2"] is not first["fig2"]
+        assert second["fig3"] is not first["fig3"]
+
+    def test_dataset_version(object, sample_data):
+        """Test that the version changes with the data"""
+        version = dataset_version(sample_data)
+
+        assert version == dataset_version(sample_data.copy())
+        sample_data.loc[0, "Avg"] += 1
+        assert version != dataset_version(sample_data)
+
+    def test_bin_distributions(object):
+        """Test that every distribution is binned on the same edges"""
+        rng = np.random.default_rng(0)
+        totals = np.stack([rng.normal(100, 10, 5000), rng.normal(120, 10, 5000)])
+
+        edges, counts = bin_distributions(totals, bins=30)
+
+        assert len(edges) == 31
+        assert edges[0] == totals.min() and edges[-1] == totals.max()
+        assert (counts.sum(axis=1) == 5000).all()
+
+    def test_distribution_figure_size(object):
+        """Test that the figure doesn't grow with the number of samples"""
+        rng = np.random.default_rng(0)
+        sizes = [
+            len(
+                build_distribution_figure(
+                    rng.exponential(100, (2, n_sims)), ["A", "B"], ["red", "blue"]
+                ).to_json()
+            )
+            for n_sims in [1000, 100000]
+        ]
+
+        assert abs(sizes[0] - sizes[1]) < 0.05 * sizes[0]
+
+    def test_form_figure(object):
+        """Test that each player gets a points and a form trace with gaps for
+        missed weeks"""
+        weekly = pd.DataFrame({1: [10.0, 4.0], 2: [0.0, 6.0], 3: [12.0, 8.0]})
+        form = PlayerForm(weekly)
+
+        fig = build_form_figure(form, [1, 0], ["B", "A"])
+
+        assert [trace.name for trace in fig.data] == [
+            "B points",
+            "B form",
+            "A points",
+            "A form",
+        ]
+        assert np.isnan(fig.data[2].y[1])
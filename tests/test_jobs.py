@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from src.jobs import SharedJobManager
+from src.metrics import MetricsRegistry
+
+# Registry the jobs record to, forked into every job process
+JOB_METRICS = MetricsRegistry(enabled=True)
+
+
+def slow_job(_result_key, _progress_key, _args, _context):
+    time.sleep(30)
+
+
+def quick_job(_result_key, _progress_key, _args, _context):
+    JOB_METRICS.observe("job", 0.5)
+
+
+@pytest.fixture()
+def manager(tmp_path):
+    manager = SharedJobManager(str(tmp_path))
+
+    yield manager
+
+    manager.handle.close()
+
+
+class TestJobs(object):
+    def test_identical_jobs_are_shared(object, manager):
+        """Test that a job with the same inputs joins the running one"""
+        first = manager.call_job_fn("key", slow_job, [], {})
+        second = manager.call_job_fn("key", slow_job, [], {})
+        other = manager.call_job_fn("other", slow_job, [], {})
+
+        assert first == second
+        assert first != other
+
+        manager.terminate_job(other)
+        manager.terminate_job(first)
+
+    def test_job_killed_by_last_subscriber(object, manager):
+        """Test that cancelling a shared job only stops it for the last
+        client waiting on it"""
+        job = manager.call_job_fn("key", slow_job, [], {})
+        manager.call_job_fn("key", slow_job, [], {})
+
+        manager.terminate_job(str(job))
+        assert manager.job_running(job)
+
+        manager.terminate_job(str(job))
+        assert not manager.job_running(job)
+
+    def test_job_metrics_collected(object, tmp_path):
+        """Test that what a job records in its own process is merged back
+        once"""
+        manager = SharedJobManager(str(tmp_path), metrics=JOB_METRICS)
+        JOB_METRICS.observe("request", 0.1)
+
+        job = manager.call_job_fn("key", quick_job, [], {})
+        deadline = time.time() + 30
+        while manager.job_running(job) and time.time() < deadline:
+            time.sleep(0.05)
+
+        assert manager.collect_metrics() == 1
+        assert manager.collect_metrics() == 0
+        assert JOB_METRICS.stages["job"]["seconds"] == 0.5
+        # The parent's own stages aren't counted twice
+        assert JOB_METRICS.stages["request"]["calls"] == 1
+
+        manager.handle.close()
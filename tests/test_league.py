@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.distributions import PlayerDistributions
+from src.league import LeagueSimulator, round_robin_schedule
+from src.lineups import optimal_lineups
+
+
+@pytest.fixture()
+def league_data():
+    positions = ["QB", "RB", "RB", "WR", "WR", "WR", "TE", "RB", "K", "DST", "QB"]
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "PlayerID": np.arange(33),
+            "Position": positions * 3,
+            "Squad": ["Strong"] * 11 + ["Weak"] * 11 + ["Free Agent"] * 11,
+        }
+    )
+    # The strong squad's players score twice as much as the weak squad's
+    scale = np.repeat([20.0, 10.0, 15.0], 11)[:, None]
+    weekly = pd.DataFrame(
+        rng.gamma(4.0, 0.25, (33, 8)) * scale,
+        index=pd.Index(df["PlayerID"], name="PlayerID"),
+    )
+    yield df, PlayerDistributions(weekly)
+
+
+class TestLeague(object):
+    def test_round_robin_schedule(object):
+        """Test that every squad meets every other squad once"""
+        schedule = round_robin_schedule(6, 5)
+
+        for squad in range(6):
+            assert sorted(schedule[:, squad]) == [i for i in range(6) if i != squad]
+        assert (schedule[np.arange(5), schedule[:, 0]] == 0).all()
+
+    def test_simulate(object, league_data):
+        """Test that the stronger squad is favoured and results are cached"""
+        data, distributions = league_data
+        simulator = LeagueSimulator(n_sims=2000, seed=0, chunk_size=500)
+        lineups = optimal_lineups(data, distributions)
+
+        results = simulator.simulate(distributions, lineups, n_weeks=4, playoff_teams=1)
+        standings = results["standings"].set_index("Squad")
+
+        assert set(lineups) == {"Strong", "Weak"}
+        assert results["win_probability"].loc["Strong", "Weak"] > 0.9
+        assert standings.loc["Strong", "Playoff Odds"] > 0.9
+        assert standings["Playoff Odds"].sum() == pytest.approx(1.0)
+        assert simulator.simulate(distributions, lineups, 4, 1) is results
+
+    def test_playoff_teams_capped(object, league_data):
+        """Test that asking for more playoff spots than squads still leaves
+        a squad out"""
+        data, distributions = league_data
+        simulator = LeagueSimulator(n_sims=500, seed=0)
+        lineups = optimal_lineups(data, distributions)
+
+        standings = simulator.simulate(
+            distributions, lineups, n_weeks=4, playoff_teams=6
+        )["standings"]
+
+        assert standings["Playoff Odds"].sum() == pytest.approx(1.0)
+        assert standings["Playoff Odds"].min() < 0.1
+
+    def test_simulate_parallel(object, league_data):
+        """Test that a process pool gives the same results as running serially"""
+        data, distributions = league_data
+        lineups = optimal_lineups(data, distributions)
+
+        serial = LeagueSimulator(n_sims=1000, seed=1, chunk_size=500)
+        parallel = LeagueSimulator(
+            n_sims=1000, seed=1, chunk_size=500, max_workers=2, parallel_threshold=1
+        )
+
+        pd.testing.assert_frame_equal(
+            serial.simulate(distributions, lineups, n_weeks=3)["standings"],
+            parallel.simulate(distributions, lineups, n_weeks=3)["standings"],
+        )
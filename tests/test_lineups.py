@@ -0,0 +1,69 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.distributions import PlayerDistributions
+from src.lineups import optimal_lineup, optimal_lineups, slot_eligibility
+from src.rosters import LINEUP_SLOTS
+
+
+@pytest.fixture()
+def squad():
+    df = pd.DataFrame(
+        {
+            "PlayerID": range(12),
+            "Position": ["QB", "QB", "RB", "RB", "RB", "WR", "WR", "WR"]
+            + ["WR", "TE", "TE", "DST"],
+        }
+    )
+    yield df
+
+
+class TestLineups(object):
+    def test_optimal_lineup(object, squad):
+        """Test that each slot takes the best player and the flex the best
+        remaining RB, WR or TE"""
+        scores = np.array([10, 20, 5, 9, 7, 8, 6, 4, 3, 2, 6.5, 1], dtype=float)
+
+        lineup = optimal_lineup(squad, scores)
+
+        assert len(lineup) == len(LINEUP_SLOTS)
+        assert lineup[0] == 1
+        assert sorted(lineup[1:3]) == [3, 4]
+        assert lineup[6] == 10
+        assert lineup[7] == 2
+        # The squad has no kicker
+        assert lineup[8] is None and lineup[9] == 11
+
+    def test_optimal_lineup_brute_force(object, squad):
+        """Test that the assignment matches the best legal lineup found by
+        brute force"""
+        scores = np.random.default_rng(0).uniform(0, 20, len(squad))
+        eligible = slot_eligibility(squad["Position"])
+
+        best = max(
+            scores[list(picks)].sum()
+            for picks in itertools.product(
+                *[np.flatnonzero(eligible[:, slot]) for slot in range(8)]
+            )
+            if len(set(picks)) == len(picks)
+        )
+        lineup = optimal_lineup(squad, scores)
+
+        assert scores[[p for p in lineup[:8]]].sum() == pytest.approx(best)
+
+    def test_optimal_lineups_objective(object):
+        """Test that a floor objective prefers the consistent player"""
+        data = pd.DataFrame(
+            {"PlayerID": [0, 1], "Position": ["QB", "QB"], "Squad": ["A", "A"]}
+        )
+        weekly = pd.DataFrame(
+            [[0.0, 0.0, 0.0, 40.0], [9.0, 9.0, 9.0, 9.0]],
+            index=pd.Index([0, 1], name="PlayerID"),
+        )
+        distributions = PlayerDistributions(weekly)
+
+        assert optimal_lineups(data, distributions, "mean")["A"][0] == 0
+        assert optimal_lineups(data, distributions, "floor", "bootstrap")["A"][0] == 1
@@ -0,0 +1,87 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.metrics import MetricsRegistry, RequestProfiler
+
+
+@pytest.fixture()
+def registry():
+    yield MetricsRegistry(enabled=True)
+
+
+class TestMetrics(object):
+    def test_disabled_records_nothing(object):
+        """Test that a disabled registry only passes calls through"""
+        registry = MetricsRegistry()
+
+        @registry.instrument("stage")
+        def stage():
+            return pd.DataFrame({"a": [1, 2]})
+
+        assert len(stage()) == 2
+        registry.increment("scrape_cache", result="hit")
+        assert not registry.stages
+        assert not registry.events
+
+    def test_instrument_records_calls(object, registry):
+        """Test that calls, rows and errors are recorded per stage"""
+
+        @registry.instrument("stage")
+        def stage(fail):
+            if fail:
+                raise ValueError("failed")
+            return pd.DataFrame({"a": [1, 2, 3]}), None
+
+        stage(False)
+        with pytest.raises(ValueError):
+            stage(True)
+
+        stats = registry.stages["stage"]
+        assert stats["calls"] == 2
+        assert stats["errors"] == 1
+        assert stats["rows"] == 3
+        assert stats["seconds"] > 0
+
+    def test_merge(object, registry):
+        """Test that another registry's stages and events are added in"""
+        other = MetricsRegistry(enabled=True)
+        other.observe("stage", 1.5)
+        other.increment("scrape_cache", result="hit")
+        registry.observe("stage", 0.5)
+
+        registry.merge(other.state())
+        other.reset()
+
+        assert registry.stages["stage"]["calls"] == 2
+        assert registry.stages["stage"]["seconds"] == 2.0
+        assert registry.events[("scrape_cache", (("result", "hit"),))] == 1
+        assert not other.stages and not other.events
+
+    def test_export(object, registry):
+        """Test that stages, events and collectors are exported as Prometheus
+        text"""
+        registry.instrument("parse")(lambda: None)()
+        registry.increment("scrape_cache", result="hit")
+        registry.increment("scrape_cache", result="hit")
+        registry.register_collector("cache", lambda: {"hits": 4, "name": "lru"})
+
+        lines = registry.export().splitlines()
+
+        assert 'nfl_stage_calls_total{stage="parse"} 1' in lines
+        assert 'nfl_scrape_cache_total{result="hit"} 2' in lines
+        assert "nfl_cache_hits 4" in lines
+        assert not any(line.startswith("nfl_cache_name") for line in lines)
+
+    def test_profiler(object, tmp_path):
+        """Test that only one request is profiled at a time"""
+        profiler = RequestProfiler(str(tmp_path))
+
+        assert profiler.start()
+        assert not profiler.start()
+        path = profiler.stop("/_dash-update-component")
+
+        assert os.path.exists(path)
+        assert profiler.start()
+        profiler.stop("/")
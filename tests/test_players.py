@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from src.players import AMBIGUOUS_PLAYER, UNKNOWN_PLAYER, PlayerIndex, normalise_name
+
+
+@pytest.fixture()
+def player_index():
+    player_index = PlayerIndex(aliases={"Gabriel Davis": "Gabe Davis"})
+    player_index.add(
+        ["Patrick Mahomes II", "DJ Chark Jr.", "Gabe Davis"],
+        ["QB", "WR", "WR"],
+        ["KC", "JAC", "BUF"],
+    )
+
+    yield player_index
+
+
+class TestPlayers(object):
+    @pytest.mark.parametrize(
+        "name, expected",
+        [
+            ("Patrick Mahomes II", "patrick mahomes"),
+            ("D.J. Chark Jr.", "dj chark"),
+            ("Ty’Son Williams", "tyson williams"),
+            ("Amon-Ra St. Brown", "amon ra st brown"),
+            ("  Velus Jones Jr ", "velus jones"),
+        ],
+    )
+    def test_normalise_name(object, name, expected):
+        """Test that name variants share a canonical key"""
+        assert normalise_name(name) == expected
+
+    def test_add(object, player_index):
+        """Test that ids are stable and shared by name variants"""
+        ids = player_index.add(["Patrick Mahomes", "Travis Kelce"], ["QB", "TE"])
+
+        assert list(ids) == [0, 3]
+        assert player_index.name(0) == "Patrick Mahomes II"
+
+    def test_lookup(object, player_index):
+        """Test that variants and aliases resolve and unknown names miss"""
+        ids = player_index.lookup(
+            ["D.J. Chark", "Gabriel Davis", "Tom Brady"], ["WR", "WR", "QB"]
+        )
+
+        assert ids.dtype == np.int32
+        assert list(ids) == [1, 2, UNKNOWN_PLAYER]
+        assert player_index.lookup(["Gabe Davis"], ["TE"])[0] == UNKNOWN_PLAYER
+
+    def test_shared_names(object, player_index):
+        """Test that players sharing a name get their own ids and are only
+        matched when the team tells them apart"""
+        ids = player_index.add(
+            ["New England Patriots", "New England Patriots", "Josh Allen"],
+            ["DST", "DST", "QB"],
+            ["DET", "LV", "BUF"],
+        )
+        player_index.add(["Josh Allen"], ["LB"], ["JAX"])
+
+        assert list(ids) == [3, 4, 5]
+        assert (
+            list(player_index.lookup(["New England Patriots"] * 2, ["DST"] * 2))
+            == [AMBIGUOUS_PLAYER] * 2
+        )
+        assert list(
+            player_index.lookup(["New England Patriots"] * 2, teams=["LV", "NE"])
+        ) == [4, AMBIGUOUS_PLAYER]
+        assert player_index.lookup(["Josh Allen"], ["QB"])[0] == 5
+        assert player_index.lookup(["Josh Allen"], teams=["BUF"])[0] == 5
+
+    def test_shared_names_reordered(object, player_index):
+        """Test that players sharing a name keep their ids by team when they
+        swap places between refreshes"""
+        ids = player_index.add(
+            ["New England Patriots", "New England Patriots"],
+            ["DST", "DST"],
+            ["LV", "DET"],
+        )
+        reordered = player_index.add(
+            ["New England Patriots", "New England Patriots"],
+            ["DST", "DST"],
+            ["DET", "LV"],
+        )
+
+        assert list(ids) == [4, 3]
+        assert list(reordered) == [3, 4]
+
+    def test_team_change(object, player_index):
+        """Test that a player changing team keeps their id"""
+        ids = player_index.add(["Gabe Davis"], ["WR"], ["JAC"])
+
+        assert ids[0] == 2
+        assert player_index.lookup(["Gabe Davis"], teams=["JAC"])[0] == 2
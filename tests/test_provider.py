@@ -0,0 +1,62 @@
+import pytest
+
+from src.provider import DataProvider
+
+
+@pytest.fixture()
+def builds():
+    # Each build returns the next snapshot, a None entry raises instead
+    yield [{"version": 1}, None, {"version": 3}]
+
+
+@pytest.fixture()
+def provider(builds):
+    def build():
+        data = builds.pop(0)
+        if data is None:
+            raise ValueError("scrape failed")
+        return data
+
+    provider = DataProvider(build)
+
+    yield provider
+
+
+class TestProvider(object):
+    def test_not_ready_before_build(object, provider):
+        """Test that no data is served before the first build"""
+        assert not provider.ready
+        assert provider.get() is None
+
+    def test_refresh_swaps_data(object, provider):
+        """Test that a failed refresh keeps serving the previous snapshot"""
+        provider.refresh()
+        assert provider.get() == {"version": 1}
+
+        provider.refresh()
+        assert provider.get() == {"version": 1}
+        assert isinstance(provider.error, ValueError)
+
+        provider.refresh()
+        assert provider.get() == {"version": 3}
+        assert provider.error is None
+        assert provider.version == 2
+
+    def test_refresh_without_new_data(object):
+        """Test that a build with nothing new keeps the current snapshot"""
+        builds = [{"version": 1}, None]
+        provider = DataProvider(lambda: builds.pop(0))
+
+        provider.refresh()
+        provider.refresh()
+
+        assert provider.get() == {"version": 1}
+        assert provider.version == 1
+        assert provider.error is None
+
+    def test_start_builds_in_background(object, provider):
+        """Test that the background worker builds the data"""
+        provider.start().join(timeout=5)
+
+        assert provider.wait(timeout=0)
+        assert provider.get() == {"version": 1}
@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+from src.rosters import build_roster_index, squad_options
+
+
+@pytest.fixture()
+def sample_data():
+    df = pd.DataFrame(
+        {
+            "Player": ["QB One", "RB One", "WR One", "TE One", "RB Two"],
+            "PlayerID": [0, 1, 2, 3, 4],
+            "Position": ["QB", "RB", "WR", "TE", "RB"],
+            "Squad": ["Team1", "Team1", "Team1", "Team2", "Free Agent"],
+        }
+    ).astype({"Position": "category", "Squad": "category"})
+    yield df
+
+
+class TestRosters(object):
+    def test_build_roster_index(object, sample_data):
+        """Test that options are grouped by squad and position"""
+        index = build_roster_index(sample_data)
+
+        assert index["Team1"]["QB"] == [{"label": "QB One", "value": 0}]
+        assert [option["value"] for option in index["Team1"]["FLEX"]] == [1, 2]
+        assert index["Team2"]["FLEX"] == [{"label": "TE One", "value": 3}]
+        assert "QB" not in index["Team2"]
+
+    def test_squad_options(object, sample_data):
+        """Test that free agents aren't offered as a squad"""
+        options = squad_options(build_roster_index(sample_data))
+
+        assert [option["value"] for option in options] == ["Team1", "Team2"]
@@ -1,8 +1,16 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pandas as pd
 import pytest
+import requests
 import numpy as np
 
-from src.scrapper import NFLDataScrapper
+from sklearn.linear_model import LinearRegression
+
+from src.cache import ScrapeCache
+from src.scrapper import LEADERS_URL, NFLDataScrapper, apply_schema, memory_report
 
 
 @pytest.fixture()
@@ -27,13 +35,95 @@ def sample_data():
     yield df
 
 
+@pytest.fixture()
+def leaders_html():
+    # Synthetic page in the leaders report's layout, shapes asserted against
+    # it follow from how it was generated rather than from the live site
+    with open("./data/test-leaders.html", "rb") as f:
+        yield f.read()
+
+
+@pytest.fixture()
+def weekly_pages(leaders_html):
+    # Full season as fetched before week 11, followed by a fetch of weeks
+    # 10 to 18 once the season has finished
+    full = NFLDataScrapper().parse_player_database(leaders_html)
+    first = full.copy()
+    first[[str(week) for week in range(11, 19)]] = 0.0
+    latest = full[
+        ["Rank", "Player", "Position", "Team"]
+        + [str(week) for week in range(10, 19)]
+        + ["Avg", "TTL"]
+    ]
+
+    yield [first, latest]
+
+
+@pytest.fixture()
+def stub_server(leaders_html):
+    # Local stand in for FantasyPros, the first request for each path fails
+    # with a 503 so retries are exercised
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            if requested.count(self.path) == 1:
+                self.send_response(503)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(leaders_html)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.requested = requested
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+class FakeResponse:
+    def __init__(self, content: bytes = b"", status_code: int = 200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(self.status_code)
+
+
 class TestScrapper(object):
-    def test_generate_nfl_dataset(object, scrapper):
+    def test_generate_nfl_dataset(object, stub_server, tmp_path):
         """Test the overall functionality of the module"""
+        # Scrape the synthetic leaders page from the local stand in
+        scrapper = NFLDataScrapper(
+            url=f"http://127.0.0.1:{stub_server.server_port}/ppr",
+            cache=ScrapeCache(cache_dir=str(tmp_path)),
+            requests_per_second=100,
+        )
+
         # Generate actual results
         actual = scrapper.generate_nfl_dataset()
+        cached = scrapper.generate_nfl_dataset()
+
+        assert (actual.shape[0] == 118) and (actual.shape[1] == 32)
+        pd.testing.assert_frame_equal(actual, cached)
+        assert stub_server.requested == ["/ppr/?year=2022&start=1&end=18"] * 2
+
+    def test_scrapper_outside_repo(object, tmp_path, monkeypatch):
+        """Test that the scrapper can be created from another directory"""
+        monkeypatch.chdir(tmp_path)
 
-        assert (actual.shape[0] == 723) and (actual.shape[1] == 31)
+        assert NFLDataScrapper()._player_index is None
 
     def test_clean_data(object, scrapper, sample_data):
         """Test that the missing values are filled"""
@@ -67,3 +157,281 @@ class TestScrapper(object):
         data_with_predictions = scrapper.add_price_data(sample_data)
 
         assert data_with_predictions["Price"].isna().sum() == 0
+
+    @pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+    def test_parse_player_database(object, leaders_html, parser):
+        """Test that the leaders table is parsed from the synthetic page"""
+        player_database = NFLDataScrapper(parser=parser).parse_player_database(
+            leaders_html
+        )
+
+        assert player_database.shape == (118, 24)
+        assert player_database["Player"].iloc[0] == "Kyle Trask"
+        assert list(player_database.columns[[2, 4, 22]]) == ["Position", "1", "Avg"]
+
+    def test_parsers_agree(object, leaders_html):
+        """Test that the parser backends produce identical tables"""
+        pd.testing.assert_frame_equal(
+            NFLDataScrapper(parser="lxml").parse_player_database(leaders_html),
+            NFLDataScrapper(parser="html.parser").parse_player_database(leaders_html),
+        )
+
+    def test_fetch_player_database_cached(object, tmp_path, leaders_html, monkeypatch):
+        """Test that a fresh cache entry is used without hitting the network"""
+        responses = [FakeResponse(leaders_html, headers={"ETag": '"v1"'})]
+        scrapper = NFLDataScrapper(cache=ScrapeCache(cache_dir=str(tmp_path)))
+        monkeypatch.setattr(scrapper.session, "get", lambda *a, **k: responses.pop())
+        first = scrapper.fetch_player_database()
+        second = scrapper.fetch_player_database()
+
+        pd.testing.assert_frame_equal(first, second)
+        assert not responses
+
+    def test_fetch_player_database_revalidates(
+        object, tmp_path, leaders_html, monkeypatch
+    ):
+        """Test that a stale entry is reused when the server returns 304"""
+        requests_made = []
+
+        def fake_get(url, headers=None, timeout=None):
+            requests_made.append(headers)
+            if headers.get("If-None-Match") == '"v1"':
+                return FakeResponse(status_code=304)
+            return FakeResponse(leaders_html, headers={"ETag": '"v1"'})
+
+        scrapper = NFLDataScrapper(cache=ScrapeCache(cache_dir=str(tmp_path), ttl=0))
+        monkeypatch.setattr(scrapper.session, "get", fake_get)
+        first = scrapper.fetch_player_database()
+        second = scrapper.fetch_player_database()
+
+        pd.testing.assert_frame_equal(first, second)
+        assert requests_made == [{}, {"If-None-Match": '"v1"'}]
+
+    def test_fetch_player_database_offline(object, tmp_path, monkeypatch):
+        """Test that offline mode never touches the network"""
+        scrapper = NFLDataScrapper(
+            cache=ScrapeCache(cache_dir=str(tmp_path), offline=True)
+        )
+        monkeypatch.setattr(scrapper.session, "get", pytest.fail)
+
+        with pytest.raises(FileNotFoundError):
+            scrapper.fetch_player_database()
+
+    def test_merge_weeks(object, scrapper):
+        """Test that only changed or new players are recomputed"""
+        stored = pd.DataFrame(
+            {
+                "Rank": [1.0, 2.0],
+                "Player": ["Player A", "Player B"],
+                "Position": ["QB", "RB"],
+                "Team": ["BUF", "KC"],
+                "1": [10.0, 5.0],
+                "2": [0.0, 5.0],
+                "Avg": [10.0, 5.0],
+                "TTL": [10.0, 10.0],
+            }
+        )
+        latest = pd.DataFrame(
+            {
+                "Rank": [1.0, 2.0, 3.0],
+                "Player": ["Player A", "Player B", "Player C"],
+                "Position": ["QB", "RB", "WR"],
+                "Team": ["BUF", "KC", "MIA"],
+                "2": [20.0, 5.0, 3.0],
+                "Avg": [20.0, 5.0, 3.0],
+                "TTL": [20.0, 5.0, 3.0],
+            }
+        )
+
+        merged, changed = scrapper.merge_weeks(stored, latest)
+
+        assert list(changed["Player"]) == ["Player A", "Player C"]
+        assert list(merged["Player"]) == ["Player A", "Player B", "Player C"]
+        assert list(merged["TTL"]) == [30.0, 10.0, 3.0]
+        assert list(merged["Avg"]) == [15.0, 5.0, 3.0]
+
+    def test_generate_nfl_dataset_incremental(object, scrapper, weekly_pages):
+        """Test that an incremental refresh matches a full rebuild"""
+        fetched = []
+
+        def fake_fetch(season=2022, start=1, end=18):
+            fetched.append(start)
+            return weekly_pages.pop(0)
+
+        scrapper.fetch_player_database = fake_fetch
+
+        first = scrapper.generate_nfl_dataset(incremental=True)
+        assert scrapper.latest_gameweek == 10
+
+        second = scrapper.generate_nfl_dataset(incremental=True)
+        assert scrapper.latest_gameweek == 18
+        assert fetched == [1, 10]
+
+        expected = scrapper.rank_players(
+            scrapper.build_dataset(scrapper.player_database)
+        )
+        assert second.shape == first.shape
+        pd.testing.assert_frame_equal(
+            second.sort_values(["Player", "Team"]).reset_index(drop=True),
+            expected.sort_values(["Player", "Team"]).reset_index(drop=True),
+        )
+
+    def test_fetch_many(object, stub_server):
+        """Test that several pages are fetched, retried and combined"""
+        scrapper = NFLDataScrapper(
+            url=f"http://127.0.0.1:{stub_server.server_port}/",
+            requests_per_second=100,
+        )
+        pages = [(2021, "standard", 1, 18), (2022, "ppr", 1, 18)]
+
+        weekly = scrapper.fetch_many(pages)
+
+        assert weekly.shape == (2 * 118 * 18, 7)
+        assert list(weekly.columns) == [
+            "Season",
+            "Scoring",
+            "Player",
+            "Position",
+            "Team",
+            "Week",
+            "Points",
+        ]
+        assert set(zip(weekly["Season"], weekly["Scoring"])) == {
+            (2021, "standard"),
+            (2022, "ppr"),
+        }
+        assert sorted(set(stub_server.requested)) == [
+            "/?year=2021&start=1&end=18",
+            "/ppr/?year=2022&start=1&end=18",
+        ]
+        assert len(stub_server.requested) == 4
+
+    def test_generate_nfl_dataset_incremental_offline(object, tmp_path, leaders_html):
+        """Test that offline refreshes fall back to the stored weeks"""
+        scrapper = NFLDataScrapper(
+            cache=ScrapeCache(cache_dir=str(tmp_path), offline=True)
+        )
+        scrapper.cache.save(
+            scrapper._stored_weeks_key(2022),
+            scrapper.parse_player_database(leaders_html),
+            latest_gameweek=18,
+        )
+
+        dataset = scrapper.generate_nfl_dataset(incremental=True)
+
+        assert len(dataset) == 118
+        assert scrapper.latest_gameweek == 18
+
+    def test_stored_weeks_without_metadata(object, tmp_path, weekly_pages):
+        """Test that stored weeks missing their latest gameweek are fetched
+        again from the first week"""
+        scrapper = NFLDataScrapper(cache=ScrapeCache(cache_dir=str(tmp_path)))
+        key = scrapper._stored_weeks_key(2022)
+        scrapper.cache.save(key, weekly_pages[0])
+        os.remove(scrapper.cache._metadata_path(key))
+        fetched = []
+
+        def fake_fetch(season=2022, start=1, end=18):
+            fetched.append(start)
+            return weekly_pages[1 if start > 1 else 0]
+
+        scrapper.fetch_player_database = fake_fetch
+        scrapper.update_player_database()
+
+        assert fetched == [1]
+        assert scrapper.latest_gameweek == 10
+
+    def test_stored_weeks_per_scoring(object, tmp_path, leaders_html):
+        """Test that scrappers for different scoring formats sharing a cache
+        keep their stored weeks apart"""
+        cache = ScrapeCache(cache_dir=str(tmp_path), offline=True)
+        ppr = NFLDataScrapper(cache=cache)
+        standard = NFLDataScrapper(url=LEADERS_URL, cache=cache)
+        table = ppr.parse_player_database(leaders_html)
+
+        assert ppr._stored_weeks_key(2022) != standard._stored_weeks_key(2022)
+
+        cache.save(ppr._stored_weeks_key(2022), table, latest_gameweek=18)
+        cache.save(
+            standard._stored_weeks_key(2022),
+            table.assign(**{"1": table["1"] / 2}),
+            latest_gameweek=18,
+        )
+        ppr.update_player_database()
+        standard.update_player_database()
+
+        pd.testing.assert_series_equal(ppr.player_database["1"], table["1"])
+        pd.testing.assert_series_equal(standard.player_database["1"], table["1"] / 2)
+
+    def test_apply_schema(object, sample_data):
+        """Test that labels become categoricals and numbers float32"""
+        typed = apply_schema(sample_data)
+
+        assert typed["Position"].dtype == "category"
+        assert typed["Squad"].dtype == "category"
+        assert (typed[["Price", "TTL", "Years Remaining"]].dtypes == "float32").all()
+
+    def test_memory_report(object, sample_data):
+        """Test that the report totals the memory saved"""
+        data = pd.concat([sample_data] * 100, ignore_index=True)
+        report = memory_report(data, apply_schema(data))
+
+        assert list(report.columns) == ["Before", "After", "Saving"]
+        assert report.loc["Total", "After"] < report.loc["Total", "Before"]
+
+    def test_build_dataset_unmatched(object, scrapper, leaders_html):
+        """Test that players are joined by id and misses are reported"""
+        dataset = scrapper.build_dataset(scrapper.parse_player_database(leaders_html))
+
+        assert dataset["PlayerID"].dtype == "int32"
+        assert (
+            dataset.loc[dataset["Player"] == "Patrick Mahomes II", "Squad"]
+            == "Rothley Raptors"
+        ).all()
+        assert list(scrapper.unmatched.columns) == ["Player", "Source"]
+
+    def test_build_dataset_shared_names(object, scrapper, leaders_html):
+        """Test that players sharing a name and position keep their own ids
+        and rows, and their roster entry is reported rather than guessed"""
+        dataset = scrapper.build_dataset(scrapper.parse_player_database(leaders_html))
+        patriots = dataset[dataset["Player"] == "New England Patriots"]
+
+        assert len(patriots) == 2
+        assert patriots["PlayerID"].is_unique
+        assert (patriots["Squad"] == "Free Agent").all()
+        assert dataset["PlayerID"].is_unique
+        assert (
+            scrapper.unmatched[["Player", "Source"]]
+            .values.tolist()
+            .count(["New England Patriots", "Rosters"])
+            == 1
+        )
+
+    def test_fit_price_model(object, scrapper, leaders_html):
+        """Test that the grouped fit matches a LinearRegression per position"""
+        data = scrapper.parse_player_database(leaders_html)
+        prices = np.random.default_rng(0).uniform(1, 60, len(data))
+        data["Price"] = np.where(np.arange(len(data)) % 3, prices, np.nan)
+        data.loc[data["Position"] == "K", "Price"] = np.nan
+
+        model = scrapper.fit_price_model(data)
+
+        for position in ["QB", "RB", "WR", "TE", "DST"]:
+            priced = data[(data["Position"] == position) & data["Price"].notna()]
+            lr = LinearRegression().fit(
+                priced[["TTL"]].astype("float64"), priced["Price"]
+            )
+
+            assert model.loc[position, "Slope"] == pytest.approx(lr.coef_[0])
+            assert model.loc[position, "Intercept"] == pytest.approx(lr.intercept_)
+
+        assert np.isnan(model.loc["K", "Slope"])
+
+    def test_add_price_data_unfitted(object, scrapper, sample_data):
+        """Test that positions without any priced players are recorded"""
+        sample_data.loc[3, "Position"] = "TE"
+
+        data_with_predictions = scrapper.add_price_data(sample_data)
+
+        assert scrapper.unfitted_positions == ["TE"]
+        assert data_with_predictions["Price"].isna().sum() == 1
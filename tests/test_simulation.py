@@ -0,0 +1,137 @@
+import diskcache
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.distributions import PlayerDistributions
+from src.simulation import LineupSimulator, SimulationCache
+
+
+@pytest.fixture()
+def player_params():
+    weekly = pd.DataFrame(
+        {1: [15.0, 8.0, 5.0], 2: [25.0, 12.0, 5.0], 3: [20.0, 10.0, 5.0]},
+        index=pd.Index(["Player A", "Player B", "Player C"], name="Player"),
+    )
+    yield PlayerDistributions(weekly)
+
+
+class TestSimulation(object):
+    def test_simulate_shape(object, player_params):
+        """Test that one row of totals is returned per lineup"""
+        simulator = LineupSimulator(player_params, n_sims=1000, seed=1)
+
+        totals = simulator.simulate(
+            [["Player A", "Player B"], ["Player B", "Player C"]]
+        )
+
+        assert totals.shape == (2, 1000)
+
+    def test_simulate_is_seeded(object, player_params):
+        """Test that the same seed reproduces the same samples"""
+        lineups = [["Player A", "Player B", "Player C"]]
+
+        first = LineupSimulator(player_params, n_sims=100, seed=7).simulate(lineups)
+        second = LineupSimulator(player_params, n_sims=100, seed=7).simulate(lineups)
+
+        assert np.array_equal(first, second)
+
+    def test_simulate_mean(object, player_params):
+        """Test that chunked sampling matches the expected lineup mean"""
+        simulator = LineupSimulator(
+            player_params, n_sims=200000, seed=0, chunk_size=30000
+        )
+
+        totals = simulator.simulate([["Player A", "Player B", "Player C"]])
+
+        assert totals[0].mean() == pytest.approx(35.0, rel=0.01)
+
+    def test_simulate_cache_hits(object, player_params):
+        """Test that only lineups missing from the cache are simulated"""
+        cache = SimulationCache()
+        simulator = LineupSimulator(player_params, n_sims=100, seed=3, cache=cache)
+
+        first = simulator.simulate([["Player A", "Player B"], ["Player B", "Player C"]])
+        second = simulator.simulate(
+            [["Player B", "Player A"], ["Player A", "Player C"]]
+        )
+
+        assert np.array_equal(first[0], second[0])
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 3
+
+    def test_simulate_independent_of_batch(object, player_params):
+        """Test that a lineup's totals don't depend on the other lineups"""
+        simulator = LineupSimulator(player_params, n_sims=100, seed=3)
+
+        alone = simulator.simulate([["Player A", "Player B"]])
+        batched = simulator.simulate(
+            [["Player C", "Player B"], ["Player A", "Player B"]]
+        )
+
+        assert np.array_equal(alone[0], batched[1])
+
+    def test_cache_spills_to_disk(object, tmp_path):
+        """Test that evicted entries are read back from the spill directory"""
+        cache = SimulationCache(maxsize=1, spill_dir=str(tmp_path))
+
+        cache.put(("a",), np.arange(3.0))
+        cache.put(("b",), np.arange(4.0))
+
+        assert len(list(tmp_path.iterdir())) == 1
+        assert np.array_equal(cache.get(("a",)), np.arange(3.0))
+        assert cache.stats()["disk_hits"] == 1
+        assert cache.stats()["entries"] == 1
+
+    def test_cache_shared_store(object, tmp_path, player_params):
+        """Test that totals simulated by one process's cache are reused by
+        another sharing its store"""
+        store = diskcache.Cache(str(tmp_path))
+        first = SimulationCache(store=store)
+        second = SimulationCache(store=store)
+        lineups = [["Player A", "Player B"]]
+
+        simulated = LineupSimulator(
+            player_params, n_sims=100, seed=3, cache=first
+        ).simulate(lineups)
+        reused = LineupSimulator(
+            player_params, n_sims=100, seed=3, cache=second
+        ).simulate(lineups)
+
+        assert np.array_equal(simulated, reused)
+        assert second.stats()["shared_hits"] == 1
+        assert second.stats()["misses"] == 0
+        store.close()
+
+    def test_simulate_model_in_cache_key(object, player_params):
+        """Test that each distribution model is cached separately"""
+        cache = SimulationCache()
+        simulator = LineupSimulator(player_params, n_sims=100, seed=3, cache=cache)
+
+        exponential = simulator.simulate([["Player A", "Player C"]])
+        bootstrap = simulator.simulate([["Player A", "Player C"]], model="bootstrap")
+
+        assert cache.stats()["misses"] == 2
+        assert not np.array_equal(exponential, bootstrap)
+
+    def test_simulate_correlated(object, player_params):
+        """Test that correlated simulation keeps the lineup mean"""
+        simulator = LineupSimulator(player_params, n_sims=100000, seed=5)
+
+        totals = simulator.simulate(
+            [["Player A", "Player B", "Player C"]], correlated=True
+        )
+
+        assert totals[0].mean() == pytest.approx(35.0, rel=0.02)
+
+    def test_simulate_reports_progress(object, player_params):
+        """Test that progress is reported after every chunk"""
+        progress = []
+        simulator = LineupSimulator(player_params, n_sims=1000, chunk_size=300)
+
+        simulator.simulate(
+            [["Player A"], ["Player B"]],
+            progress=lambda done, total: progress.append((done, total)),
+        )
+
+        assert progress == [(600, 2000), (1200, 2000), (1800, 2000), (2000, 2000)]
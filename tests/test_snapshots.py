@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.distributions import PlayerDistributions
+from src.features import PlayerForm
+from src.simulation import LineupSimulator
+from src.snapshots import SnapshotStore
+from src.trades import TradeAnalyzer
+
+
+@pytest.fixture()
+def store(tmp_path):
+    yield SnapshotStore(str(tmp_path), keep=2)
+
+
+@pytest.fixture()
+def weekly():
+    yield pd.DataFrame(
+        {1: [15.0, 8.0, 0.0], 2: [25.0, 12.0, 5.0], 3: [20.0, 10.0, 5.0]},
+        index=pd.Index([0, 1, 2], name="PlayerID"),
+    )
+
+
+@pytest.fixture()
+def distributions(weekly):
+    yield PlayerDistributions(weekly, teams=pd.Series(["KC", "KC", "BUF"]))
+
+
+class TestSnapshots(object):
+    def test_round_trip(object, store):
+        """Test that tables, arrays and metadata are loaded as written"""
+        table = pd.DataFrame(
+            {"Player": ["A", "B"], "Points": [1.5, 2.5]},
+            index=pd.Index(["x", "y"], name="Squad"),
+        )
+
+        version = store.write(
+            {"table": table},
+            {"scores": np.eye(2), "form": {"ewma": np.ones(2), "squads": table.index}},
+            {"a": [1]},
+        )
+        snapshot = store.load()
+        loaded = snapshot["tables"]["table"]
+
+        assert snapshot["version"] == version
+        pd.testing.assert_frame_equal(
+            loaded, table, check_dtype=False, check_index_type=False
+        )
+        assert all(isinstance(dtype, pd.ArrowDtype) for dtype in loaded.dtypes)
+        assert isinstance(snapshot["arrays"]["scores"], np.memmap)
+        assert np.array_equal(snapshot["arrays"]["scores"], np.eye(2))
+        assert np.array_equal(snapshot["arrays"]["form"]["ewma"], np.ones(2))
+        assert list(snapshot["arrays"]["form"]["squads"]) == ["x", "y"]
+        assert snapshot["metadata"]["a"] == [1]
+
+    def test_latest_and_prune(object, store):
+        """Test that the newest snapshot is served and only the newest are
+        kept on disk"""
+        assert store.latest() is None
+        with pytest.raises(FileNotFoundError):
+            store.load()
+
+        versions = [store.write({}, {"n": np.array([n])}) for n in range(3)]
+
+        assert store.latest() == versions[-1]
+        assert store.versions() == versions[1:]
+        assert store.load()["arrays"]["n"][0] == 2
+
+    def test_distributions_from_arrays(object, store, distributions):
+        """Test that distributions rebuilt from a snapshot match the fitted
+        ones"""
+        store.write({}, distributions.to_arrays())
+        loaded = PlayerDistributions.from_arrays(
+            store.load()["arrays"], distributions.version
+        )
+        rows = loaded.rows([2, 0])
+        q = np.full((1, 2), 0.5)
+
+        assert np.array_equal(rows, [2, 0])
+        assert np.allclose(
+            loaded.quantile("gamma", rows, q), distributions.quantile("gamma", rows, q)
+        )
+        assert np.allclose(
+            loaded.correlation_factor(rows), distributions.correlation_factor(rows)
+        )
+
+    def test_form_from_arrays(object, store, weekly):
+        """Test that form loaded from a snapshot matches the computed form"""
+        form = PlayerForm(weekly)
+
+        store.write({}, {"form": form.to_arrays()})
+        loaded = PlayerForm.from_arrays(store.load()["arrays"]["form"])
+
+        assert isinstance(loaded.ewma, np.memmap)
+        assert list(loaded.weeks) == [1, 2, 3]
+        pd.testing.assert_frame_equal(
+            loaded.summary(), form.summary(), check_names=False
+        )
+
+    def test_trades_from_arrays(object, store, distributions):
+        """Test that trades loaded from a snapshot are scored as before"""
+        players = pd.DataFrame(
+            {
+                "PlayerID": [0, 1, 2],
+                "Player": ["A", "B", "C"],
+                "Position": ["QB", "WR", "QB"],
+                "Squad": ["X", "X", "Y"],
+                "Trade Value": [10.0, 5.0, 12.0],
+                "PointsAboveReplacement": [30.0, 5.0, 20.0],
+                "Price": [20.0, 4.0, 25.0],
+                "Years Remaining": [1.0, 2.0, 3.0],
+            }
+        )
+        simulator = LineupSimulator(distributions, n_sims=100, seed=0)
+        trades = TradeAnalyzer(players, distributions, simulator)
+
+        store.write({"players": trades.players}, {"trades": trades.to_arrays()})
+        snapshot = store.load()
+        loaded = TradeAnalyzer.from_arrays(
+            snapshot["tables"]["players"],
+            snapshot["arrays"]["trades"],
+            distributions,
+            simulator,
+        )
+
+        pd.testing.assert_frame_equal(
+            loaded.evaluate("X", [1], "Y", [2]), trades.evaluate("X", [1], "Y", [2])
+        )
+        pd.testing.assert_frame_equal(
+            loaded.rank_trades(), trades.rank_trades(), check_dtype=False
+        )
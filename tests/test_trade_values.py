@@ -0,0 +1,89 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.players import PlayerIndex
+from src.trade_values import TradeValueHistory, read_trade_values
+
+
+@pytest.fixture()
+def history():
+    history = TradeValueHistory.from_csvs()
+
+    yield history
+
+
+class TestTradeValues(object):
+    @pytest.mark.parametrize(
+        "path",
+        [
+            "./data/trade-value-aug-22.csv",
+            "./data/trade-values-sept-22.csv",
+            "./data/trade-value-jan-23.csv",
+        ],
+    )
+    def test_read_trade_values(object, path):
+        """Test that every file layout is read into the same columns"""
+        values = read_trade_values(path)
+
+        assert list(values.columns) == ["Date", "Player", "Team", "Trade Value"]
+        assert values["Trade Value"].notna().all()
+
+    def test_value_at(object, history):
+        """Test that values come from the latest month before the date"""
+        values = history.value_at("2022-10-15")
+        expected = read_trade_values("./data/trade-value-oct-22.csv")
+
+        assert len(values) == len(expected)
+        assert history.value_at().equals(history.value_at(pd.Timestamp(2023, 1, 1)))
+        assert history.value_at("2021-01-01").empty
+
+    def test_change(object, history):
+        """Test that month over month changes line up with the values"""
+        change = history.change()
+        player_id = history.value_at().set_index("Player").loc["Josh Allen", "PlayerID"]
+
+        assert change.shape == history.wide.shape
+        assert change.iloc[0].isna().all()
+        assert change.loc["2022-09-01", player_id] == (
+            history.wide.loc["2022-09-01", player_id]
+            - history.wide.loc["2022-08-01", player_id]
+        )
+
+    def test_shared_names(object):
+        """Test that players sharing a name have their own trade values, and
+        keep them when they change team"""
+        values = pd.DataFrame(
+            {
+                "Date": pd.to_datetime(["2022-08-01"] * 2 + ["2022-09-01"] * 2),
+                "Player": ["Josh Allen"] * 4,
+                "Team": ["BUF", "JAX", "JAX", "MIA"],
+                "Trade Value": [38.0, 2.0, 1.5, 39.0],
+            }
+        )
+        history = TradeValueHistory(values)
+
+        assert history.wide.shape == (2, 2)
+        assert history.trend([0, 1]).loc["2022-09-01"].tolist() == [39.0, 1.5]
+
+    def test_identify(object, history):
+        """Test that values are keyed on the ids of a player index"""
+        player_index = PlayerIndex()
+        player_index.add(["Josh Allen", "Josh Allen"], ["QB", "LB"], ["BUF", "JAX"])
+
+        history.identify(player_index)
+
+        assert history.wide.columns.tolist() == [0]
+        assert history.trend([0]).notna().all().all()
+
+    def test_load(object, tmp_path, history):
+        """Test that the history round trips through Parquet"""
+        path = str(tmp_path / "trade-values.parquet")
+
+        first = TradeValueHistory.load(path)
+        assert os.path.exists(path)
+
+        second = TradeValueHistory.load(path)
+        pd.testing.assert_frame_equal(first.values, second.values)
+        pd.testing.assert_frame_equal(second.values, history.values)
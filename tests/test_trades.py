@@ -0,0 +1,74 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.distributions import PlayerDistributions
+from src.simulation import LineupSimulator
+from src.trades import TradeAnalyzer
+
+
+@pytest.fixture()
+def analyzer():
+    rng = np.random.default_rng(0)
+    positions = ["QB", "RB", "RB", "WR", "WR", "WR", "TE", "K", "DST"]
+    df = pd.DataFrame(
+        {
+            "PlayerID": np.arange(27),
+            "Player": [f"Player {i}" for i in range(27)],
+            "Position": positions * 3,
+            "Squad": ["A"] * 9 + ["B"] * 9 + ["Free Agent"] * 9,
+            "Trade Value": rng.uniform(1, 50, 27).round(),
+            "PointsAboveReplacement": rng.normal(0, 50, 27),
+            "Price": rng.uniform(1, 40, 27).round(),
+            "Years Remaining": rng.integers(1, 4, 27).astype(float),
+        }
+    )
+    weekly = pd.DataFrame(
+        rng.gamma(4.0, 3.0, (27, 6)), index=pd.Index(df["PlayerID"], name="PlayerID")
+    )
+    distributions = PlayerDistributions(weekly)
+    simulator = LineupSimulator(distributions, n_sims=2000, seed=0)
+    yield TradeAnalyzer(df, distributions, simulator)
+
+
+class TestTrades(object):
+    def test_evaluate(object, analyzer):
+        """Test that value and cost move between the squads"""
+        evaluation = analyzer.evaluate("A", [0, 1], "B", [10]).set_index(
+            ["Squad", "Measure"]
+        )
+
+        value = analyzer.value
+        assert evaluation.loc[("A", "Trade Value"), "Change"] == pytest.approx(
+            value[10] - value[0] - value[1]
+        )
+        assert evaluation.loc[("B", "Price"), "Change"] == pytest.approx(
+            -evaluation.loc[("A", "Price"), "Change"]
+        )
+        assert evaluation.loc[("A", "Weekly Points"), "Before"] > 0
+
+    def test_rank_trades(object, analyzer):
+        """Test that the vectorised ranking matches scoring every trade in
+        a loop"""
+        expected = []
+        a, b = range(9), range(9, 18)
+        for giver, receiver in [(a, b), (b, a)]:
+            for size in [1, 2]:
+                for gives in itertools.combinations(giver, size):
+                    for receives in receiver:
+                        partner_value = analyzer.value[list(gives)].sum()
+                        if partner_value >= analyzer.value[receives]:
+                            expected.append(
+                                analyzer.points[receives]
+                                - analyzer.points[list(gives)].sum()
+                            )
+
+        trades = analyzer.rank_trades(limit=10)
+
+        assert trades["Points Change"].tolist() == pytest.approx(
+            sorted(expected, reverse=True)[:10]
+        )
+        assert (trades["Partner Value Change"] >= 0).all()
+        assert analyzer.rank_trades("A", "B", limit=5)["Squad"].eq("A").all()
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.valuation import ContractValuation, contract_values, fit_aging_curves
+
+
+@pytest.fixture()
+def history():
+    # Running backs lose a fifth of their points a season, quarterbacks keep
+    # theirs
+    rows = []
+    for season in range(2018, 2022):
+        for player, position, start in [("QB1", "QB", 300.0), ("RB1", "RB", 200.0)]:
+            decay = 1.0 if position == "QB" else 0.8
+            total = start * decay ** (season - 2018)
+            rows += [
+                (season, "ppr", player, position, "KC", week, total / 2)
+                for week in [1, 2]
+            ]
+    yield pd.DataFrame(
+        rows,
+        columns=["Season", "Scoring", "Player", "Position", "Team", "Week", "Points"],
+    )
+
+
+class TestValuation(object):
+    def test_fit_aging_curves(object, history):
+        """Test that the curves recover each position's decay"""
+        curves = fit_aging_curves(history, max_years=5)
+
+        assert curves.loc["QB"].tolist() == pytest.approx([1.0] * 5)
+        assert curves.loc["RB", 1] == pytest.approx(0.8)
+        assert curves.loc["RB", 3] == pytest.approx(0.8**3)
+        # No pair of seasons is four apart, so the last year carries over
+        assert curves.loc["RB", 4] == pytest.approx(0.8**3)
+
+    def test_fit(object, history):
+        """Test that a valuation knows once its curves are fitted"""
+        valuation = ContractValuation(max_years=5)
+        valuation.fit(history)
+
+        assert valuation.fitted
+        assert valuation.curves.shape[1] == 5
+
+    def test_contract_values(object, history):
+        """Test that surplus is the discounted fair value less the price
+        over the contract"""
+        data = pd.DataFrame(
+            {
+                "Player": ["A", "B"],
+                "Position": ["RB", "RB"],
+                "Squad": ["S", "S"],
+                "Years Remaining": [2.0, 1.0],
+                "Price": [10.0, 10.0],
+                "TTL": [100.0, 100.0],
+            }
+        )
+        price_model = pd.DataFrame(
+            {"Slope": [0.2], "Intercept": [0.0]}, index=pd.Index(["RB"])
+        )
+        curves = fit_aging_curves(history, max_years=3)
+
+        values = contract_values(data, price_model, curves, discount_rate=0.1)
+        values = values.set_index("Player")
+
+        assert values.loc["A", "Surplus Value"] == pytest.approx(
+            (20 - 10) + (16 - 10) / 1.1
+        )
+        assert values.loc["B", "Surplus Value"] == pytest.approx(10)
+        assert values.loc["A", "Projected Points"] == pytest.approx(180)
+
+    def test_unfitted_curves_are_flat(object):
+        """Test that points are held flat before the curves are fitted"""
+        data = pd.DataFrame(
+            {
+                "Player": ["A"],
+                "Position": ["WR"],
+                "Squad": ["S"],
+                "Years Remaining": [3.0],
+                "Price": [0.0],
+                "TTL": [50.0],
+            }
+        )
+        price_model = pd.DataFrame(
+            {"Slope": [1.0], "Intercept": [0.0]}, index=pd.Index(["WR"])
+        )
+
+        valuation = ContractValuation(discount_rate=0.0)
+        values = valuation.value(data, price_model)
+
+        assert not valuation.fitted
+        assert values.loc[0, "Projected Points"] == pytest.approx(150)
+        assert np.isfinite(values["Surplus Value"]).all()